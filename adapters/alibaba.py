@@ -1,12 +1,20 @@
+import asyncio
 import time
-from typing import Any, Dict, Optional
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
 from urllib.parse import urlsplit
 
 import requests
 
 from adapters.base import ProviderAdapter
+from adapters.errors import AuthError, TaskFailedError
+from adapters.session import DEFAULT_POOL_SIZE
+from adapters.task_tracker import PollPending, TaskTracker, get_task_tracker
 from core.io_utils import parse_input_image
 from core.models import TASK_IMAGE2IMAGE, GenerationRequest, GenerationResponse
+from core.ratelimit import parse_retry_after
+
+_SYNC_UNSUPPORTED_MARK = "does not support synchronous calls"
 
 
 class AlibabaAdapter(ProviderAdapter):
@@ -22,21 +30,33 @@ class AlibabaAdapter(ProviderAdapter):
         async_url: str = "",
         poll_interval_seconds: int = 10,
         poll_timeout_seconds: int = 300,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        session: Optional[requests.Session] = None,
+        async_client: Any = None,
+        task_tracker: Optional[TaskTracker] = None,
     ):
         super().__init__(
             api_key=api_key,
             text2image_url=text2image_url,
             image2image_url=image2image_url,
             timeout_seconds=timeout_seconds,
+            pool_size=pool_size,
+            session=session,
+            async_client=async_client,
         )
         self.async_mode = async_mode
         self.async_url = async_url
         self.poll_interval_seconds = poll_interval_seconds
         self.poll_timeout_seconds = poll_timeout_seconds
+        self._task_tracker = task_tracker
+
+    @property
+    def task_tracker(self) -> TaskTracker:
+        return self._task_tracker or get_task_tracker()
 
     def build_headers(self) -> Dict[str, str]:
         if not self.api_key:
-            raise ValueError("ALIBABA_API_KEY is missing")
+            raise AuthError("ALIBABA_API_KEY is missing")
         return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -48,13 +68,25 @@ class AlibabaAdapter(ProviderAdapter):
         try:
             return super().generate(request)
         except RuntimeError as exc:
-            if "does not support synchronous calls" in str(exc):
+            if _SYNC_UNSUPPORTED_MARK in str(exc):
                 return self._generate_async(request)
             raise
 
+    async def agenerate(self, request: GenerationRequest) -> GenerationResponse:
+        if self._get_async_client() is None:
+            return await asyncio.to_thread(self.generate, request)
+        if self.async_mode:
+            return await self._agenerate_async(request)
+        try:
+            return await super().agenerate(request)
+        except RuntimeError as exc:
+            if _SYNC_UNSUPPORTED_MARK in str(exc):
+                return await self._agenerate_async(request)
+            raise
+
     def build_payload(self, request: GenerationRequest) -> Dict[str, Any]:
         content = [{"text": request.prompt}]
-        image_info = parse_input_image(request.input_image)
+        image_info = parse_input_image(request.input_image, lazy=True)
         if image_info:
             content.append({"image": image_info["value"]})
 
@@ -88,34 +120,81 @@ class AlibabaAdapter(ProviderAdapter):
             payload.update(request.extra)
         return payload
 
+    def submit_task(self, request: GenerationRequest) -> Dict[str, Any]:
+        """Create a DashScope task and return its id, poll URL and create response."""
+        create_url, headers, payload = self._prepare_async_call(request)
+        create_resp = self.post_json(create_url, headers, payload)
+        task_id, create_raw = self._parse_create_response(create_resp)
+        return {
+            "task_id": task_id,
+            "task_url": self._build_task_url(create_url, task_id),
+            "create_task": create_raw,
+        }
+
+    def check_task(self, task_url: str) -> Any:
+        """Poll once: final payload, ``None`` while pending; raises if the task failed."""
+        poll_resp = self.session.get(
+            task_url, headers=self.build_headers(), timeout=self.timeout_seconds
+        )
+        return self._check_poll_response(poll_resp)
+
+    def task_response(
+        self,
+        request: GenerationRequest,
+        task_id: str,
+        create_raw: Any,
+        final_raw: Any,
+        latency_ms: int,
+    ) -> GenerationResponse:
+        return self._task_response(request, task_id, create_raw, final_raw, latency_ms)
+
     def _generate_async(self, request: GenerationRequest) -> GenerationResponse:
+        started = time.perf_counter()
+        task = self.submit_task(request)
+        future = self._track_task(
+            task["task_id"], task["task_url"], self.build_headers(), request.model
+        )
+        final_raw = future.result()
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        return self._task_response(
+            request, task["task_id"], task["create_task"], final_raw, latency_ms
+        )
+
+    async def _agenerate_async(self, request: GenerationRequest) -> GenerationResponse:
+        client = self._get_async_client()
+        create_url, headers, payload = await asyncio.to_thread(self._prepare_async_call, request)
+        started = time.perf_counter()
+        create_resp = await self.apost_json(client, create_url, headers, payload)
+        task_id, create_raw = self._parse_create_response(create_resp)
+        task_url = self._build_task_url(create_url, task_id)
+        future = self._track_task(task_id, task_url, headers, request.model)
+        final_raw = await asyncio.wrap_future(future)
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        return self._task_response(request, task_id, create_raw, final_raw, latency_ms)
+
+    def _prepare_async_call(self, request: GenerationRequest) -> Tuple[str, Dict[str, str], Any]:
         create_url = self.async_url or self._derive_async_url(self._resolve_url(request.task_type))
         payload = self.build_payload(request)
         headers = self.build_headers()
         headers["X-DashScope-Async"] = "enable"
+        return create_url, headers, payload
 
-        started = time.perf_counter()
-        create_resp = requests.post(
-            create_url,
-            headers=headers,
-            json=payload,
-            timeout=self.timeout_seconds,
-        )
+    def _parse_create_response(self, create_resp: Any) -> Tuple[str, Any]:
         create_raw = self._json_or_text(create_resp)
-        if not create_resp.ok:
-            raise RuntimeError(
-                f"{self.provider} async create error status={create_resp.status_code} "
-                f"body={str(create_raw)[:500]}"
-            )
-
+        self._raise_for_status(create_resp, create_raw, "async create error")
         task_id = self._extract_task_id(create_raw)
         if not task_id:
             raise RuntimeError(f"{self.provider} async create missing task_id: {create_raw}")
+        return task_id, create_raw
 
-        task_url = self._build_task_url(create_url, task_id)
-        final_raw = self._poll_task(task_url, headers)
-        latency_ms = int((time.perf_counter() - started) * 1000)
-
+    def _task_response(
+        self,
+        request: GenerationRequest,
+        task_id: str,
+        create_raw: Any,
+        final_raw: Any,
+        latency_ms: int,
+    ) -> GenerationResponse:
         return GenerationResponse(
             request_id=task_id,
             provider=request.provider,
@@ -126,28 +205,38 @@ class AlibabaAdapter(ProviderAdapter):
             raw_response={"create_task": create_raw, "task_result": final_raw},
         )
 
-    def _poll_task(self, task_url: str, headers: Dict[str, str]) -> Any:
-        deadline = time.monotonic() + self.poll_timeout_seconds
-        while time.monotonic() < deadline:
-            poll_resp = requests.get(task_url, headers=headers, timeout=self.timeout_seconds)
-            poll_raw = self._json_or_text(poll_resp)
-            if not poll_resp.ok:
-                raise RuntimeError(
-                    f"{self.provider} async poll error status={poll_resp.status_code} "
-                    f"body={str(poll_raw)[:500]}"
-                )
-
-            status = self._extract_task_status(poll_raw)
-            if status in {"SUCCEEDED", "SUCCESS"}:
-                return poll_raw
-            if status in {"FAILED", "CANCELED", "CANCELLED"}:
-                raise RuntimeError(f"{self.provider} async task failed: {poll_raw}")
-            time.sleep(self.poll_interval_seconds)
-
-        raise TimeoutError(
-            f"{self.provider} async task poll timeout after {self.poll_timeout_seconds}s"
+    def _track_task(
+        self, task_id: str, task_url: str, headers: Dict[str, str], model: str
+    ) -> Future:
+        """Hand the task to the shared poller; the returned future holds the final payload."""
+
+        def _poll() -> Any:
+            poll_resp = self.session.get(task_url, headers=headers, timeout=self.timeout_seconds)
+            poll_raw = self._check_poll_response(poll_resp)
+            if poll_raw is None:
+                return PollPending(parse_retry_after(poll_resp.headers.get("Retry-After")))
+            return poll_raw
+
+        return self.task_tracker.track(
+            task_id,
+            _poll,
+            timeout_seconds=self.poll_timeout_seconds,
+            interval_seconds=self.poll_interval_seconds,
+            label=f"{self.provider} async task",
+            history_key=f"{self.provider}:{model}",
         )
 
+    def _check_poll_response(self, poll_resp: Any) -> Any:
+        """Return the final task payload, ``None`` while pending, or raise on failure."""
+        poll_raw = self._json_or_text(poll_resp)
+        self._raise_for_status(poll_resp, poll_raw, "async poll error")
+        status = self._extract_task_status(poll_raw)
+        if status in {"SUCCEEDED", "SUCCESS"}:
+            return poll_raw
+        if status in {"FAILED", "CANCELED", "CANCELLED"}:
+            raise TaskFailedError(f"{self.provider} async task failed: {poll_raw}")
+        return None
+
     def _extract_task_id(self, raw: Any) -> Optional[str]:
         if isinstance(raw, dict):
             output = raw.get("output")
@@ -178,9 +267,3 @@ class AlibabaAdapter(ProviderAdapter):
 
     def _derive_async_url(self, url: str) -> str:
         return url.replace("/multimodal-generation/", "/image-generation/")
-
-    def _json_or_text(self, response: requests.Response) -> Any:
-        try:
-            return response.json()
-        except ValueError:
-            return {"raw_text": response.text}
@@ -1,11 +1,28 @@
+import asyncio
 import time
 import uuid
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 
-from core.models import GenerationRequest, GenerationResponse
+from adapters.errors import InputError, error_for_status
+from adapters.session import (
+    DEFAULT_POOL_SIZE,
+    build_async_client,
+    build_session,
+    session_stats,
+)
+from core.jsonstream import StreamingJSONBody
+from core.models import (
+    TASK_IMAGE2IMAGE,
+    GenerationRequest,
+    GenerationResponse,
+    externalize_image_data,
+    image_digest,
+    keep_raw_response,
+)
+from core.ratelimit import observe_response_headers, parse_retry_after, retry_after_from_response
 
 
 class ProviderAdapter(ABC):
@@ -17,33 +34,101 @@ class ProviderAdapter(ABC):
         text2image_url: str,
         image2image_url: str,
         timeout_seconds: int = 120,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        session: Optional[requests.Session] = None,
+        async_client: Any = None,
     ):
         self.api_key = api_key
         self.text2image_url = text2image_url
         self.image2image_url = image2image_url
         self.timeout_seconds = timeout_seconds
+        self.pool_size = pool_size
+        # One keep-alive pool per adapter, shared with image downloads in persist_run.
+        self.session = session or build_session(pool_size)
+        # httpx.AsyncClient used by agenerate(); created lazily per event loop unless injected.
+        self._async_client = async_client
+        self._async_client_owned = async_client is None
+        self._async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def connection_stats(self) -> Dict[str, int]:
+        return session_stats(self.session)
+
+    def close(self) -> None:
+        self.session.close()
+
+    async def aclose(self) -> None:
+        client = self._async_client
+        if client is not None and self._async_client_owned:
+            self._async_client = None
+            self._async_client_loop = None
+            await client.aclose()
 
     def generate(self, request: GenerationRequest) -> GenerationResponse:
-        url = self._resolve_url(request.task_type)
-        payload = self.build_payload(request)
-        headers = self.build_headers()
+        url, headers, payload = self.prepare_call(request)
         started = time.perf_counter()
-        resp = requests.post(url, headers=headers, json=payload, timeout=self.timeout_seconds)
+        resp = self.post_json(url, headers, payload)
         latency_ms = int((time.perf_counter() - started) * 1000)
+        return self.build_response(request, resp, latency_ms)
 
-        raw: Any
-        try:
-            raw = resp.json()
-        except ValueError:
-            raw = {"raw_text": resp.text}
+    async def agenerate(self, request: GenerationRequest) -> GenerationResponse:
+        """Async counterpart of ``generate``; falls back to a worker thread without httpx."""
+        client = self._get_async_client()
+        if client is None:
+            return await asyncio.to_thread(self.generate, request)
+        url, headers, payload = await self._aprepare_call(request)
+        started = time.perf_counter()
+        resp = await self.apost_json(client, url, headers, payload)
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        return self.build_response(request, resp, latency_ms)
 
-        if not resp.ok:
-            error_preview = str(raw)[:500]
-            raise RuntimeError(
-                f"{self.provider} API error status={resp.status_code} body={error_preview}"
+    def post_json(self, url: str, headers: Dict[str, str], payload: Any, **kwargs: Any) -> Any:
+        """POST ``payload`` as JSON, streaming any ``Base64File`` input from disk."""
+        body = StreamingJSONBody.wrap(payload)
+        if body is None:
+            return self.session.post(
+                url, headers=headers, json=payload, timeout=self.timeout_seconds, **kwargs
             )
+        # An iterable with a length: requests sends it as-is with a Content-Length.
+        return self.session.post(
+            url, headers=headers, data=body, timeout=self.timeout_seconds, **kwargs
+        )
+
+    async def apost_json(
+        self, client: Any, url: str, headers: Dict[str, str], payload: Any
+    ) -> Any:
+        body = StreamingJSONBody.wrap(payload)
+        if body is None:
+            return await client.post(url, headers=headers, json=payload)
+        # httpx would use chunked encoding for an async iterator without the explicit length.
+        headers = {**headers, "Content-Length": str(len(body))}
+        return await client.post(url, headers=headers, content=body.async_stream())
+
+    def prepare_call(self, request: GenerationRequest) -> Tuple[str, Dict[str, str], Any]:
+        url = self.request_url(request)
+        payload = self.build_payload(request)
+        headers = self.build_headers()
+        return url, headers, payload
+
+    async def _aprepare_call(
+        self, request: GenerationRequest
+    ) -> Tuple[str, Dict[str, str], Any]:
+        if request.task_type == TASK_IMAGE2IMAGE:
+            # Input images may be read from disk or fetched, keep that off the event loop.
+            return await asyncio.to_thread(self.prepare_call, request)
+        return self.prepare_call(request)
+
+    def build_response(
+        self, request: GenerationRequest, resp: Any, latency_ms: int
+    ) -> GenerationResponse:
+        """Turn a requests/httpx response into a ``GenerationResponse`` or raise."""
+        raw = self._json_or_text(resp)
+        self._raise_for_status(resp, raw, "API error")
+        observe_response_headers(self.provider, request.model, resp.headers)
 
         images = self.extract_images(raw)
+        if not keep_raw_response():
+            # Inline base64 would otherwise be held twice: in raw and as a data URI in images.
+            raw = externalize_image_data(raw, images)
         return GenerationResponse(
             request_id=self.extract_request_id(raw),
             provider=request.provider,
@@ -54,15 +139,46 @@ class ProviderAdapter(ABC):
             raw_response=raw,
         )
 
+    def _raise_for_status(self, resp: Any, raw: Any, what: str) -> None:
+        status = resp.status_code
+        if status < 400:
+            return
+        message = f"{self.provider} {what} status={status} body={str(raw)[:500]}"
+        if status == 429:
+            retry_after = retry_after_from_response(resp.headers, raw)
+        else:
+            retry_after = parse_retry_after(resp.headers.get("retry-after"))
+        raise error_for_status(status, message, retry_after=retry_after)
+
+    def request_url(self, request: GenerationRequest) -> str:
+        return self._resolve_url(request.task_type)
+
+    def _get_async_client(self) -> Any:
+        if not self._async_client_owned:
+            return self._async_client
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            # httpx pools are bound to the loop that created them.
+            self._async_client = build_async_client(self.pool_size, self.timeout_seconds)
+            self._async_client_loop = loop
+        return self._async_client
+
+    @staticmethod
+    def _json_or_text(response: Any) -> Any:
+        try:
+            return response.json()
+        except ValueError:
+            return {"raw_text": response.text}
+
     def _resolve_url(self, task_type: str) -> str:
         if task_type == "text_to_image":
             target = self.text2image_url
         elif task_type == "image_to_image":
             target = self.image2image_url
         else:
-            raise ValueError(f"Unsupported task_type: {task_type}")
+            raise InputError(f"Unsupported task_type: {task_type}")
         if not target:
-            raise ValueError(f"Missing endpoint URL for {self.provider}:{task_type}")
+            raise InputError(f"Missing endpoint URL for {self.provider}:{task_type}")
         return target
 
     def extract_request_id(self, raw: Any) -> str:
@@ -74,18 +190,21 @@ class ProviderAdapter(ABC):
         return uuid.uuid4().hex[:12]
 
     def extract_images(self, raw: Any) -> List[str]:
+        """Image URLs / data URIs / base64 strings in ``raw``, in order, without duplicates.
+
+        Provider-specific known paths are tried first; the generic tree walk only
+        runs when they find nothing.
+        """
         if not raw:
             return []
-        results: List[str] = []
-        self._walk_and_collect(raw, results)
-        deduped = []
-        seen = set()
-        for item in results:
-            if item in seen:
-                continue
-            seen.add(item)
-            deduped.append(item)
-        return deduped
+        results = self.extract_known_images(raw)
+        if not results:
+            self._walk_and_collect(raw, results)
+        return dedupe_images(results)
+
+    def extract_known_images(self, raw: Any) -> List[str]:
+        """Images at the documented response paths; empty when the shape is unexpected."""
+        return []
 
     def _walk_and_collect(self, node: Any, collector: List[str]) -> None:
         if isinstance(node, dict):
@@ -101,17 +220,19 @@ class ProviderAdapter(ABC):
                 self._walk_and_collect(item, collector)
 
     def _looks_like_image(self, key: str, value: str) -> bool:
-        low_key = key.lower()
-        low_val = value.lower()
-        if low_val.startswith("http://") or low_val.startswith("https://"):
+        # Only a short head is lowercased; base64 values can be many megabytes.
+        head = value[:16].lower()
+        if head.startswith(("http://", "https://")):
+            low_key = key.lower()
             return any(
                 mark in low_key
                 for mark in ("image", "img", "url", "output", "result", "generated")
             )
-        if low_val.startswith("data:image/"):
+        if head.startswith("data:image/"):
             return True
-        if "b64" in low_key or "base64" in low_key:
-            return len(value) > 100
+        if len(value) > 100:
+            low_key = key.lower()
+            return "b64" in low_key or "base64" in low_key
         return False
 
     @abstractmethod
@@ -121,3 +242,18 @@ class ProviderAdapter(ABC):
     @abstractmethod
     def build_payload(self, request: GenerationRequest) -> Dict[str, Any]:
         raise NotImplementedError
+
+
+def dedupe_images(images: List[str]) -> List[str]:
+    """Drop repeated images, comparing full strings only when a sampled digest matches."""
+    if len(images) < 2:
+        return images
+    seen: Dict[Tuple[int, str, str, str], List[str]] = {}
+    deduped: List[str] = []
+    for item in images:
+        bucket = seen.setdefault(image_digest(item), [])
+        if any(item is other or item == other for other in bucket):
+            continue
+        bucket.append(item)
+        deduped.append(item)
+    return deduped
@@ -0,0 +1,60 @@
+from typing import Optional
+
+
+class ProviderError(RuntimeError):
+    """Provider HTTP failure with the status code and any server retry hint."""
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class TransientError(ProviderError):
+    """Server-side or timeout failure that may succeed on retry (5xx, 408)."""
+
+
+class ThrottledError(ProviderError):
+    """Provider rejected the call for quota reasons (HTTP 429)."""
+
+
+class ClientRequestError(ProviderError):
+    """Provider rejected the payload (4xx); retrying the same request will not help."""
+
+
+class AuthError(ProviderError, ValueError):
+    """Missing or rejected credentials (401/403, or no API key configured)."""
+
+
+class TaskFailedError(ProviderError):
+    """The provider reports an async task as failed or cancelled."""
+
+
+class InputError(ValueError):
+    """Request or configuration problem found before calling the provider.
+
+    Unsupported task type, missing endpoint URL, unusable input image: the same
+    request fails the same way on every attempt.
+    """
+
+
+TRANSIENT_STATUS_CODES = {408, 409, 425, 500, 502, 503, 504}
+
+
+def error_for_status(
+    status_code: int, message: str, retry_after: Optional[float] = None
+) -> ProviderError:
+    if status_code == 429:
+        return ThrottledError(message, status_code=status_code, retry_after=retry_after)
+    if status_code in {401, 403}:
+        return AuthError(message, status_code=status_code)
+    if status_code in TRANSIENT_STATUS_CODES or status_code >= 500:
+        return TransientError(message, status_code=status_code, retry_after=retry_after)
+    if 400 <= status_code < 500:
+        return ClientRequestError(message, status_code=status_code)
+    return ProviderError(message, status_code=status_code, retry_after=retry_after)
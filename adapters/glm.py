@@ -1,6 +1,7 @@
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from adapters.base import ProviderAdapter
+from adapters.errors import AuthError
 from core.io_utils import parse_input_image
 from core.models import TASK_IMAGE2IMAGE, GenerationRequest
 
@@ -10,7 +11,7 @@ class GLMAdapter(ProviderAdapter):
 
     def build_headers(self) -> Dict[str, str]:
         if not self.api_key:
-            raise ValueError("GLM_API_KEY is missing")
+            raise AuthError("GLM_API_KEY is missing")
         return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -32,10 +33,23 @@ class GLMAdapter(ProviderAdapter):
 
         # Some GLM image models accept source image URL/Base64 for editing workflows.
         if request.task_type == TASK_IMAGE2IMAGE:
-            image_info = parse_input_image(request.input_image)
+            image_info = parse_input_image(request.input_image, lazy=True)
             if image_info:
                 payload["image_url"] = image_info["value"]
 
         if request.extra:
             payload.update(request.extra)
         return payload
+
+    def extract_known_images(self, raw: Any) -> List[str]:
+        images: List[str] = []
+        data = raw.get("data") if isinstance(raw, dict) else None
+        if not isinstance(data, list):
+            return images
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            value = item.get("url") or item.get("b64_json")
+            if isinstance(value, str) and value:
+                images.append(value)
+        return images
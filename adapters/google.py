@@ -1,13 +1,23 @@
-import base64
+import asyncio
 import time
 import uuid
 from typing import Any, Dict, List, Optional
 
-import requests
-
 from adapters.base import ProviderAdapter
+from adapters.errors import AuthError, InputError
+from core.assets import get_input_assets
 from core.io_utils import parse_input_image
-from core.models import TASK_IMAGE2IMAGE, GenerationRequest, GenerationResponse
+from core.jsonstream import spool_inline_images, stream_responses_enabled
+from core.models import (
+    IMAGE_REF_PREFIX,
+    TASK_IMAGE2IMAGE,
+    GenerationRequest,
+    GenerationResponse,
+    keep_raw_response,
+)
+from core.ratelimit import observe_response_headers
+
+STREAM_CHUNK_BYTES = 256 * 1024
 
 
 class GoogleAdapter(ProviderAdapter):
@@ -15,38 +25,17 @@ class GoogleAdapter(ProviderAdapter):
 
     def build_headers(self) -> Dict[str, str]:
         if not self.api_key:
-            raise ValueError("GOOGLE_API_KEY is missing")
+            raise AuthError("GOOGLE_API_KEY is missing")
         return {
             "x-goog-api-key": self.api_key,
             "Content-Type": "application/json",
         }
 
-    def generate(self, request: GenerationRequest) -> GenerationResponse:
+    def request_url(self, request: GenerationRequest) -> str:
         url = self._resolve_url(request.task_type)
         if "{model}" in url:
             url = url.format(model=request.model)
-        payload = self.build_payload(request)
-        headers = self.build_headers()
-
-        started = time.perf_counter()
-        resp = requests.post(url, headers=headers, json=payload, timeout=self.timeout_seconds)
-        latency_ms = int((time.perf_counter() - started) * 1000)
-        raw = self._json_or_text(resp)
-
-        if not resp.ok:
-            raise RuntimeError(
-                f"{self.provider} API error status={resp.status_code} body={str(raw)[:500]}"
-            )
-
-        return GenerationResponse(
-            request_id=self.extract_request_id(raw),
-            provider=request.provider,
-            model=request.model,
-            task_type=request.task_type,
-            images=self.extract_images(raw),
-            latency_ms=latency_ms,
-            raw_response=raw,
-        )
+        return url
 
     def build_payload(self, request: GenerationRequest) -> Dict[str, Any]:
         parts: List[Dict[str, Any]] = [{"text": request.prompt}]
@@ -66,6 +55,39 @@ class GoogleAdapter(ProviderAdapter):
             payload.update(request.extra)
         return payload
 
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        if not stream_responses_enabled() or keep_raw_response():
+            return super().generate(request)
+        url, headers, payload = self.prepare_call(request)
+        started = time.perf_counter()
+        resp = self.post_json(url, headers, payload, stream=True)
+        try:
+            if resp.status_code >= 400 or "json" not in resp.headers.get("content-type", "json"):
+                latency_ms = int((time.perf_counter() - started) * 1000)
+                return self.build_response(request, resp, latency_ms)
+            raw, files = spool_inline_images(resp.iter_content(chunk_size=STREAM_CHUNK_BYTES))
+        finally:
+            resp.close()
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        observe_response_headers(self.provider, request.model, resp.headers)
+        # Spooled files come first so igt-image:images[i] references stay aligned.
+        images = [path.as_uri() for path in files] + self.extract_images(raw)
+        return GenerationResponse(
+            request_id=self.extract_request_id(raw),
+            provider=request.provider,
+            model=request.model,
+            task_type=request.task_type,
+            images=images,
+            latency_ms=latency_ms,
+            raw_response=raw,
+        )
+
+    async def agenerate(self, request: GenerationRequest) -> GenerationResponse:
+        if stream_responses_enabled() and not keep_raw_response():
+            # The streaming parser reads from a requests body; keep it on a worker thread.
+            return await asyncio.to_thread(self.generate, request)
+        return await super().agenerate(request)
+
     def extract_request_id(self, raw: Any) -> str:
         if isinstance(raw, dict):
             for key in ("request_id", "id", "task_id", "responseId"):
@@ -74,67 +96,72 @@ class GoogleAdapter(ProviderAdapter):
                     return value.strip()
         return uuid.uuid4().hex[:12]
 
-    def extract_images(self, raw: Any) -> List[str]:
-        images = super().extract_images(raw)
-        self._walk_inline_data(raw, images)
-        deduped: List[str] = []
-        seen = set()
-        for item in images:
-            if item in seen:
+    def extract_known_images(self, raw: Any) -> List[str]:
+        images: List[str] = []
+        candidates = raw.get("candidates") if isinstance(raw, dict) else None
+        if not isinstance(candidates, list):
+            return images
+        for candidate in candidates:
+            content = candidate.get("content") if isinstance(candidate, dict) else None
+            parts = content.get("parts") if isinstance(content, dict) else None
+            if not isinstance(parts, list):
                 continue
-            seen.add(item)
-            deduped.append(item)
-        return deduped
-
-    def _walk_inline_data(self, node: Any, collector: List[str]) -> None:
-        if isinstance(node, dict):
-            for key in ("inlineData", "inline_data"):
-                inline = node.get(key)
-                if isinstance(inline, dict):
-                    data = inline.get("data")
-                    mime = inline.get("mimeType") or inline.get("mime_type") or "image/png"
-                    if isinstance(data, str) and data:
-                        collector.append(f"data:{mime};base64,{data}")
-            for value in node.values():
-                self._walk_inline_data(value, collector)
+            for part in parts:
+                if isinstance(part, dict):
+                    self._append_inline_data(part, images)
+        return images
+
+    def _walk_and_collect(self, node: Any, collector: List[str]) -> None:
+        # One walk for both inlineData parts and the generic URL / base64 fields.
+        if isinstance(node, dict) and self._append_inline_data(node, collector):
             return
-        if isinstance(node, list):
-            for item in node:
-                self._walk_inline_data(item, collector)
-
-    def _to_inline_data(self, input_image: Optional[str]) -> Dict[str, str]:
-        image_info = parse_input_image(input_image)
+        super()._walk_and_collect(node, collector)
+
+    @staticmethod
+    def _append_inline_data(node: Dict[str, Any], collector: List[str]) -> bool:
+        for key in ("inlineData", "inline_data"):
+            inline = node.get(key)
+            if isinstance(inline, dict):
+                data = inline.get("data")
+                mime = inline.get("mimeType") or inline.get("mime_type") or "image/png"
+                if isinstance(data, str) and data.startswith(IMAGE_REF_PREFIX):
+                    # Already decoded to a file by the streaming parser.
+                    return True
+                if isinstance(data, str) and data:
+                    collector.append(f"data:{mime};base64,{data}")
+                    return True
+        return False
+
+    def _to_inline_data(self, input_image: Optional[str]) -> Dict[str, Any]:
+        image_info = parse_input_image(input_image, lazy=True)
         if not image_info:
-            raise ValueError("input_image is required for image_to_image")
+            raise InputError("input_image is required for image_to_image")
+
+        if image_info["kind"] == "file":
+            local = image_info["value"]
+            return {"mime_type": local.mime, "data": local.as_base64()}
 
         if image_info["kind"] == "data_uri":
             return self._inline_from_data_uri(image_info["value"])
 
         if image_info["kind"] == "url":
-            resp = requests.get(image_info["value"], timeout=self.timeout_seconds)
-            resp.raise_for_status()
-            mime = resp.headers.get("content-type", "image/png").split(";")[0]
-            data = base64.b64encode(resp.content).decode("ascii")
-            return {"mime_type": mime, "data": data}
+            asset = get_input_assets().remote(
+                image_info["value"], self.session, self.timeout_seconds
+            )
+            return {"mime_type": asset.mime, "data": asset.base64().decode("ascii")}
 
         # Raw base64 fallback.
         return {"mime_type": "image/png", "data": image_info["value"]}
 
     def _inline_from_data_uri(self, value: str) -> Dict[str, str]:
         if "," not in value:
-            raise ValueError("Invalid data URI for input_image")
+            raise InputError("Invalid data URI for input_image")
         header, data = value.split(",", 1)
         mime = "image/png"
         if ":" in header and ";" in header:
             mime = header.split(":", 1)[1].split(";", 1)[0]
         return {"mime_type": mime, "data": data}
 
-    def _json_or_text(self, response: requests.Response) -> Any:
-        try:
-            return response.json()
-        except ValueError:
-            return {"raw_text": response.text}
-
     def _size_to_aspect_ratio(self, size: Optional[str]) -> Optional[str]:
         if not size:
             return None
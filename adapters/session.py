@@ -0,0 +1,109 @@
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ModuleNotFoundError:  # optional: pip install -e .[async]
+    httpx = None  # type: ignore[assignment]
+
+DEFAULT_POOL_SIZE = 10
+
+
+class ConnectionCounter:
+    """Thread-safe counters for requests sent and TCP connections opened."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            requests_sent = self.requests
+            connections = self.connections
+        return {
+            "requests": requests_sent,
+            "connections": connections,
+            "reused": max(0, requests_sent - connections),
+        }
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """Keep-alive transport adapter that counts new connections vs reused ones."""
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE) -> None:
+        self.counter = ConnectionCounter()
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: _counting_pool_class(pool_class, self.counter)
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        self.counter.record_request()
+        return super().send(request, **kwargs)
+
+
+def build_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    if pool_size < 1:
+        raise ValueError("pool_size must be >= 1")
+    session = requests.Session()
+    transport = PooledHTTPAdapter(pool_size=pool_size)
+    session.mount("https://", transport)
+    session.mount("http://", transport)
+    return session
+
+
+def async_http_available() -> bool:
+    return httpx is not None
+
+
+def build_async_client(pool_size: int = DEFAULT_POOL_SIZE, timeout_seconds: float = 120) -> Any:
+    """Return a keep-alive ``httpx.AsyncClient``, or ``None`` when httpx is not installed."""
+    if httpx is None:
+        return None
+    if pool_size < 1:
+        raise ValueError("pool_size must be >= 1")
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        # Waiting for a free pooled connection is queueing, not a request timeout.
+        timeout=httpx.Timeout(timeout_seconds, pool=None),
+    )
+
+
+def session_stats(session: Optional[requests.Session]) -> Dict[str, int]:
+    totals = {"requests": 0, "connections": 0, "reused": 0}
+    if session is None:
+        return totals
+    seen = set()
+    for transport in session.adapters.values():
+        if not isinstance(transport, PooledHTTPAdapter) or id(transport) in seen:
+            continue
+        seen.add(id(transport))
+        for key, value in transport.counter.snapshot().items():
+            totals[key] += value
+    return totals
+
+
+def _counting_pool_class(base: type, counter: ConnectionCounter) -> type:
+    class CountingConnectionPool(base):  # type: ignore[valid-type, misc]
+        def _new_conn(self):  # type: ignore[no-untyped-def]
+            counter.record_connection()
+            return super()._new_conn()
+
+    CountingConnectionPool.__name__ = f"Counting{base.__name__}"
+    return CountingConnectionPool
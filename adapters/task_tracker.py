@@ -0,0 +1,317 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from adapters.errors import ThrottledError
+
+POLL_INITIAL_ENV = "ALIBABA_POLL_INITIAL_SECONDS"
+POLL_BACKOFF_ENV = "ALIBABA_POLL_BACKOFF"
+POLL_HISTORY_ENV = "IGT_POLL_HISTORY_PATH"
+# Polls in flight at once; a hung poll only ties up one of these.
+DEFAULT_POLL_WORKERS = 4
+
+PollFn = Callable[[], Any]
+
+
+class PollPending:
+    """Poll result for a task that is still running, optionally with a server wait hint."""
+
+    def __init__(self, retry_after: Optional[float] = None):
+        self.retry_after = retry_after
+
+
+class PollSchedule:
+    """Poll delays that start short and grow toward the caller's interval cap.
+
+    The first poll is pushed out to ~80% of the task's usual completion time when
+    the history has one, so slow models are not polled from the first second.
+    """
+
+    def __init__(
+        self,
+        initial_seconds: float = 1.0,
+        backoff: float = 1.5,
+        seed_fraction: float = 0.8,
+    ):
+        if initial_seconds < 0:
+            raise ValueError("initial_seconds must be >= 0")
+        if backoff < 1:
+            raise ValueError("backoff must be >= 1")
+        self.initial_seconds = initial_seconds
+        self.backoff = backoff
+        self.seed_fraction = seed_fraction
+
+    @classmethod
+    def from_env(cls) -> "PollSchedule":
+        return cls(
+            initial_seconds=float(os.getenv(POLL_INITIAL_ENV, "1")),
+            backoff=float(os.getenv(POLL_BACKOFF_ENV, "1.5")),
+        )
+
+    def first_delay(self, cap_seconds: float, expected_seconds: Optional[float]) -> float:
+        if cap_seconds <= 0:
+            return 0.0
+        delay = min(cap_seconds, self.initial_seconds)
+        if expected_seconds:
+            delay = max(delay, expected_seconds * self.seed_fraction)
+        return delay
+
+    def next_delay(self, cap_seconds: float, polls_done: int) -> float:
+        if cap_seconds <= 0:
+            return 0.0
+        return min(cap_seconds, self.initial_seconds * (self.backoff ** polls_done))
+
+
+class CompletionHistory:
+    """Smoothed task completion time per key (e.g. ``alibaba:wanx-v1``).
+
+    Kept in memory and, when ``path`` is set, written back as a small JSON file
+    so the next process starts with the same estimates.
+    """
+
+    def __init__(self, path: Optional[Path] = None, alpha: float = 0.3):
+        self.path = path
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._seconds: Dict[str, float] = {}
+        if path is not None and path.exists():
+            try:
+                loaded = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                loaded = {}
+            if isinstance(loaded, dict):
+                self._seconds = {
+                    str(key): float(value)
+                    for key, value in loaded.items()
+                    if isinstance(value, (int, float)) and value > 0
+                }
+
+    def expected(self, key: Optional[str]) -> Optional[float]:
+        if not key:
+            return None
+        with self._lock:
+            return self._seconds.get(key)
+
+    def record(self, key: Optional[str], seconds: float) -> None:
+        if not key or seconds <= 0:
+            return
+        with self._lock:
+            previous = self._seconds.get(key)
+            if previous is None:
+                self._seconds[key] = seconds
+            else:
+                self._seconds[key] = previous + self.alpha * (seconds - previous)
+            snapshot = dict(self._seconds)
+        if self.path is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+                tmp.write_text(json.dumps(snapshot, indent=2, sort_keys=True), encoding="utf-8")
+                tmp.replace(self.path)
+            except OSError:
+                pass
+
+
+class _TrackedTask:
+    def __init__(
+        self,
+        task_id: str,
+        poll: PollFn,
+        interval_seconds: float,
+        deadline: float,
+        timeout_seconds: float,
+        label: str,
+        history_key: Optional[str],
+        started_at: float,
+    ):
+        self.task_id = task_id
+        self.poll = poll
+        self.interval_seconds = interval_seconds
+        self.deadline = deadline
+        self.timeout_seconds = timeout_seconds
+        self.label = label
+        self.history_key = history_key
+        self.started_at = started_at
+        self.polls = 0
+        self.future: Future = Future()
+
+
+class TaskTracker:
+    """One background scheduler for every outstanding async task.
+
+    Callers register a task with a ``poll`` callable that returns the final
+    payload, ``None`` (or a ``PollPending``) while the task is pending, or raises
+    when it failed. Each registration returns a ``Future`` resolved by the poller,
+    so no caller has to sit in its own sleep loop. Delays follow ``schedule`` with
+    ``interval_seconds`` as the cap; a 429 or Retry-After only pushes that task back.
+    The scheduler thread hands due polls to a pool of ``poll_workers`` threads,
+    so one slow poll does not hold up the other tasks' schedules.
+    """
+
+    def __init__(
+        self,
+        default_interval_seconds: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+        schedule: Optional[PollSchedule] = None,
+        history: Optional[CompletionHistory] = None,
+        poll_workers: int = DEFAULT_POLL_WORKERS,
+    ):
+        if poll_workers < 1:
+            raise ValueError("poll_workers must be >= 1")
+        self.default_interval_seconds = default_interval_seconds
+        self.poll_workers = poll_workers
+        self._clock = clock
+        self.schedule = schedule or PollSchedule()
+        self.history = history or CompletionHistory()
+        self._cond = threading.Condition()
+        self._queue: List[Tuple[float, int, _TrackedTask]] = []
+        self._seq = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+        self.stats = {"tracked": 0, "polls": 0, "completed": 0, "failed": 0, "timed_out": 0}
+
+    def track(
+        self,
+        task_id: str,
+        poll: PollFn,
+        timeout_seconds: float,
+        interval_seconds: Optional[float] = None,
+        label: str = "async task",
+        history_key: Optional[str] = None,
+    ) -> Future:
+        """Register a task; ``history_key`` groups completion times for seeding."""
+        interval = self.default_interval_seconds if interval_seconds is None else interval_seconds
+        interval = max(0.0, interval)
+        now = self._clock()
+        task = _TrackedTask(
+            task_id=task_id,
+            poll=poll,
+            interval_seconds=interval,
+            deadline=now + timeout_seconds,
+            timeout_seconds=timeout_seconds,
+            label=label,
+            history_key=history_key,
+            started_at=now,
+        )
+        first_delay = self.schedule.first_delay(interval, self.history.expected(history_key))
+        with self._cond:
+            self.stats["tracked"] += 1
+            heapq.heappush(
+                self._queue,
+                (min(now + first_delay, task.deadline), next(self._seq), task),
+            )
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="igt-task-poller", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+        return task.future
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue) + self._in_flight
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._cond:
+            return dict(self.stats, pending=len(self._queue) + self._in_flight)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if not self._queue:
+                        if self._in_flight == 0:
+                            # Idle: let the thread exit; the next track() starts a new one.
+                            self._thread = None
+                            return
+                        self._cond.wait()
+                        continue
+                    due_at = self._queue[0][0]
+                    wait = due_at - self._clock()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(timeout=wait)
+                _, _, task = heapq.heappop(self._queue)
+                self._in_flight += 1
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.poll_workers, thread_name_prefix="igt-task-poll"
+                    )
+                pool = self._pool
+            pool.submit(self._poll_and_requeue, task)
+
+    def _poll_and_requeue(self, task: _TrackedTask) -> None:
+        next_at: Optional[float] = None
+        try:
+            next_at = self._poll(task)
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                if next_at is not None:
+                    heapq.heappush(self._queue, (next_at, next(self._seq), task))
+                self._cond.notify()
+
+    def _poll(self, task: _TrackedTask) -> Optional[float]:
+        """Poll once; return when to poll again, or ``None`` once the future is settled."""
+        if task.future.cancelled():
+            return None
+        task.polls += 1
+        hint = 0.0
+        try:
+            result = task.poll()
+        except ThrottledError as exc:
+            result = None
+            hint = exc.retry_after or 0.0
+        except BaseException as exc:  # noqa: BLE001
+            self._count("polls", "failed")
+            task.future.set_exception(exc)
+            return None
+        if isinstance(result, PollPending):
+            hint = result.retry_after or 0.0
+            result = None
+        now = self._clock()
+        if result is not None:
+            self._count("polls", "completed")
+            self.history.record(task.history_key, now - task.started_at)
+            task.future.set_result(result)
+            return None
+        self._count("polls")
+        if now >= task.deadline:
+            self._count("timed_out")
+            task.future.set_exception(
+                TimeoutError(f"{task.label} poll timeout after {task.timeout_seconds:g}s")
+            )
+            return None
+        delay = max(self.schedule.next_delay(task.interval_seconds, task.polls), hint)
+        # Always make one last poll at the deadline rather than sleeping past it.
+        return min(now + delay, task.deadline)
+
+    def _count(self, *keys: str) -> None:
+        with self._cond:
+            for key in keys:
+                self.stats[key] += 1
+
+
+_DEFAULT_TRACKER: Optional[TaskTracker] = None
+_DEFAULT_TRACKER_LOCK = threading.Lock()
+
+
+def get_task_tracker() -> TaskTracker:
+    """Process-wide tracker shared by every adapter and the TUI video path."""
+    global _DEFAULT_TRACKER
+    with _DEFAULT_TRACKER_LOCK:
+        if _DEFAULT_TRACKER is None:
+            history_path = os.getenv(POLL_HISTORY_ENV, "").strip()
+            _DEFAULT_TRACKER = TaskTracker(
+                schedule=PollSchedule.from_env(),
+                history=CompletionHistory(Path(history_path) if history_path else None),
+            )
+        return _DEFAULT_TRACKER
@@ -0,0 +1,71 @@
+"""Time image extraction on large provider responses.
+
+Run from the repository root:
+
+    python -m benchmarks.extract_images [--mb 20] [--images 4] [--repeat 5]
+"""
+
+import argparse
+import base64
+import os
+import time
+from typing import Any, Callable, Dict, List
+
+from adapters.glm import GLMAdapter
+from adapters.google import GoogleAdapter
+
+
+def _payload(total_mb: float, images: int) -> List[str]:
+    per_image = int(total_mb * 1024 * 1024 * 3 / 4 / images)
+    return [base64.b64encode(os.urandom(per_image)).decode("ascii") for _ in range(images)]
+
+
+def _google_response(images: List[str]) -> Dict[str, Any]:
+    parts = [{"inlineData": {"mimeType": "image/png", "data": data}} for data in images]
+    return {"responseId": "bench", "candidates": [{"content": {"parts": parts}}]}
+
+
+def _nested_response(images: List[str]) -> Dict[str, Any]:
+    # Unknown shape: forces the generic walk.
+    return {"result": {"items": [{"meta": {"b64_image": data}} for data in images]}}
+
+
+def _glm_response(images: List[str]) -> Dict[str, Any]:
+    return {"created": 1, "data": [{"b64_json": data} for data in images]}
+
+
+def _time(fn: Callable[[], List[str]], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mb", type=float, default=20.0, help="Total base64 size per response")
+    parser.add_argument("--images", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    images = _payload(args.mb, args.images)
+    google = GoogleAdapter(api_key="bench", text2image_url="", image2image_url="")
+    glm = GLMAdapter(api_key="bench", text2image_url="", image2image_url="")
+    google_raw = _google_response(images)
+    nested_raw = _nested_response(images)
+    glm_raw = _glm_response(images)
+    cases = [
+        ("google known path", lambda: google.extract_images(google_raw)),
+        ("google generic walk", lambda: google.extract_images(nested_raw)),
+        ("glm known path", lambda: glm.extract_images(glm_raw)),
+    ]
+    print(f"response size ~{args.mb:g} MB base64 in {args.images} images, best of {args.repeat}")
+    for name, fn in cases:
+        found = len(fn())
+        print(f"  {name:<22} {_time(fn, args.repeat):8.2f} ms  images={found}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,23 +2,42 @@ import argparse
 import json
 import logging
 import os
+import shutil
 import sys
 import threading
 import time
 from importlib.metadata import PackageNotFoundError, version
 from pathlib import Path
 from textwrap import dedent
-from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar, cast
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar, cast
 
 from dotenv import load_dotenv
 
-from core.io_utils import ensure_dir, read_json_file
+from core.assets import get_input_assets
+from core.blobs import BlobStore
+from core.cache import CACHE_ENV, CACHE_MODES, get_response_cache, reset_response_cache
+from core.circuit import CircuitBreakerRegistry
+from core.io_utils import ensure_dir, iter_lines, iter_prompts, json_dump, read_json_file
+from core.journal import BatchJournal
+from core.matrix import MATRIX_SUMMARY_FIELDS, MatrixSpec
 from core.models import TASK_IMAGE2IMAGE, TASK_TEXT2IMAGE, GenerationRequest
+from core.ratelimit import RATE_LIMITS_ENV, get_rate_limiter, reset_rate_limiter
 from core.runner import (
+    COALESCE_MODES,
     PERSIST_PREPROCESSED_INPUT_ENV,
+    SingleFlight,
+    SummaryWriter,
     cleanup_temp_files,
+    lookup_cached_run,
+    parse_provider_limits,
+    persist_cached_run,
     persist_run,
+    resolve_batch_concurrency,
+    resolve_batch_executor,
+    run_batch_requests,
+    run_requests_concurrently,
     run_with_retry_with_artifacts,
+    store_cached_run,
     summarize_results,
 )
 from core.services import (
@@ -31,6 +50,23 @@ from core.services import (
     resolve_history_run_dir,
     resolve_request_size,
 )
+from core.services.jobs import SERVE_WORKERS_ENV, JobQueue
+from core.services.shards import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_LEASE_SECONDS,
+    ShardTable,
+    run_shard_worker,
+)
+from core.services.tasks import (
+    TASK_COLLECTED,
+    TASK_FAILED,
+    TASK_PENDING,
+    TASK_SUBMITTED,
+    TaskLedger,
+    collect_tasks,
+    submit_tasks,
+)
+from ui.server import JobServer
 
 PACKAGE_NAME = "image-gen-test-tool"
 LOGGER = logging.getLogger("image_gen_test_tool")
@@ -53,6 +89,10 @@ def main() -> int:
             _run_history(args, Path(args.output_dir))
             return 0
 
+        if args.command == "shard" and args.shard_command != "work":
+            _run_shard(args, {}, ensure_dir(Path(args.output_dir)), 0, 0)
+            return 0
+
         adapters = _build_adapters()
         output_root = ensure_dir(Path(args.output_dir))
         max_retries = int(os.getenv("MAX_RETRIES", "1"))
@@ -60,6 +100,16 @@ def main() -> int:
 
         if args.command == "single":
             request = _request_from_args(args)
+            cache_key, cached_dir = lookup_cached_run(request)
+            if cached_dir is not None:
+                run_dir = persist_cached_run(output_root, request, cached_dir)
+                _console_print(
+                    f"ok provider={request.provider} run_dir={run_dir} (cached)",
+                    quiet=args.quiet,
+                )
+                _log_transport_stats(adapters)
+                return 0
+            attempts: List[Dict[str, Any]] = []
             response, preprocessed_inputs = _run_with_progress(
                 action=f"generating provider={request.provider} model={request.model}",
                 quiet=args.quiet,
@@ -68,6 +118,7 @@ def main() -> int:
                     request=request,
                     max_retries=max_retries,
                     retry_delay_seconds=retry_delay,
+                    attempts=attempts,
                 ),
             )
             try:
@@ -76,21 +127,56 @@ def main() -> int:
                     request,
                     response,
                     preprocessed_inputs=preprocessed_inputs,
+                    session=getattr(adapters[request.provider], "session", None),
+                    attempts=attempts,
                 )
             finally:
                 cleanup_temp_files(preprocessed_inputs)
+            store_cached_run(cache_key, run_dir)
             _console_print(
                 f"ok provider={request.provider} run_dir={run_dir}",
                 quiet=args.quiet,
             )
+            _log_transport_stats(adapters)
             return 0
 
         if args.command == "compare":
             _run_compare(args, adapters, output_root, max_retries, retry_delay)
+            _log_transport_stats(adapters)
             return 0
 
         if args.command == "batch":
             _run_batch(args, adapters, output_root, max_retries, retry_delay)
+            _log_transport_stats(adapters)
+            return 0
+
+        if args.command == "matrix":
+            _run_matrix(args, adapters, output_root, max_retries, retry_delay)
+            _log_transport_stats(adapters)
+            return 0
+
+        if args.command == "run":
+            _run_request_stream(args, adapters, output_root, max_retries, retry_delay)
+            _log_transport_stats(adapters)
+            return 0
+
+        if args.command == "shard":
+            _run_shard(args, adapters, output_root, max_retries, retry_delay)
+            _log_transport_stats(adapters)
+            return 0
+
+        if args.command == "serve":
+            _run_serve(args, adapters, output_root, max_retries, retry_delay)
+            _log_transport_stats(adapters)
+            return 0
+
+        if args.command == "submit":
+            _run_submit(args, adapters, output_root)
+            return 0
+
+        if args.command == "collect":
+            _run_collect(args, adapters, output_root)
+            _log_transport_stats(adapters)
             return 0
 
         raise ValueError(f"Unknown command: {args.command}")
@@ -122,6 +208,23 @@ def _build_parser() -> argparse.ArgumentParser:
             "(preprocessed_inputs/)."
         ),
     )
+    parser.add_argument(
+        "--rate-limit",
+        default=None,
+        help=(
+            "Requests per minute per provider or provider:model, e.g. "
+            "'alibaba=60,google:gemini-2.5-flash-image=10' (default: IGT_RATE_LIMITS)."
+        ),
+    )
+    parser.add_argument(
+        "--cache",
+        choices=list(CACHE_MODES),
+        default=None,
+        help=(
+            "Response cache for seeded requests: off, read (serve hits), write (store new "
+            "runs) or readwrite. Default: IGT_CACHE or off."
+        ),
+    )
     verbosity_group = parser.add_mutually_exclusive_group()
     verbosity_group.add_argument(
         "--verbose",
@@ -151,7 +254,7 @@ def _build_parser() -> argparse.ArgumentParser:
     compare = _new_subparser(
         subparsers,
         "compare",
-        "Run one prompt on two providers",
+        "Run one prompt on two or more provider/model targets",
         _compare_help_epilog(),
     )
     compare.add_argument("--prompt", required=True)
@@ -162,6 +265,19 @@ def _build_parser() -> argparse.ArgumentParser:
     compare.add_argument("--model-b")
     compare.add_argument("--model-alibaba")
     compare.add_argument("--model-google")
+    compare.add_argument(
+        "--target",
+        action="append",
+        default=None,
+        metavar="PROVIDER:MODEL",
+        help="Compare target, repeat for two or more targets (e.g. --target glm:glm-image).",
+    )
+    compare.add_argument(
+        "--parallel",
+        choices=["on", "off"],
+        default="on",
+        help="Dispatch all compare targets at the same time (default: on).",
+    )
     compare.add_argument("--input-image", default=None)
     compare.add_argument("--size", default=None)
     compare.add_argument(
@@ -181,10 +297,18 @@ def _build_parser() -> argparse.ArgumentParser:
         "Run a prompt list on one provider",
         _batch_help_epilog(),
     )
-    batch.add_argument("--provider", required=True, choices=["alibaba", "google", "glm"])
-    batch.add_argument("--model", required=True)
-    batch.add_argument("--task-type", required=True, choices=[TASK_TEXT2IMAGE, TASK_IMAGE2IMAGE])
-    batch.add_argument("--prompts-file", required=True, help="One prompt per line")
+    batch.add_argument("--provider", choices=["alibaba", "google", "glm"])
+    batch.add_argument("--model")
+    batch.add_argument("--task-type", choices=[TASK_TEXT2IMAGE, TASK_IMAGE2IMAGE])
+    batch.add_argument(
+        "--prompts-file", help="One prompt per line; '-' reads stdin"
+    )
+    batch.add_argument(
+        "--resume",
+        default=None,
+        metavar="BATCH_ID",
+        help="Continue a previous batch; jobs that already succeeded are skipped.",
+    )
     batch.add_argument("--input-image", default=None)
     batch.add_argument("--size", default=None)
     batch.add_argument(
@@ -197,6 +321,92 @@ def _build_parser() -> argparse.ArgumentParser:
     batch.add_argument("--n", type=int, default=1)
     batch.add_argument("--seed", type=int, default=None)
     batch.add_argument("--extra-json", default=None)
+    _add_scheduling_arguments(batch)
+
+    matrix = _new_subparser(
+        subparsers,
+        "matrix",
+        "Run prompts x models x sizes x seeds from one spec file",
+        _matrix_help_epilog(),
+    )
+    matrix.add_argument(
+        "--spec", required=True, help="JSON spec (YAML with PyYAML installed)"
+    )
+    _add_scheduling_arguments(matrix)
+
+    run = _new_subparser(
+        subparsers,
+        "run",
+        "Run GenerationRequest JSON lines and stream JSONL results as they finish",
+        _run_help_epilog(),
+    )
+    run.add_argument(
+        "--input", required=True, help="JSONL file, one request per line; '-' reads stdin"
+    )
+    _add_scheduling_arguments(run)
+
+    serve = _new_subparser(
+        subparsers,
+        "serve",
+        "Run a local HTTP job server that keeps adapters and connections warm",
+        _serve_help_epilog(),
+    )
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    _add_coalesce_argument(serve)
+    serve.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help=f"Jobs run at once (default: {SERVE_WORKERS_ENV} or 4).",
+    )
+
+    submit = _new_subparser(
+        subparsers,
+        "submit",
+        "Create Alibaba async tasks and record them in the task ledger",
+        _submit_help_epilog(),
+    )
+    submit.set_defaults(provider="alibaba")
+    submit.add_argument("--model", required=True)
+    submit.add_argument("--task-type", required=True, choices=[TASK_TEXT2IMAGE, TASK_IMAGE2IMAGE])
+    submit_prompts = submit.add_mutually_exclusive_group(required=True)
+    submit_prompts.add_argument("--prompt", default=None)
+    submit_prompts.add_argument(
+        "--prompts-file", default=None, help="One prompt per line; '-' reads stdin"
+    )
+    submit.add_argument("--input-image", default=None)
+    submit.add_argument("--size", default=None)
+    submit.add_argument(
+        "--negative-prompt-enabled",
+        choices=["on", "off"],
+        default="off",
+        help="Enable or disable negative prompt input (default: off).",
+    )
+    submit.add_argument("--negative-prompt", default=None)
+    submit.add_argument("--n", type=int, default=1)
+    submit.add_argument("--seed", type=int, default=None)
+    submit.add_argument("--extra-json", default=None)
+
+    collect = _new_subparser(
+        subparsers,
+        "collect",
+        "Poll submitted tasks and save the finished ones",
+        _collect_help_epilog(),
+    )
+    collect.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Tasks polled at once (default: 4).",
+    )
+    collect.add_argument(
+        "--wait",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="Keep collecting until nothing is pending or SECONDS pass (default: one pass).",
+    )
 
     models = _new_subparser(
         subparsers,
@@ -213,6 +423,52 @@ def _build_parser() -> argparse.ArgumentParser:
     )
     models.add_argument("--format", choices=["text", "json"], default="text")
 
+    shard = _new_subparser(
+        subparsers,
+        "shard",
+        "Split one batch across machines that share --output-dir",
+        _shard_help_epilog(),
+    )
+    shard_subparsers = shard.add_subparsers(dest="shard_command", required=True)
+    shard_create = _new_subparser(
+        shard_subparsers,
+        "create",
+        "Write a matrix spec out as a shared, chunked job table",
+        _shard_help_epilog(),
+    )
+    shard_create.add_argument("--spec", required=True, help="Matrix spec (see 'igt matrix -h')")
+    shard_create.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Jobs per lease"
+    )
+    shard_work = _new_subparser(
+        shard_subparsers,
+        "work",
+        "Claim chunks of a job table and run them until the table is finished",
+        _shard_help_epilog(),
+    )
+    shard_work.add_argument("table_id")
+    shard_work.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=DEFAULT_LEASE_SECONDS,
+        help="Lease TTL; renewed every third of it while the chunk runs.",
+    )
+    shard_work.add_argument("--worker-id", default=None, help="Default: host-pid-random")
+    shard_work.add_argument(
+        "--no-wait",
+        action="store_true",
+        help="Exit when no chunk is free instead of waiting for other workers' leases.",
+    )
+    _add_scheduling_arguments(shard_work)
+    shard_status = _new_subparser(
+        shard_subparsers,
+        "status",
+        "Show progress and write shard_summary.csv for a job table",
+        _shard_help_epilog(),
+    )
+    shard_status.add_argument("table_id")
+    shard_status.add_argument("--format", choices=["text", "json"], default="text")
+
     history = _new_subparser(
         subparsers,
         "history",
@@ -239,9 +495,58 @@ def _build_parser() -> argparse.ArgumentParser:
     )
     history_show.add_argument("--run-id", required=True)
     history_show.add_argument("--format", choices=["text", "json"], default="text")
+
+    history_gc = _new_subparser(
+        history_subparsers,
+        "gc",
+        "Delete image blobs no saved run links to any more (IGT_BLOB_STORE)",
+        _history_gc_help_epilog(),
+    )
+    history_gc.add_argument(
+        "--dry-run", action="store_true", help="Only report blob counts and sizes."
+    )
     return parser
 
 
+def _add_scheduling_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Number of requests in flight at once (default: IGT_BATCH_CONCURRENCY or 1).",
+    )
+    parser.add_argument(
+        "--provider-concurrency",
+        default=None,
+        help=(
+            "Per-provider in-flight caps, e.g. 'alibaba=2,google=4' "
+            "(default: IGT_PROVIDER_CONCURRENCY)."
+        ),
+    )
+    parser.add_argument(
+        "--executor",
+        choices=["thread", "async"],
+        default=None,
+        help=(
+            "thread: worker threads; async: one event loop, no thread per request "
+            "(needs httpx). Default: IGT_BATCH_EXECUTOR or thread."
+        ),
+    )
+    _add_coalesce_argument(parser)
+
+
+def _add_coalesce_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--coalesce",
+        choices=list(COALESCE_MODES),
+        default=None,
+        help=(
+            "Share one provider call among identical requests in flight: seeded "
+            "(only requests with --seed/\"seed\"), all, or off. Default: IGT_COALESCE or seeded."
+        ),
+    )
+
+
 def _new_subparser(subparsers, name: str, help_text: str, epilog: str):
     return subparsers.add_parser(
         name,
@@ -286,6 +591,53 @@ def _build_adapters() -> Dict[str, object]:
     return build_adapters_from_env()
 
 
+def _log_transport_stats(adapters: Dict[str, object]) -> None:
+    limiter_stats = get_rate_limiter().snapshot()
+    if limiter_stats["throttled"] or limiter_stats["waited_seconds"]:
+        LOGGER.debug(
+            "rate limit acquired=%s waited=%.1fs throttled=%s pauses=%s",
+            limiter_stats["acquired"],
+            limiter_stats["waited_seconds"],
+            limiter_stats["throttled"],
+            limiter_stats["pauses"],
+        )
+    cache = get_response_cache()
+    if cache is not None and any(cache.stats.values()):
+        LOGGER.info(
+            "cache mode=%s hits=%s misses=%s stored=%s evicted=%s",
+            cache.mode,
+            cache.stats["hits"],
+            cache.stats["misses"],
+            cache.stats["stored"],
+            cache.stats["evicted"],
+        )
+    assets = get_input_assets().snapshot()
+    if assets["hits"] or assets["misses"]:
+        LOGGER.debug(
+            "input assets hits=%s misses=%s hit_rate=%.0f%% revalidated=%s evicted=%s bytes=%s",
+            assets["hits"],
+            assets["misses"],
+            assets["hit_rate"] * 100,
+            assets["revalidated"],
+            assets["evicted"],
+            assets["bytes"],
+        )
+    for provider, adapter in adapters.items():
+        stats_fn = getattr(adapter, "connection_stats", None)
+        if stats_fn is None:
+            continue
+        stats = stats_fn()
+        if not stats["requests"]:
+            continue
+        LOGGER.debug(
+            "http provider=%s requests=%s new_connections=%s reused=%s",
+            provider,
+            stats["requests"],
+            stats["connections"],
+            stats["reused"],
+        )
+
+
 def _request_from_args(
     args, provider: str = "", model: str = "", prompt: str = ""
 ) -> GenerationRequest:
@@ -332,124 +684,494 @@ def _apply_cli_env_overrides(args) -> None:
     if value == "off":
         os.environ[PERSIST_PREPROCESSED_INPUT_ENV] = "false"
 
+    rate_limit = getattr(args, "rate_limit", None)
+    if rate_limit is not None:
+        os.environ[RATE_LIMITS_ENV] = rate_limit
+        reset_rate_limiter()
+
+    cache = getattr(args, "cache", None)
+    if cache is not None:
+        os.environ[CACHE_ENV] = cache
+        reset_response_cache()
+
 
 def _run_compare(args, adapters, output_root: Path, max_retries: int, retry_delay: int) -> None:
-    rows: List[Dict[str, str]] = []
     targets = _resolve_compare_targets(args)
-    for provider, model in targets:
-        request = _request_from_args(args, provider=provider, model=model, prompt=args.prompt)
-        try:
-            response, preprocessed_inputs = _run_with_progress(
-                action=f"generating provider={provider} model={model}",
+    compare_requests = [
+        _request_from_args(args, provider=provider, model=model, prompt=args.prompt)
+        for provider, model in targets
+    ]
+    parallel = getattr(args, "parallel", "on") == "on"
+    concurrency = len(compare_requests) if parallel else 1
+    rows = _run_with_progress(
+        action=f"comparing targets={len(targets)} parallel={'on' if parallel else 'off'}",
+        quiet=args.quiet,
+        fn=lambda: run_requests_concurrently(
+            adapters=adapters,
+            jobs=compare_requests,
+            output_root=output_root,
+            max_retries=max_retries,
+            retry_delay_seconds=retry_delay,
+            concurrency=concurrency,
+        ),
+    )
+    for row in rows:
+        if row["status"] == "ok":
+            _console_print(
+                f"ok provider={row['provider']} model={row['model']} run_dir={row['run_dir']}",
                 quiet=args.quiet,
-                fn=lambda provider=provider, request=request: run_with_retry_with_artifacts(
-                    adapter=adapters[provider],
-                    request=request,
-                    max_retries=max_retries,
-                    retry_delay_seconds=retry_delay,
-                ),
             )
-            try:
-                run_dir = persist_run(
-                    output_root,
-                    request,
-                    response,
-                    preprocessed_inputs=preprocessed_inputs,
-                )
-            finally:
-                cleanup_temp_files(preprocessed_inputs)
-            rows.append(
-                {
-                    "provider": provider,
-                    "model": model,
-                    "prompt": request.prompt,
-                    "status": "ok",
-                    "run_dir": str(run_dir),
-                    "error": "",
-                }
-            )
-            _console_print(f"ok provider={provider} run_dir={run_dir}", quiet=args.quiet)
-        except Exception as exc:  # noqa: BLE001
-            rows.append(
-                {
-                    "provider": provider,
-                    "model": model,
-                    "prompt": request.prompt,
-                    "status": "failed",
-                    "run_dir": "",
-                    "error": str(exc),
-                }
+        else:
+            _console_error(
+                f"failed provider={row['provider']} model={row['model']} error={row['error']}"
             )
-            _console_error(f"failed provider={provider} error={exc}")
     summarize_results(rows, output_root / "compare_summary.csv")
     _console_print(f"summary={output_root / 'compare_summary.csv'}", quiet=args.quiet)
 
 
+BATCH_JOURNAL_SETTINGS = (
+    "provider",
+    "model",
+    "task_type",
+    "prompts_file",
+    "input_image",
+    "size",
+    "negative_prompt_enabled",
+    "negative_prompt",
+    "n",
+    "seed",
+    "extra_json",
+)
+
+
 def _run_batch(args, adapters, output_root: Path, max_retries: int, retry_delay: int) -> None:
-    prompts = _read_prompts(args.prompts_file)
-    rows: List[Dict[str, str]] = []
-    total = len(prompts)
-    for index, prompt in enumerate(prompts, start=1):
-        request = _request_from_args(args, prompt=prompt)
-        try:
-            response, preprocessed_inputs = _run_with_progress(
-                action=(
-                    f"batch {index}/{total} provider={request.provider} "
-                    f"model={request.model}"
-                ),
-                quiet=args.quiet,
-                fn=lambda request=request: run_with_retry_with_artifacts(
-                    adapter=adapters[request.provider],
-                    request=request,
-                    max_retries=max_retries,
-                    retry_delay_seconds=retry_delay,
-                ),
+    if args.resume:
+        journal = BatchJournal.open(output_root, args.resume)
+        for key in BATCH_JOURNAL_SETTINGS:
+            setattr(args, key, journal.settings().get(key))
+        journal.record_resume()
+    else:
+        missing = [
+            flag
+            for flag, value in (
+                ("--provider", args.provider),
+                ("--model", args.model),
+                ("--task-type", args.task_type),
+                ("--prompts-file", args.prompts_file),
             )
-            try:
-                run_dir = persist_run(
-                    output_root,
-                    request,
-                    response,
-                    preprocessed_inputs=preprocessed_inputs,
+            if not value
+        ]
+        if missing:
+            raise ValueError(f"batch requires {', '.join(missing)} (or --resume BATCH_ID)")
+        # Store absolute paths so --resume works from any directory.
+        if args.prompts_file != "-":
+            args.prompts_file = str(Path(args.prompts_file).resolve())
+        if args.extra_json:
+            args.extra_json = str(Path(args.extra_json).resolve())
+        journal = BatchJournal.create(
+            output_root, {key: getattr(args, key) for key in BATCH_JOURNAL_SETTINGS}
+        )
+
+    # Size inference and extra-json parsing happen once, not once per prompt.
+    template = _request_from_args(args, prompt="-")
+    completed = journal.completed() if args.resume else {}
+    concurrency = resolve_batch_concurrency(args.concurrency)
+    provider_limits = parse_provider_limits(args.provider_concurrency)
+    executor = resolve_batch_executor(args.executor)
+    breakers = CircuitBreakerRegistry.from_env()
+    flights = SingleFlight.from_env(args.coalesce)
+    # Executor index -> (line position, request); only jobs in the scheduling window live here.
+    in_flight: Dict[int, Tuple[int, GenerationRequest]] = {}
+    counts: Dict[str, int] = {}
+    print_lock = threading.Lock()
+
+    def _jobs() -> Iterator[GenerationRequest]:
+        index = 0
+        for position, prompt in enumerate(iter_prompts(args.prompts_file)):
+            request = template.model_copy(update={"prompt": prompt})
+            if completed and journal.is_done(position, request, completed):
+                continue
+            in_flight[index] = (position, request)
+            index += 1
+            yield request
+
+    summary_path = journal.dir / "batch_summary.csv"
+    summary = None if args.resume else SummaryWriter(summary_path)
+
+    def _record(index: int, row: Dict[str, str]) -> None:
+        position, request = in_flight[index]
+        journal.record(position, request, row)
+
+    def _report(index: int, row: Dict[str, str]) -> None:
+        position = in_flight.pop(index)[0] + 1
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+        if summary is not None:
+            summary.write(row)
+        prompt = row["prompt"][:40]
+        with print_lock:
+            if row["status"] == "ok":
+                _console_print(
+                    f"ok [{position}] prompt={prompt} run_dir={row['run_dir']}",
+                    quiet=args.quiet,
                 )
-            finally:
-                cleanup_temp_files(preprocessed_inputs)
-            rows.append(
-                {
-                    "provider": request.provider,
-                    "model": request.model,
-                    "prompt": request.prompt,
-                    "status": "ok",
-                    "run_dir": str(run_dir),
-                    "error": "",
-                }
-            )
-            _console_print(f"ok prompt={prompt[:40]} run_dir={run_dir}", quiet=args.quiet)
-        except Exception as exc:  # noqa: BLE001
-            rows.append(
-                {
-                    "provider": request.provider,
-                    "model": request.model,
-                    "prompt": request.prompt,
-                    "status": "failed",
-                    "run_dir": "",
-                    "error": str(exc),
-                }
+            elif row["status"] == "parked":
+                _console_error(f"parked [{position}] prompt={prompt} {row['error']}")
+            else:
+                _console_error(f"failed [{position}] prompt={prompt} error={row['error']}")
+
+    _console_print(
+        f"batch id={journal.batch_id} provider={args.provider} model={args.model} "
+        f"concurrency={concurrency} executor={executor}",
+        quiet=args.quiet,
+    )
+    try:
+        run_batch_requests(
+            adapters=adapters,
+            jobs=_jobs(),
+            output_root=output_root,
+            max_retries=max_retries,
+            retry_delay_seconds=retry_delay,
+            concurrency=concurrency,
+            provider_limits=provider_limits,
+            breakers=breakers,
+            on_result=_report,
+            on_complete=_record,
+            collect_rows=False,
+            flights=flights,
+            executor=executor,
+        )
+    finally:
+        if summary is not None:
+            summary.close()
+    if args.resume:
+        # Earlier rows live only in the journal; rebuild the full summary from it.
+        summarize_results(journal.rows(), summary_path)
+    shutil.copyfile(summary_path, output_root / "batch_summary.csv")
+    _console_print(
+        " ".join(f"{status}={count}" for status, count in sorted(counts.items()))
+        + f" summary={output_root / 'batch_summary.csv'}",
+        quiet=args.quiet,
+    )
+    _report_coalesced(flights, quiet=args.quiet)
+    if any(status != "ok" for status in counts):
+        _console_print(f"resume with: igt batch --resume {journal.batch_id}", quiet=args.quiet)
+    if breakers is not None:
+        _report_circuits(breakers, counts.get("parked", 0), output_root, quiet=args.quiet)
+
+
+def _report_circuits(
+    breakers: CircuitBreakerRegistry,
+    parked: int,
+    output_root: Path,
+    quiet: bool,
+) -> None:
+    circuits = breakers.snapshot()
+    tripped = {name: item for name, item in circuits.items() if item["opened"]}
+    if not tripped:
+        return
+    json_dump(output_root / "batch_circuits.json", circuits)
+    for name, item in tripped.items():
+        path = " -> ".join(
+            [item["transitions"][0]["from"]] + [t["to"] for t in item["transitions"]]
+        )
+        _console_print(
+            f"circuit provider={name} state={item['state']} opened={item['opened']} "
+            f"rejected={item['rejected']} transitions={path}",
+            quiet=quiet,
+        )
+    _console_print(
+        f"parked={parked} circuits={output_root / 'batch_circuits.json'}", quiet=quiet
+    )
+
+
+def _run_matrix(args, adapters, output_root: Path, max_retries: int, retry_delay: int) -> None:
+    spec = MatrixSpec.load(Path(args.spec))
+    missing = [provider for provider in spec.providers() if provider not in adapters]
+    if missing:
+        raise ValueError(f"matrix spec uses unknown providers: {', '.join(missing)}")
+    concurrency = resolve_batch_concurrency(args.concurrency)
+    breakers = CircuitBreakerRegistry.from_env()
+    flights = SingleFlight.from_env(args.coalesce)
+    # Executor index -> cell dimensions; only jobs in the scheduling window live here.
+    in_flight: Dict[int, Dict[str, str]] = {}
+    counts: Dict[str, int] = {}
+
+    def _jobs() -> Iterator[GenerationRequest]:
+        for index, (dimensions, request) in enumerate(spec.expand()):
+            in_flight[index] = dimensions
+            yield request
+
+    summary_path = output_root / "matrix_summary.csv"
+
+    def _report(index: int, row: Dict[str, str]) -> None:
+        dimensions = in_flight.pop(index)
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+        writer.write({**row, **dimensions})
+        cell = " ".join(f"{key}={dimensions[key]}" for key in ("provider", "model", "size", "seed"))
+        if row["status"] == "ok":
+            _console_print(f"ok [{index + 1}] {cell} run_dir={row['run_dir']}", quiet=args.quiet)
+        else:
+            _console_error(f"{row['status']} [{index + 1}] {cell} error={row['error']}")
+
+    _console_print(
+        f"matrix spec={args.spec} cells_per_prompt={spec.cells_per_prompt()} "
+        f"concurrency={concurrency}",
+        quiet=args.quiet,
+    )
+    with SummaryWriter(summary_path, fields=MATRIX_SUMMARY_FIELDS) as writer:
+        run_batch_requests(
+            adapters=adapters,
+            jobs=_jobs(),
+            output_root=output_root,
+            max_retries=max_retries,
+            retry_delay_seconds=retry_delay,
+            concurrency=concurrency,
+            provider_limits=parse_provider_limits(args.provider_concurrency),
+            breakers=breakers,
+            on_result=_report,
+            collect_rows=False,
+            flights=flights,
+            executor=resolve_batch_executor(args.executor),
+        )
+    _console_print(
+        " ".join(f"{status}={count}" for status, count in sorted(counts.items()))
+        + f" summary={summary_path}",
+        quiet=args.quiet,
+    )
+    _report_coalesced(flights, quiet=args.quiet)
+    if breakers is not None:
+        _report_circuits(breakers, counts.get("parked", 0), output_root, quiet=args.quiet)
+
+
+def _run_request_stream(
+    args, adapters, output_root: Path, max_retries: int, retry_delay: int
+) -> None:
+    # Executor index -> (input line number, caller id); only the scheduling window lives here.
+    in_flight: Dict[int, Tuple[int, Any]] = {}
+    counts: Dict[str, int] = {}
+
+    def _emit(record: Dict[str, Any]) -> None:
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+    def _jobs() -> Iterator[GenerationRequest]:
+        index = 0
+        for number, line in iter_lines(args.input):
+            caller_id = None
+            try:
+                document = json.loads(line)
+                if not isinstance(document, dict):
+                    raise ValueError("request line must be a JSON object")
+                caller_id = document.pop("id", None)
+                request = GenerationRequest(**document)
+                if request.size is None:
+                    size = _resolve_request_size(
+                        task_type=request.task_type,
+                        supplied_size=None,
+                        input_image=request.input_image,
+                    )
+                    request = request.model_copy(update={"size": size})
+            except Exception as exc:  # noqa: BLE001
+                _emit({"line": number, "id": caller_id, "status": "invalid", "error": str(exc)})
+                continue
+            in_flight[index] = (number, caller_id)
+            index += 1
+            yield request
+
+    def _report(index: int, row: Dict[str, str]) -> None:
+        number, caller_id = in_flight.pop(index)
+        _emit({"line": number, "id": caller_id, **row})
+
+    run_batch_requests(
+        adapters=adapters,
+        jobs=_jobs(),
+        output_root=output_root,
+        max_retries=max_retries,
+        retry_delay_seconds=retry_delay,
+        concurrency=resolve_batch_concurrency(args.concurrency),
+        provider_limits=parse_provider_limits(args.provider_concurrency),
+        breakers=CircuitBreakerRegistry.from_env(),
+        on_result=_report,
+        collect_rows=False,
+        ordered=False,
+        flights=SingleFlight.from_env(args.coalesce),
+        executor=resolve_batch_executor(args.executor),
+    )
+    if not args.quiet:
+        # stdout carries only result lines, so the tally goes to stderr.
+        tally = " ".join(f"{status}={count}" for status, count in sorted(counts.items()))
+        print(tally or "no requests", file=sys.stderr)
+
+
+def _run_serve(args, adapters, output_root: Path, max_retries: int, retry_delay: int) -> None:
+    workers = args.workers or int(os.getenv(SERVE_WORKERS_ENV, "4"))
+    queue = JobQueue(
+        adapters,
+        output_root,
+        workers=workers,
+        max_retries=max_retries,
+        retry_delay_seconds=retry_delay,
+        breakers=CircuitBreakerRegistry.from_env(),
+        flights=SingleFlight.from_env(args.coalesce),
+        provider_limits=parse_provider_limits(None),
+    )
+    server = JobServer((args.host, args.port), queue)
+    queue.start()
+    host, port = server.server_address[:2]
+    _console_print(
+        f"serving on http://{host}:{port} workers={workers} output_dir={output_root}",
+        quiet=args.quiet,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        _console_print("stopping; waiting for running jobs", quiet=args.quiet)
+    finally:
+        server.server_close()
+        queue.stop()
+
+
+def _run_shard(args, adapters, output_root: Path, max_retries: int, retry_delay: int) -> None:
+    if args.shard_command == "create":
+        spec = MatrixSpec.load(Path(args.spec))
+        table = ShardTable.create(
+            output_root,
+            (request for _, request in spec.expand()),
+            settings={"spec": str(Path(args.spec).resolve())},
+            chunk_size=args.chunk_size,
+        )
+        info = table.info()
+        _console_print(
+            f"table id={table.table_id} jobs={info['jobs']} chunks={info['chunks']} "
+            f"dir={table.dir}",
+            quiet=args.quiet,
+        )
+        _console_print(f"start workers with: igt shard work {table.table_id}", quiet=args.quiet)
+        return
+
+    table = ShardTable.open(output_root, args.table_id)
+    if args.shard_command == "work":
+        breakers = CircuitBreakerRegistry.from_env()
+        flights = SingleFlight.from_env(args.coalesce)
+
+        def _report(index: int, row: Dict[str, str]) -> None:
+            if row["status"] == "ok":
+                _console_print(f"ok [{index + 1}] run_dir={row['run_dir']}", quiet=args.quiet)
+            else:
+                _console_error(f"{row['status']} [{index + 1}] error={row['error']}")
+
+        counts = run_shard_worker(
+            table,
+            adapters,
+            max_retries=max_retries,
+            retry_delay_seconds=retry_delay,
+            concurrency=resolve_batch_concurrency(args.concurrency),
+            provider_limits=parse_provider_limits(args.provider_concurrency),
+            breakers=breakers,
+            flights=flights,
+            executor=resolve_batch_executor(args.executor),
+            lease_seconds=args.lease_seconds,
+            worker_id=args.worker_id,
+            wait=not args.no_wait,
+            on_result=_report,
+        )
+        _console_print(
+            "worker done "
+            + " ".join(f"{status}={count}" for status, count in sorted(counts.items())),
+            quiet=args.quiet,
+        )
+        _report_coalesced(flights, quiet=args.quiet)
+        if breakers is not None:
+            _report_circuits(breakers, counts.get("parked", 0), output_root, quiet=args.quiet)
+        return
+
+    if args.shard_command == "status":
+        status = table.status()
+        summary_path = table.dir / "shard_summary.csv"
+        summarize_results(table.rows(), summary_path)
+        status["summary"] = str(summary_path)
+        if args.format == "json":
+            print(json.dumps(status, ensure_ascii=False, indent=2))
+            return
+        chunks = " ".join(f"{key}={value}" for key, value in status["chunks"].items())
+        jobs = " ".join(f"{key}={value}" for key, value in sorted(status["jobs"].items()))
+        print(f"table id={table.table_id} jobs_total={status['jobs_total']}")
+        print(f"chunks {chunks}")
+        print(f"jobs {jobs}")
+        print(f"summary={summary_path}")
+        return
+
+    raise ValueError(f"Unknown shard command: {args.shard_command}")
+
+
+def _report_coalesced(flights: Optional[SingleFlight], quiet: bool) -> None:
+    if flights is None or not flights.stats["shared"]:
+        return
+    _console_print(
+        f"coalesced={flights.stats['shared']} identical requests reused an in-flight call",
+        quiet=quiet,
+    )
+
+
+def _run_submit(args, adapters, output_root: Path) -> None:
+    prompts = iter_prompts(args.prompts_file) if args.prompts_file else iter([args.prompt])
+    template = _request_from_args(args, prompt="-")
+    submit_requests = (template.model_copy(update={"prompt": prompt}) for prompt in prompts)
+    ledger = TaskLedger(output_root)
+
+    def _report(index: int, row: Dict[str, str]) -> None:
+        prompt = row["prompt"][:40]
+        if row["status"] == TASK_SUBMITTED:
+            _console_print(
+                f"submitted [{index + 1}] prompt={prompt} task_id={row['task_id']}",
+                quiet=args.quiet,
             )
-            _console_error(f"failed prompt={prompt[:40]} error={exc}")
-    summarize_results(rows, output_root / "batch_summary.csv")
-    _console_print(f"summary={output_root / 'batch_summary.csv'}", quiet=args.quiet)
+        else:
+            _console_error(f"failed [{index + 1}] prompt={prompt} error={row['error']}")
+
+    rows = submit_tasks(adapters["alibaba"], submit_requests, ledger, on_result=_report)
+    submitted = sum(1 for row in rows if row["status"] == TASK_SUBMITTED)
+    _console_print(
+        f"submitted={submitted} failed={len(rows) - submitted} ledger={ledger.path}",
+        quiet=args.quiet,
+    )
+
 
+def _run_collect(args, adapters, output_root: Path) -> None:
+    ledger = TaskLedger(output_root)
+    deadline = time.monotonic() + max(0.0, args.wait)
+    poll_interval = float(os.getenv("ALIBABA_POLL_INTERVAL_SECONDS", "10"))
 
-def _read_prompts(path: str) -> List[str]:
-    items = []
-    for line in Path(path).read_text(encoding="utf-8").splitlines():
-        s = line.strip()
-        if s:
-            items.append(s)
-    if not items:
-        raise ValueError("prompts file is empty")
-    return items
+    def _report(row: Dict[str, str]) -> None:
+        if row["status"] == TASK_COLLECTED:
+            _console_print(
+                f"collected task_id={row['task_id']} run_dir={row['run_dir']}", quiet=args.quiet
+            )
+        elif row["status"] == TASK_FAILED:
+            _console_error(f"failed task_id={row['task_id']} error={row['error']}")
+        elif row["error"]:
+            LOGGER.debug("task_id=%s still pending: %s", row["task_id"], row["error"])
+
+    totals = {TASK_COLLECTED: 0, TASK_FAILED: 0}
+    while True:
+        counts = collect_tasks(
+            adapters["alibaba"],
+            ledger,
+            output_root,
+            concurrency=args.concurrency,
+            on_result=_report,
+        )
+        totals[TASK_COLLECTED] += counts[TASK_COLLECTED]
+        totals[TASK_FAILED] += counts[TASK_FAILED]
+        pending = counts[TASK_PENDING]
+        if not pending or time.monotonic() + poll_interval > deadline:
+            break
+        time.sleep(poll_interval)
+    _console_print(
+        f"collected={totals[TASK_COLLECTED]} failed={totals[TASK_FAILED]} pending={pending}",
+        quiet=args.quiet,
+    )
 
 
 def _collect_model_entries(
@@ -501,6 +1223,19 @@ def _run_history(args, output_root: Path) -> None:
         _print_history_show(details)
         return
 
+    if args.history_command == "gc":
+        blobs = BlobStore(output_root)
+        stats = blobs.stats()
+        print(
+            f"blobs={stats['blobs']} bytes={stats['bytes']} links={stats['links']} "
+            f"unreferenced={stats['unreferenced']} dir={blobs.root}"
+        )
+        if args.dry_run:
+            return
+        removed = blobs.gc()
+        print(f"removed blobs={removed['blobs']} bytes={removed['bytes']}")
+        return
+
     raise ValueError(f"Unknown history command: {args.history_command}")
 
 
@@ -584,6 +1319,27 @@ def _resolve_request_size(
 
 
 def _resolve_compare_targets(args) -> List[Tuple[str, str]]:
+    raw_targets = cast(Optional[List[str]], getattr(args, "target", None))
+    if raw_targets:
+        if any(
+            getattr(args, name, None)
+            for name in (
+                "provider_a",
+                "model_a",
+                "provider_b",
+                "model_b",
+                "model_alibaba",
+                "model_google",
+            )
+        ):
+            raise ValueError(
+                "compare: use either --target or the provider/model pair flags, not both."
+            )
+        targets = [_parse_compare_target(item) for item in raw_targets]
+        if len(targets) < 2:
+            raise ValueError("compare: --target needs to be given at least twice.")
+        return targets
+
     has_new_provider_a = bool(args.provider_a)
     has_new_provider_b = bool(args.provider_b)
     has_new_model_a = bool(args.model_a)
@@ -623,6 +1379,17 @@ def _resolve_compare_targets(args) -> List[Tuple[str, str]]:
     )
 
 
+def _parse_compare_target(value: str) -> Tuple[str, str]:
+    provider, sep, model = value.partition(":")
+    provider = provider.strip().lower()
+    model = model.strip()
+    if not sep or not model:
+        raise ValueError(f"compare: invalid --target {value!r} (use provider:model).")
+    if provider not in {"alibaba", "google", "glm"}:
+        raise ValueError(f"compare: unsupported provider in --target {value!r}.")
+    return provider, model
+
+
 def _root_help_epilog() -> str:
     return dedent(
         """\
@@ -651,7 +1418,21 @@ def _root_help_epilog() -> str:
              igt models --provider alibaba --task-type image_to_image
              igt models --format json
 
-          6) Inspect generation history:
+          6) Submit async tasks now, collect results later:
+             igt submit --model qwen-image --task-type text_to_image
+               --prompts-file prompts.txt
+             igt collect
+
+          7) Evaluation matrix (prompts x models x sizes x seeds):
+             igt matrix --spec eval.json --concurrency 8
+
+          8) Stream requests from another program (results in finish order):
+             produce-requests | igt run --input - --concurrency 16
+
+          9) Keep a warm local job server:
+             igt serve --port 8765 --workers 8
+
+          10) Inspect generation history:
              igt history list --limit 10
              igt history show --run-id 20260219-120301_alibaba_text_to_image_req_abc
 
@@ -701,6 +1482,13 @@ def _compare_help_epilog() -> str:
             --provider-a alibaba --model-a qwen-image
             --provider-b glm --model-b cogview-4-250304
 
+        Multi-target mode (two or more targets):
+          igt compare --prompt "A red sports car drifting on wet road"
+            --task-type text_to_image
+            --target alibaba:qwen-image
+            --target google:gemini-2.5-flash-image
+            --target glm:cogview-4-250304
+
         Legacy mode (compatible):
           igt compare --prompt "A red sports car drifting on wet road"
             --task-type text_to_image
@@ -708,8 +1496,9 @@ def _compare_help_epilog() -> str:
             --model-google gemini-2.5-flash-image
 
         Output:
+          - Targets run at the same time; use '--parallel off' to run them one by one.
           - Saves each run under runs/{timestamp}_...
-          - Writes compare_summary.csv in --output-dir.
+          - Writes compare_summary.csv in --output-dir (rows follow target order).
         """
     )
 
@@ -721,8 +1510,164 @@ def _batch_help_epilog() -> str:
           igt batch --provider alibaba --model qwen-image
             --task-type text_to_image --prompts-file prompts.txt
 
+        Concurrent run (8 in flight, at most 2 against Alibaba):
+          igt batch --provider alibaba --model qwen-image
+            --task-type text_to_image --prompts-file prompts.txt
+            --concurrency 8 --provider-concurrency alibaba=2
+
+        Hundreds in flight on one event loop (pip install -e .[async]):
+          igt batch --provider alibaba --model qwen-image
+            --task-type text_to_image --prompts-file prompts.txt
+            --concurrency 200 --executor async
+
+        Stream prompts from another command:
+          generate-prompts | igt batch --provider alibaba --model qwen-image
+            --task-type text_to_image --prompts-file -
+
         prompts.txt format:
-          One prompt per line. Empty lines are ignored.
+          One prompt per line. Empty lines are ignored. Prompts are read lazily,
+          so file size does not affect memory use.
+
+        Resume an interrupted batch (id is printed at start):
+          igt batch --resume 20260219-120301-a1b2c3
+
+        Output:
+          - batch_summary.csv rows keep prompts-file order regardless of concurrency
+            and are flushed to disk while the batch runs.
+          - batches/<batch-id>/journal.jsonl records every finished job as it completes.
+        """
+    )
+
+
+def _matrix_help_epilog() -> str:
+    return dedent(
+        """\
+        Example:
+          igt matrix --spec eval.json --concurrency 8 --provider-concurrency alibaba=2
+
+        eval.json:
+          {
+            "task_type": "text_to_image",
+            "prompts_file": "prompts.txt",
+            "models": {"alibaba": ["qwen-image"], "glm": ["cogview-4-250304"]},
+            "sizes": ["1024x1024", "1328x1328"],
+            "seeds": [1, 2, 3]
+          }
+
+        Spec keys:
+          - models (required): provider -> list of models; only these pairs run.
+          - prompts (list) or prompts_file (relative to the spec; '-' reads stdin).
+          - sizes, seeds: optional lists; omitted means the provider default.
+          - n, negative_prompt, input_image, extra: applied to every cell.
+          - .yaml/.yml specs need PyYAML (pip install -e .[yaml]).
+
+        Output:
+          - matrix_summary.csv in --output-dir with one column per dimension
+            (prompt, provider, model, size, seed), rows in expansion order.
+        """
+    )
+
+
+def _run_help_epilog() -> str:
+    return dedent(
+        """\
+        Example:
+          igt run --input requests.jsonl --concurrency 8
+          produce-requests | igt run --input - --concurrency 16 > results.jsonl
+
+        Input line (GenerationRequest fields plus an optional "id"):
+          {"id": "a1", "provider": "glm", "model": "cogview-4-250304",
+           "task_type": "text_to_image", "prompt": "A red fox", "seed": 7}
+
+        Output:
+          - One JSON line per request on stdout as soon as it finishes, in finish
+            order: line, id, provider, model, prompt, status, run_dir, error.
+          - Lines that are not valid requests get status "invalid" and do not stop
+            the stream. The final tally goes to stderr.
+        """
+    )
+
+
+def _serve_help_epilog() -> str:
+    return dedent(
+        """\
+        Example:
+          igt serve --port 8765 --workers 8
+
+        Endpoints (JSON):
+          POST   /jobs              GenerationRequest fields, optional "priority"
+                                    (higher runs first); returns the job with its id
+          GET    /jobs[?status=ok]  list jobs
+          GET    /jobs/{id}         job status (queued, running, ok, failed, parked)
+          GET    /jobs/{id}/result  saved run details once the job is ok
+          DELETE /jobs/{id}         cancel a queued job
+          GET    /health            worker and job counts
+
+        Example request:
+          curl -X POST localhost:8765/jobs -d '{"provider": "glm",
+            "model": "cogview-4-250304", "task_type": "text_to_image",
+            "prompt": "A red fox"}'
+
+        Notes:
+          - Binds to 127.0.0.1 by default; there is no authentication.
+          - Runs are saved under --output-dir like any other run. Ctrl+C stops the
+            server after running jobs finish.
+        """
+    )
+
+
+def _shard_help_epilog() -> str:
+    return dedent(
+        """\
+        Workflow (every node mounts the same --output-dir):
+          igt shard create --spec eval.json --chunk-size 50
+          igt shard work 20260219-120301-a1b2c3 --concurrency 8   # on each node
+          igt shard status 20260219-120301-a1b2c3
+
+        Notes:
+          - The spec uses the 'igt matrix' format; jobs are written to
+            shards/<table-id>/jobs/ in chunks.
+          - A worker claims one chunk at a time with a lease file and renews it
+            while it runs. If a node dies, its lease expires and another worker
+            takes the chunk, skipping jobs that already have a result.
+          - Failed jobs count as finished; parked jobs are retried later.
+          - Nodes need roughly synchronized clocks (well within --lease-seconds).
+        """
+    )
+
+
+def _submit_help_epilog() -> str:
+    return dedent(
+        """\
+        Examples:
+          igt submit --model qwen-image --task-type text_to_image
+            --prompts-file prompts.txt
+          igt submit --model qwen-image --task-type text_to_image
+            --prompt "A lighthouse in fog"
+
+        Notes:
+          - Only creates Alibaba (DashScope) async tasks; it does not wait for them.
+          - Task ids are appended to {output-dir}/tasks/ledger.jsonl.
+          - Run igt collect later to save the finished images.
+        """
+    )
+
+
+def _collect_help_epilog() -> str:
+    return dedent(
+        """\
+        Examples:
+          igt collect
+          igt collect --wait 600
+
+        Cron (every 5 minutes):
+          */5 * * * * cd /path/to/project && igt collect --quiet
+
+        Notes:
+          - Finished tasks are saved like any other run and marked collected.
+          - Network errors, 5xx and 429 leave a task pending for the next run.
+          - Safe to repeat: collected tasks are skipped, and a second collect
+            running at the same time is refused by a lock file.
         """
     )
 
@@ -753,6 +1698,7 @@ def _history_help_epilog() -> str:
           igt history list
           igt history list --provider alibaba --limit 10
           igt history show --run-id 20260219-120301_alibaba_text_to_image_req_abc
+          igt history gc --dry-run
 
         Notes:
           - Reads saved runs from '--output-dir' (default: runs).
@@ -761,6 +1707,21 @@ def _history_help_epilog() -> str:
     )
 
 
+def _history_gc_help_epilog() -> str:
+    return dedent(
+        """\
+        Examples:
+          igt history gc --dry-run
+          igt history gc
+
+        Notes:
+          - With IGT_BLOB_STORE=on, run images are hardlinks into {output-dir}/blobs/.
+            A blob is kept while any run folder still links to it, so delete run
+            folders first, then run gc to free the space.
+        """
+    )
+
+
 def _history_list_help_epilog() -> str:
     return dedent(
         """\
@@ -0,0 +1,322 @@
+import base64
+import os
+import struct
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+INPUT_CACHE_MB_ENV = "IGT_INPUT_CACHE_MB"
+DEFAULT_INPUT_CACHE_MB = 256
+# Bytes read for the dimensions of an uncached file; SOF markers sit well inside this.
+HEADER_READ_BYTES = 1024 * 1024
+DIMENSIONS_MEMO_SIZE = 1024
+
+_UNSET: Any = object()
+
+
+class InputAsset:
+    """One input image held in memory: raw bytes plus lazily derived forms.
+
+    The base64 text and the decoded dimensions are computed on first use and
+    kept with the bytes, so a batch that shares one input pays for them once.
+    """
+
+    def __init__(
+        self,
+        data: bytes,
+        mime: str = "image/png",
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        self.data = data
+        self.mime = mime
+        self.etag = etag
+        self.last_modified = last_modified
+        self._base64: Optional[bytes] = None
+        self._dimensions: Any = _UNSET
+
+    @property
+    def cost(self) -> int:
+        """Bytes charged against the cache: the raw data and its base64 form."""
+        return len(self.data) + (len(self.data) + 2) // 3 * 4
+
+    def base64(self) -> bytes:
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.data)
+        return self._base64
+
+    def dimensions(self) -> Optional[Tuple[int, int]]:
+        if self._dimensions is _UNSET:
+            self._dimensions = image_dimensions(self.data)
+        return self._dimensions
+
+
+class InputAssetCache:
+    """Process-wide LRU of input images, bounded by ``max_bytes``.
+
+    Local files are keyed by path and reused while their size and mtime are
+    unchanged. URLs are reused after a conditional GET (``If-None-Match`` /
+    ``If-Modified-Since``) answers 304; responses without an ETag or
+    Last-Modified header cannot be revalidated and are not kept. An asset
+    larger than a quarter of the budget is returned without being cached, so
+    one huge input cannot flush everything else. Streamed request bodies only
+    use entries that are already ``resident``; they never fill the cache.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_INPUT_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max(0, max_bytes)
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "evicted": 0}
+        self._entries: "OrderedDict[str, Tuple[Any, InputAsset]]" = OrderedDict()
+        self._bytes = 0
+        # Dimensions of files that are not resident, so size inference reads headers once.
+        self._dimensions: Dict[Tuple[str, int, int], Optional[Tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "InputAssetCache":
+        raw = os.getenv(INPUT_CACHE_MB_ENV, str(DEFAULT_INPUT_CACHE_MB)).strip()
+        try:
+            megabytes = float(raw)
+        except ValueError:
+            megabytes = DEFAULT_INPUT_CACHE_MB
+        return cls(int(megabytes * 1024 * 1024))
+
+    def admits(self, size: int) -> bool:
+        """Whether a ``size``-byte input would be kept (see ``InputAsset.cost``)."""
+        return self.max_bytes > 0 and size + (size + 2) // 3 * 4 <= self.max_bytes // 4
+
+    def local(self, path: Path, mime: str = "application/octet-stream") -> InputAsset:
+        """The file's bytes; kept for later calls only if ``admits`` its size."""
+        path = Path(path)
+        stat = path.stat()
+        key = f"file:{path.resolve()}"
+        version = (stat.st_size, stat.st_mtime_ns)
+        cached = self._get(key)
+        if cached is not None and cached[0] == version:
+            self._count("hits")
+            return cached[1]
+        self._count("misses")
+        if not self.admits(stat.st_size):
+            self._drop(key)
+            return InputAsset(path.read_bytes(), mime)
+        asset = InputAsset(path.read_bytes(), mime)
+        self._put(key, version, asset)
+        return asset
+
+    def resident(self, path: Path) -> Optional[InputAsset]:
+        """The cached asset for an unchanged ``path``, without reading the file."""
+        path = Path(path)
+        stat = path.stat()
+        cached = self._get(f"file:{path.resolve()}")
+        if cached is None or cached[0] != (stat.st_size, stat.st_mtime_ns):
+            return None
+        self._count("hits")
+        return cached[1]
+
+    def local_dimensions(self, path: Path) -> Optional[Tuple[int, int]]:
+        """Dimensions of a local image, from the cache or else from its header alone."""
+        cached = self.resident(path)
+        if cached is not None:
+            return cached.dimensions()
+        path = Path(path)
+        stat = path.stat()
+        memo_key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if memo_key in self._dimensions:
+                self.stats["hits"] += 1
+                return self._dimensions[memo_key]
+            self.stats["misses"] += 1
+        with open(path, "rb") as f:
+            dimensions = image_dimensions(f.read(HEADER_READ_BYTES))
+        with self._lock:
+            if len(self._dimensions) >= DIMENSIONS_MEMO_SIZE:
+                self._dimensions.clear()
+            self._dimensions[memo_key] = dimensions
+        return dimensions
+
+    def remote(
+        self, url: str, session: Optional[requests.Session] = None, timeout: float = 120
+    ) -> InputAsset:
+        """Fetch ``url``, revalidating a cached copy instead of downloading it again."""
+        key = f"url:{url}"
+        cached = self._get(key)
+        headers: Dict[str, str] = {}
+        if cached is not None:
+            asset = cached[1]
+            if asset.etag:
+                headers["If-None-Match"] = asset.etag
+            if asset.last_modified:
+                headers["If-Modified-Since"] = asset.last_modified
+        getter = session.get if session is not None else requests.get
+        resp = getter(url, headers=headers, timeout=timeout)
+        if cached is not None and resp.status_code == 304:
+            self._count("hits")
+            self._count("revalidated")
+            return cached[1]
+        resp.raise_for_status()
+        self._count("misses")
+        asset = InputAsset(
+            resp.content,
+            resp.headers.get("content-type", "image/png").split(";")[0],
+            etag=resp.headers.get("etag"),
+            last_modified=resp.headers.get("last-modified"),
+        )
+        if asset.etag or asset.last_modified:
+            self._put(key, None, asset)
+        else:
+            self._drop(key)
+        return asset
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._dimensions.clear()
+            self._bytes = 0
+
+    def _get(self, key: str) -> Optional[Tuple[Any, InputAsset]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key: str, version: Any, asset: InputAsset) -> None:
+        if not self.admits(len(asset.data)):
+            self._drop(key)
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1].cost
+            self._entries[key] = (version, asset)
+            self._bytes += asset.cost
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted.cost
+                self.stats["evicted"] += 1
+
+    def _drop(self, key: str) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1].cost
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+
+_DEFAULT_ASSETS: Optional[InputAssetCache] = None
+_DEFAULT_ASSETS_LOCK = threading.Lock()
+
+
+def get_input_assets() -> InputAssetCache:
+    """Process-wide input asset cache sized from ``IGT_INPUT_CACHE_MB`` on first use."""
+    global _DEFAULT_ASSETS
+    with _DEFAULT_ASSETS_LOCK:
+        if _DEFAULT_ASSETS is None:
+            _DEFAULT_ASSETS = InputAssetCache.from_env()
+        return _DEFAULT_ASSETS
+
+
+def reset_input_assets() -> None:
+    """Drop the shared cache so the next use re-reads the environment."""
+    global _DEFAULT_ASSETS
+    with _DEFAULT_ASSETS_LOCK:
+        _DEFAULT_ASSETS = None
+
+
+def image_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """``(width, height)`` from a PNG, JPEG, GIF or BMP header, else ``None``."""
+    for parser in (_png_dimensions, _jpeg_dimensions, _gif_dimensions, _bmp_dimensions):
+        result = parser(data)
+        if result:
+            return result
+    return None
+
+
+def _png_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    if len(data) < 24:
+        return None
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        return None
+    width, height = struct.unpack(">II", data[16:24])
+    return width, height
+
+
+def _jpeg_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    if len(data) < 4 or data[0:2] != b"\xFF\xD8":
+        return None
+    i = 2
+    sof_markers = {
+        0xC0,
+        0xC1,
+        0xC2,
+        0xC3,
+        0xC5,
+        0xC6,
+        0xC7,
+        0xC9,
+        0xCA,
+        0xCB,
+        0xCD,
+        0xCE,
+        0xCF,
+    }
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        while i < len(data) and data[i] == 0xFF:
+            i += 1
+        if i >= len(data):
+            return None
+        marker = data[i]
+        i += 1
+        if marker in {0xD8, 0xD9}:
+            continue
+        if marker == 0xDA:
+            return None
+        if i + 2 > len(data):
+            return None
+        segment_length = struct.unpack(">H", data[i : i + 2])[0]
+        if segment_length < 2 or i + segment_length > len(data):
+            return None
+        if marker in sof_markers:
+            if i + 7 > len(data):
+                return None
+            height, width = struct.unpack(">HH", data[i + 3 : i + 7])
+            return width, height
+        i += segment_length
+    return None
+
+
+def _gif_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    if len(data) < 10:
+        return None
+    if data[:6] not in (b"GIF87a", b"GIF89a"):
+        return None
+    width, height = struct.unpack("<HH", data[6:10])
+    return width, height
+
+
+def _bmp_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    if len(data) < 26 or data[:2] != b"BM":
+        return None
+    width = int.from_bytes(data[18:22], "little", signed=True)
+    height = int.from_bytes(data[22:26], "little", signed=True)
+    if width <= 0 or height == 0:
+        return None
+    return width, abs(height)
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import secrets
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+
+from core.io_utils import ensure_dir
+
+BLOB_STORE_ENV = "IGT_BLOB_STORE"
+BLOBS_DIRNAME = "blobs"
+
+
+class BlobStore:
+    """Content-addressed files under ``{output_root}/blobs/``.
+
+    Run folders get hardlinks to the blob named after the file's SHA-256, so an
+    image or input shared by many runs is stored once. The hardlink count is the
+    reference count: a blob whose only link is its own store entry belongs to no
+    run any more and is removed by ``gc``. Where hardlinks are not supported the
+    run gets a plain copy instead.
+    """
+
+    def __init__(self, output_root: Path):
+        self.root = Path(output_root) / BLOBS_DIRNAME
+
+    @classmethod
+    def from_env(cls, output_root: Path) -> Optional["BlobStore"]:
+        """``None`` unless ``IGT_BLOB_STORE`` is on (default off)."""
+        raw = os.getenv(BLOB_STORE_ENV, "off").strip().lower()
+        if raw not in {"1", "true", "yes", "on"}:
+            return None
+        return cls(output_root)
+
+    def write(self, target: Path, data: bytes) -> str:
+        """Store ``data`` and place it at ``target``; returns the content hash."""
+        digest = hashlib.sha256(data).hexdigest()
+        blob = self.path(digest)
+        if not blob.exists():
+            self._publish(blob, lambda tmp: tmp.write_bytes(data))
+        if not self._link(blob, target):
+            target.write_bytes(data)
+        return digest
+
+    def write_file(self, target: Path, source: Path) -> str:
+        """Like ``write`` for an existing file, hashed in blocks."""
+        hasher = hashlib.sha256()
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                hasher.update(block)
+        digest = hasher.hexdigest()
+        blob = self.path(digest)
+        if not blob.exists():
+            self._publish(blob, lambda tmp: shutil.copyfile(source, tmp))
+        if not self._link(blob, target):
+            shutil.copyfile(source, target)
+        return digest
+
+    def adopt(self, target: Path, source: Path, digest: str) -> str:
+        """Move the pre-hashed ``source`` into the store and link it at ``target``."""
+        blob = self.path(digest)
+        if blob.exists():
+            source.unlink(missing_ok=True)
+        else:
+            ensure_dir(blob.parent)
+            os.replace(source, blob)
+        self.link(digest, target)
+        return digest
+
+    def link(self, digest: str, target: Path) -> None:
+        """Place the stored blob ``digest`` at ``target``."""
+        blob = self.path(digest)
+        if not self._link(blob, target):
+            shutil.copyfile(blob, target)
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def stats(self) -> Dict[str, int]:
+        counts = {"blobs": 0, "bytes": 0, "unreferenced": 0, "links": 0}
+        for blob in self._blobs():
+            stat = blob.stat()
+            counts["blobs"] += 1
+            counts["bytes"] += stat.st_size
+            counts["links"] += stat.st_nlink - 1
+            if stat.st_nlink <= 1:
+                counts["unreferenced"] += 1
+        return counts
+
+    def gc(self) -> Dict[str, int]:
+        """Delete blobs no run folder links to any more."""
+        removed = {"blobs": 0, "bytes": 0}
+        for blob in self._blobs():
+            stat = blob.stat()
+            if stat.st_nlink > 1:
+                continue
+            blob.unlink(missing_ok=True)
+            removed["blobs"] += 1
+            removed["bytes"] += stat.st_size
+        return removed
+
+    def _blobs(self):
+        if not self.root.exists():
+            return
+        for blob in self.root.glob("*/*"):
+            if blob.is_file() and not blob.name.startswith("."):
+                yield blob
+
+    def _publish(self, blob: Path, fill) -> None:
+        ensure_dir(blob.parent)
+        tmp = blob.parent / f".{blob.name}.{secrets.token_hex(4)}.tmp"
+        try:
+            fill(tmp)
+            os.replace(tmp, blob)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def _link(self, blob: Path, target: Path) -> bool:
+        target.unlink(missing_ok=True)
+        try:
+            os.link(blob, target)
+        except OSError:
+            # No hardlink support, or gc removed the blob in between.
+            return False
+        return True
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import secrets
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.io_utils import ensure_dir, json_dump
+from core.models import TASK_IMAGE2IMAGE, GenerationRequest
+from core.services.generation import is_alibaba_autocrop_enabled
+
+CACHE_ENV = "IGT_CACHE"
+CACHE_DIR_ENV = "IGT_CACHE_DIR"
+CACHE_MAX_MB_ENV = "IGT_CACHE_MAX_MB"
+CACHE_MAX_AGE_DAYS_ENV = "IGT_CACHE_MAX_AGE_DAYS"
+CACHE_MODES = ("off", "read", "write", "readwrite")
+ENTRY_FILENAME = "entry.json"
+PRUNE_INTERVAL_SECONDS = 600.0
+
+_UNCACHEABLE_SUFFIXES = (".url.txt", ".txt")
+
+
+def default_cache_dir() -> Path:
+    return Path.home() / ".cache" / "image-gen-test-tool" / "responses"
+
+
+class ResponseCache:
+    """Disk cache of finished runs for seeded requests.
+
+    Entries are keyed by ``key()`` and hold a copy of ``response.json`` and the
+    saved images. ``read`` serves hits, ``write`` stores new runs, ``readwrite``
+    does both. Entries older than ``max_age_seconds`` are dropped, and the least
+    recently used ones go first once the cache grows past ``max_bytes``. ``store``
+    keeps a running size total and only rescans the folder when that total is
+    over the limit or ``PRUNE_INTERVAL_SECONDS`` have passed since the last scan
+    (which also picks up entries other processes added).
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        mode: str = "readwrite",
+        max_bytes: int = 2048 * 1024 * 1024,
+        max_age_seconds: float = 30 * 86400.0,
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"unsupported cache mode: {mode}")
+        self.root = Path(root)
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._total_bytes: Optional[int] = None
+        self._pruned_at = 0.0
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCache"]:
+        """``None`` unless ``IGT_CACHE`` enables it (default ``off``)."""
+        mode = os.getenv(CACHE_ENV, "off").strip().lower() or "off"
+        if mode == "off":
+            return None
+        raw_dir = os.getenv(CACHE_DIR_ENV, "").strip()
+        return cls(
+            Path(raw_dir) if raw_dir else default_cache_dir(),
+            mode=mode,
+            max_bytes=int(float(os.getenv(CACHE_MAX_MB_ENV, "2048")) * 1024 * 1024),
+            max_age_seconds=float(os.getenv(CACHE_MAX_AGE_DAYS_ENV, "30")) * 86400.0,
+        )
+
+    @property
+    def readable(self) -> bool:
+        return self.mode in ("read", "readwrite")
+
+    @property
+    def writable(self) -> bool:
+        return self.mode in ("write", "readwrite")
+
+    def key(self, request: GenerationRequest) -> Optional[str]:
+        """Canonical hash of what the provider would receive; ``None`` when unseeded."""
+        if request.seed is None:
+            return None
+        payload = request.to_dict()
+        if request.input_image:
+            payload["input_image"] = self._input_digest(request.input_image)
+        if request.provider == "alibaba" and request.task_type == TASK_IMAGE2IMAGE:
+            # The auto-crop step changes the size and image the provider sees.
+            payload["autocrop"] = is_alibaba_autocrop_enabled()
+        text = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Return the entry folder for ``key`` and mark it recently used."""
+        entry_dir = self._entry_dir(key)
+        marker = entry_dir / ENTRY_FILENAME
+        now = time.time()
+        try:
+            entry = json.loads(marker.read_text(encoding="utf-8"))
+            if now - float(entry["created_at"]) > self.max_age_seconds:
+                raise FileNotFoundError(marker)
+            os.utime(marker, (now, now))
+        except (OSError, ValueError, KeyError):
+            self._count("misses")
+            return None
+        self._count("hits")
+        return entry_dir
+
+    def store(self, key: str, run_dir: Path) -> bool:
+        """Copy a finished run into the cache; skipped when an image failed to download."""
+        saved = json.loads((run_dir / "saved_images.json").read_text(encoding="utf-8"))
+        saved_files = [Path(item) for item in saved.get("saved_files", [])]
+        if any(path.name.endswith(_UNCACHEABLE_SUFFIXES) for path in saved_files):
+            return False
+        tmp_dir = ensure_dir(self.root / f"tmp-{secrets.token_hex(6)}")
+        try:
+            names: List[str] = []
+            size = 0
+            images_dir = ensure_dir(tmp_dir / "images")
+            for source in saved_files:
+                shutil.copyfile(source, images_dir / source.name)
+                names.append(source.name)
+                size += source.stat().st_size
+            shutil.copyfile(run_dir / "response.json", tmp_dir / "response.json")
+            size += (tmp_dir / "response.json").stat().st_size
+            json_dump(
+                tmp_dir / ENTRY_FILENAME,
+                {"key": key, "created_at": time.time(), "size_bytes": size, "images": names},
+            )
+            entry_dir = self._entry_dir(key)
+            ensure_dir(entry_dir.parent)
+            if entry_dir.exists():
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            try:
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                # Another worker stored the same key first.
+                return False
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self._count("stored")
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += size
+            due = (
+                self._total_bytes is None
+                or self._total_bytes > self.max_bytes
+                or time.time() - self._pruned_at >= PRUNE_INTERVAL_SECONDS
+            )
+        if due:
+            self.prune()
+        return True
+
+    def prune(self) -> int:
+        """Drop expired entries, then least recently used ones until under ``max_bytes``."""
+        now = time.time()
+        entries = []
+        removed = 0
+        for marker in self.root.glob(f"*/*/{ENTRY_FILENAME}"):
+            try:
+                entry = json.loads(marker.read_text(encoding="utf-8"))
+                used_at = marker.stat().st_mtime
+            except (OSError, ValueError):
+                continue
+            if now - float(entry.get("created_at", 0)) > self.max_age_seconds:
+                shutil.rmtree(marker.parent, ignore_errors=True)
+                removed += 1
+                continue
+            entries.append((used_at, int(entry.get("size_bytes", 0)), marker.parent))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            removed += 1
+        if removed:
+            self._count("evicted", removed)
+        with self._lock:
+            self._total_bytes = total
+            self._pruned_at = now
+        return removed
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def _input_digest(self, input_image: str) -> str:
+        path = Path(input_image)
+        try:
+            stat = path.stat()
+        except (OSError, ValueError):
+            # URLs and data URIs carry their own content.
+            return input_image
+        if not path.is_file():
+            return input_image
+        memo_key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(memo_key)
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    hasher.update(block)
+            digest = f"sha256:{hasher.hexdigest()}"
+            with self._lock:
+                self._digests[memo_key] = digest
+        return digest
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[name] += amount
+
+
+_DEFAULT_CACHE: Optional[ResponseCache] = None
+_DEFAULT_CACHE_LOADED = False
+_DEFAULT_CACHE_LOCK = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide cache configured from ``IGT_CACHE`` on first use."""
+    global _DEFAULT_CACHE, _DEFAULT_CACHE_LOADED
+    with _DEFAULT_CACHE_LOCK:
+        if not _DEFAULT_CACHE_LOADED:
+            _DEFAULT_CACHE = ResponseCache.from_env()
+            _DEFAULT_CACHE_LOADED = True
+        return _DEFAULT_CACHE
+
+
+def reset_response_cache() -> None:
+    """Drop the shared cache so the next use re-reads the environment."""
+    global _DEFAULT_CACHE, _DEFAULT_CACHE_LOADED
+    with _DEFAULT_CACHE_LOCK:
+        _DEFAULT_CACHE = None
+        _DEFAULT_CACHE_LOADED = False
+
@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+CIRCUIT_FAILURES_ENV = "IGT_CIRCUIT_FAILURES"
+CIRCUIT_COOLDOWN_ENV = "IGT_CIRCUIT_COOLDOWN_SECONDS"
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose circuit is open."""
+
+    def __init__(self, provider: str):
+        super().__init__(f"circuit open for provider: {provider}")
+        self.provider = provider
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one provider.
+
+    ``failure_threshold`` transient failures in a row open the circuit. After
+    ``cooldown_seconds`` one probe call is let through (half-open); its outcome
+    closes the circuit again or re-opens it for another cooldown. A probe that
+    ends without an outcome (cancelled, interrupted) must ``release_probe``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        cooldown_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be >= 1")
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.rejected = 0
+        self.transitions: List[Dict[str, Any]] = []
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        allowed, _ = self.admit()
+        return allowed
+
+    def admit(self) -> Tuple[bool, bool]:
+        """``(allowed, is_probe)``: like ``allow``, and whether the call is the probe."""
+        with self._lock:
+            if self.state == STATE_OPEN:
+                if self._clock() - self._opened_at < self.cooldown_seconds:
+                    self.rejected += 1
+                    return False, False
+                self._transition(STATE_HALF_OPEN)
+            if self.state == STATE_HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    return False, False
+                self._probe_in_flight = True
+                return True, True
+            return True, False
+
+    def release_probe(self) -> None:
+        """Free the probe slot of a call that never finished; stays half-open."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        """The provider answered; any non-transient outcome counts as alive."""
+        with self._lock:
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+            if self.state != STATE_CLOSED:
+                self._transition(STATE_CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == STATE_HALF_OPEN or (
+                self.state == STATE_CLOSED and self.consecutive_failures >= self.failure_threshold
+            ):
+                self._opened_at = self._clock()
+                self._transition(STATE_OPEN)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {STATE_OPEN: 0, STATE_HALF_OPEN: 0, STATE_CLOSED: 0}
+            for item in self.transitions:
+                counts[item["to"]] += 1
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "opened": counts[STATE_OPEN],
+                "half_opened": counts[STATE_HALF_OPEN],
+                "closed": counts[STATE_CLOSED],
+                "rejected": self.rejected,
+                "transitions": [dict(item) for item in self.transitions],
+            }
+
+    def _transition(self, target: str) -> None:
+        self.transitions.append(
+            {"at": round(time.time(), 3), "from": self.state, "to": target}
+        )
+        self.state = target
+
+
+class CircuitBreakerRegistry:
+    """One breaker per provider, created on first use and shared by all workers."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    @classmethod
+    def from_env(cls) -> Optional["CircuitBreakerRegistry"]:
+        """Registry configured from env, or ``None`` when ``IGT_CIRCUIT_FAILURES=0``."""
+        threshold = int(os.getenv(CIRCUIT_FAILURES_ENV, "5"))
+        if threshold <= 0:
+            return None
+        return cls(
+            failure_threshold=threshold,
+            cooldown_seconds=float(os.getenv(CIRCUIT_COOLDOWN_ENV, "30")),
+        )
+
+    def get(self, provider: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(provider)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    provider,
+                    failure_threshold=self.failure_threshold,
+                    cooldown_seconds=self.cooldown_seconds,
+                    clock=self._clock,
+                )
+                self._breakers[provider] = breaker
+            return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.snapshot() for name, breaker in sorted(breakers.items())}
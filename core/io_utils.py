@@ -2,9 +2,13 @@ import base64
 import binascii
 import json
 import mimetypes
-import struct
+import mmap
+import os
+import sys
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.assets import get_input_assets, image_dimensions
 
 
 def ensure_dir(path: Path) -> Path:
@@ -23,7 +27,66 @@ def is_url(value: str) -> bool:
     return value.startswith("http://") or value.startswith("https://")
 
 
-def parse_input_image(value: Optional[str]) -> Optional[Dict[str, str]]:
+# Raw bytes per base64 slice; a multiple of 3 so slices concatenate without padding.
+BASE64_FILE_CHUNK_BYTES = 3 * 256 * 1024
+
+
+class Base64File:
+    """A local file that goes into a JSON payload as its base64 text, encoded lazily.
+
+    ``core.jsonstream.StreamingJSONBody`` writes it in slices from a memory-mapped
+    file, so the encoded image never exists as one string. A file already resident
+    in the input asset cache is sliced from its cached encoding instead; streaming
+    never adds files to the cache. With
+    ``data_uri`` the text is prefixed with ``data:{mime};base64,``.
+    """
+
+    def __init__(self, path: Path, mime: str, data_uri: bool = True):
+        self.path = Path(path)
+        self.mime = mime
+        self.data_uri = data_uri
+
+    @property
+    def prefix(self) -> str:
+        return f"data:{self.mime};base64," if self.data_uri else ""
+
+    def as_base64(self) -> "Base64File":
+        return Base64File(self.path, self.mime, data_uri=False)
+
+    def encoded_length(self) -> int:
+        size = self.path.stat().st_size
+        return len(self.prefix) + (size + 2) // 3 * 4
+
+    def iter_encoded(self) -> Iterator[bytes]:
+        chunk_bytes = max(3, BASE64_FILE_CHUNK_BYTES // 3 * 3)
+        yield self.prefix.encode("ascii")
+        cached = get_input_assets().resident(self.path)
+        if cached is not None:
+            encoded = cached.base64()
+            step = chunk_bytes // 3 * 4
+            for offset in range(0, len(encoded), step):
+                yield encoded[offset : offset + step]
+            return
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return  # mmap refuses empty files
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                for offset in range(0, len(view), chunk_bytes):
+                    yield base64.b64encode(view[offset : offset + chunk_bytes])
+
+    def __str__(self) -> str:
+        return b"".join(self.iter_encoded()).decode("ascii")
+
+    def __repr__(self) -> str:
+        return f"Base64File({str(self.path)!r}, {self.mime!r}, data_uri={self.data_uri})"
+
+
+def parse_input_image(value: Optional[str], lazy: bool = False) -> Optional[Dict[str, Any]]:
+    """Classify an input image as ``url``, ``data_uri``, ``base64`` or (``lazy``) ``file``.
+
+    Local files are inlined as a data URI, or with ``lazy`` returned as a
+    ``Base64File`` for adapters that stream request bodies.
+    """
     if not value:
         return None
     if is_url(value):
@@ -34,8 +97,9 @@ def parse_input_image(value: Optional[str]) -> Optional[Dict[str, str]]:
     path = Path(value)
     if path.exists() and path.is_file():
         mime = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
-        with open(path, "rb") as f:
-            b64 = base64.b64encode(f.read()).decode("ascii")
+        if lazy:
+            return {"kind": "file", "value": Base64File(path, mime)}
+        b64 = get_input_assets().local(path, mime).base64().decode("ascii")
         return {"kind": "data_uri", "value": f"data:{mime};base64,{b64}"}
 
     # Treat unknown inputs as raw base64 for flexibility.
@@ -43,10 +107,14 @@ def parse_input_image(value: Optional[str]) -> Optional[Dict[str, str]]:
 
 
 def infer_image_size(value: Optional[str]) -> Optional[str]:
-    payload = _load_image_bytes(value)
-    if not payload:
-        return None
-    dimensions = _extract_dimensions(payload)
+    path = Path(value) if value and not value.startswith("data:image/") else None
+    if path is not None and path.is_file():
+        dimensions = get_input_assets().local_dimensions(path)
+    else:
+        payload = _load_image_bytes(value)
+        if not payload:
+            return None
+        dimensions = image_dimensions(payload)
     if not dimensions:
         return None
     width, height = dimensions
@@ -78,89 +146,58 @@ def _safe_b64decode(value: str) -> Optional[bytes]:
         return None
 
 
-def _extract_dimensions(data: bytes) -> Optional[tuple[int, int]]:
-    for parser in (_png_dimensions, _jpeg_dimensions, _gif_dimensions, _bmp_dimensions):
-        result = parser(data)
-        if result:
-            return result
-    return None
+def json_dump(path: Path, payload: Any) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2, default=str)
 
 
-def _png_dimensions(data: bytes) -> Optional[tuple[int, int]]:
-    if len(data) < 24:
-        return None
-    if data[:8] != b"\x89PNG\r\n\x1a\n":
-        return None
-    width, height = struct.unpack(">II", data[16:24])
-    return width, height
+def append_jsonl(path: Path, record: Dict[str, Any]) -> None:
+    """Append one JSON line and fsync, so a crash never loses a completed record."""
+    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
 
 
-def _jpeg_dimensions(data: bytes) -> Optional[tuple[int, int]]:
-    if len(data) < 4 or data[0:2] != b"\xFF\xD8":
-        return None
-    i = 2
-    sof_markers = {
-        0xC0,
-        0xC1,
-        0xC2,
-        0xC3,
-        0xC5,
-        0xC6,
-        0xC7,
-        0xC9,
-        0xCA,
-        0xCB,
-        0xCD,
-        0xCE,
-        0xCF,
-    }
-    while i + 9 < len(data):
-        if data[i] != 0xFF:
-            i += 1
+def read_jsonl(path: Path) -> List[Dict[str, Any]]:
+    """Read JSON lines, ignoring a torn last line left by an interrupted write."""
+    if not path.exists():
+        return []
+    records: List[Dict[str, Any]] = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
             continue
-        while i < len(data) and data[i] == 0xFF:
-            i += 1
-        if i >= len(data):
-            return None
-        marker = data[i]
-        i += 1
-        if marker in {0xD8, 0xD9}:
+        try:
+            item = json.loads(line)
+        except ValueError:
             continue
-        if marker == 0xDA:
-            return None
-        if i + 2 > len(data):
-            return None
-        segment_length = struct.unpack(">H", data[i : i + 2])[0]
-        if segment_length < 2 or i + segment_length > len(data):
-            return None
-        if marker in sof_markers:
-            if i + 7 > len(data):
-                return None
-            height, width = struct.unpack(">HH", data[i + 3 : i + 7])
-            return width, height
-        i += segment_length
-    return None
+        if isinstance(item, dict):
+            records.append(item)
+    return records
 
 
-def _gif_dimensions(data: bytes) -> Optional[tuple[int, int]]:
-    if len(data) < 10:
-        return None
-    if data[:6] not in (b"GIF87a", b"GIF89a"):
-        return None
-    width, height = struct.unpack("<HH", data[6:10])
-    return width, height
+def iter_lines(path: str) -> Iterator[Tuple[int, str]]:
+    """Yield ``(line_number, stripped_line)`` for non-empty lines; ``-`` reads stdin."""
+    if path == "-":
+        yield from _numbered_lines(sys.stdin)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        yield from _numbered_lines(f)
 
 
-def _bmp_dimensions(data: bytes) -> Optional[tuple[int, int]]:
-    if len(data) < 26 or data[:2] != b"BM":
-        return None
-    width = int.from_bytes(data[18:22], "little", signed=True)
-    height = int.from_bytes(data[22:26], "little", signed=True)
-    if width <= 0 or height == 0:
-        return None
-    return width, abs(height)
+def iter_prompts(path: str) -> Iterator[str]:
+    """Yield prompts from ``path`` (``-`` reads stdin) one line at a time."""
+    seen = False
+    for _, text in iter_lines(path):
+        seen = True
+        yield text
+    if not seen:
+        raise ValueError("prompts file is empty" if path != "-" else "stdin has no prompts")
 
 
-def json_dump(path: Path, payload: Any) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2, default=str)
+def _numbered_lines(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    for number, line in enumerate(lines, start=1):
+        text = line.strip()
+        if text:
+            yield number, text
@@ -0,0 +1,101 @@
+import secrets
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.io_utils import append_jsonl, ensure_dir, read_jsonl
+from core.models import GenerationRequest, request_hash
+
+BATCHES_DIRNAME = "batches"
+JOURNAL_FILENAME = "journal.jsonl"
+
+EVENT_START = "start"
+EVENT_RESUME = "resume"
+EVENT_JOB = "job"
+
+
+def new_batch_id() -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+
+
+class BatchJournal:
+    """Append-only record of one ``igt batch`` invocation.
+
+    The first line stores the batch settings; every finished job appends its
+    input index, request hash, status and run_dir as soon as it completes. A
+    resumed batch reads the journal back and skips jobs that already succeeded.
+    """
+
+    def __init__(self, output_root: Path, batch_id: str):
+        self.batch_id = batch_id
+        self.dir = output_root / BATCHES_DIRNAME / batch_id
+        self.path = self.dir / JOURNAL_FILENAME
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, output_root: Path, settings: Dict[str, Any]) -> "BatchJournal":
+        journal = cls(output_root, new_batch_id())
+        journal._append(
+            {"event": EVENT_START, "batch_id": journal.batch_id, "at": time.time(), **settings}
+        )
+        return journal
+
+    @classmethod
+    def open(cls, output_root: Path, batch_id: str) -> "BatchJournal":
+        journal = cls(output_root, batch_id)
+        if not journal.path.exists():
+            raise ValueError(f"batch not found: {batch_id} (looked in {journal.path})")
+        return journal
+
+    def settings(self) -> Dict[str, Any]:
+        for record in read_jsonl(self.path):
+            if record.get("event") == EVENT_START:
+                return record
+        raise ValueError(f"batch journal has no start record: {self.path}")
+
+    def record_resume(self) -> None:
+        self._append({"event": EVENT_RESUME, "at": time.time()})
+
+    def record(self, index: int, request: GenerationRequest, row: Dict[str, str]) -> None:
+        self._append(
+            {
+                "event": EVENT_JOB,
+                "index": index,
+                "hash": request_hash(request),
+                "at": time.time(),
+                **row,
+            }
+        )
+
+    def completed(self) -> Dict[int, Dict[str, Any]]:
+        """Latest journal entry per job index."""
+        jobs: Dict[int, Dict[str, Any]] = {}
+        for record in read_jsonl(self.path):
+            if record.get("event") == EVENT_JOB and isinstance(record.get("index"), int):
+                jobs[record["index"]] = record
+        return jobs
+
+    def is_done(
+        self,
+        index: int,
+        request: GenerationRequest,
+        completed: Optional[Dict[int, Dict[str, Any]]] = None,
+    ) -> bool:
+        entry = (completed if completed is not None else self.completed()).get(index)
+        return bool(
+            entry and entry.get("status") == "ok" and entry.get("hash") == request_hash(request)
+        )
+
+    def rows(self) -> List[Dict[str, str]]:
+        """Summary rows in input order, built from the journal alone."""
+        keys = ("provider", "model", "prompt", "status", "run_dir", "error")
+        return [
+            {key: str(entry.get(key, "")) for key in keys}
+            for _, entry in sorted(self.completed().items())
+        ]
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        ensure_dir(self.dir)
+        with self._lock:
+            append_jsonl(self.path, record)
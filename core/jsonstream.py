@@ -0,0 +1,354 @@
+import asyncio
+import base64
+import codecs
+import json
+import os
+import re
+import secrets
+import string
+import tempfile
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from adapters.errors import TransientError
+from core.io_utils import Base64File
+from core.models import IMAGE_REF_PREFIX
+
+STREAM_RESPONSES_ENV = "IGT_STREAM_RESPONSES"
+SPOOL_PREFIX = "igt-inline-"
+INLINE_KEYS = ("inlineData", "inline_data")
+MIME_KEYS = ("mimeType", "mime_type")
+
+_STRUCTURAL = re.compile(r'[{}\[\]:,"]')
+_BASE64_FLUSH_CHARS = 64 * 1024
+_BASE64_CHARS = frozenset(string.ascii_letters + string.digits + "+/=")
+
+
+def stream_responses_enabled() -> bool:
+    raw = os.getenv(STREAM_RESPONSES_ENV, "off").strip().lower()
+    return raw in {"1", "true", "yes", "on"}
+
+
+class InlineImageSpooler:
+    """Incremental JSON scan that decodes ``inlineData.data`` strings straight to files.
+
+    Feed the body in chunks; everything except those strings is kept as JSON
+    text, with each image replaced by an ``igt-image:images[i]`` reference.
+    ``finish`` parses that (now small) text and returns it with the spooled
+    files, named after the part's ``mimeType``. Memory per image is bounded by
+    the chunk size, not the image size.
+    """
+
+    def __init__(self, spool_dir: Optional[Path] = None):
+        self.spool_dir = Path(spool_dir or tempfile.gettempdir())
+        self.files: List[Path] = []
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._text: List[str] = []
+        # One entry per open container: [kind, current key, key the container sits under].
+        self._stack: List[List[Any]] = []
+        self._expect_key = False
+        self._in_string = False
+        self._is_key = False
+        self._key_parts: List[str] = []
+        self._last_key: Optional[str] = None
+        self._escape = False
+        # Hex digits of a ``\uXXXX`` escape inside image data, buffered across chunks.
+        self._unicode: Optional[str] = None
+        self._blob: Any = None
+        self._carry = ""
+
+    def feed(self, chunk: bytes) -> None:
+        self._scan(self._decoder.decode(chunk))
+
+    def finish(self) -> Tuple[Any, List[Path]]:
+        self._scan(self._decoder.decode(b"", final=True))
+        if self._in_string or self._stack:
+            self.discard()
+            # Usually a dropped connection; the retry layer treats it as transient.
+            raise TransientError("streamed JSON body ended early")
+        try:
+            raw = json.loads("".join(self._text))
+        except ValueError:
+            self.discard()
+            raise
+        self._text = []
+        mimes = _inline_mimes(raw)
+        named: List[Path] = []
+        for position, path in enumerate(self.files):
+            mime = mimes.get(position, "image/png")
+            subtype = mime.split("/", 1)[-1].split(";", 1)[0] or "png"
+            target = path.with_suffix(f".{subtype}")
+            os.replace(path, target)
+            named.append(target)
+        self.files = named
+        return raw, named
+
+    def discard(self) -> None:
+        if self._blob is not None:
+            self._blob.close()
+            self._blob = None
+        for path in self.files:
+            path.unlink(missing_ok=True)
+        self.files = []
+
+    def _scan(self, text: str) -> None:
+        pos = 0
+        end = len(text)
+        while pos < end:
+            if self._in_string:
+                pos = self._scan_string(text, pos)
+                continue
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                self._text.append(text[pos:])
+                return
+            index = match.start()
+            char = text[index]
+            self._text.append(text[pos:index])
+            pos = index + 1
+            if char == '"':
+                self._open_string()
+                continue
+            self._text.append(char)
+            if char in "{[":
+                parent = self._stack[-1] if self._stack else None
+                under = None
+                if parent is not None:
+                    under = parent[1] if parent[0] == "obj" else parent[2]
+                self._stack.append(["obj" if char == "{" else "arr", None, under])
+                self._expect_key = char == "{"
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                self._expect_key = False
+            elif char == ":":
+                if self._stack:
+                    self._stack[-1][1] = self._last_key
+                self._expect_key = False
+            elif char == ",":
+                self._expect_key = bool(self._stack) and self._stack[-1][0] == "obj"
+
+    def _open_string(self) -> None:
+        self._in_string = True
+        self._escape = False
+        self._is_key = self._expect_key
+        if self._is_key:
+            self._key_parts = []
+            self._text.append('"')
+            return
+        top = self._stack[-1] if self._stack else None
+        if top is not None and top[0] == "obj" and top[1] == "data" and top[2] in INLINE_KEYS:
+            fd, name = tempfile.mkstemp(prefix=SPOOL_PREFIX, suffix=".part", dir=self.spool_dir)
+            self._blob = os.fdopen(fd, "wb")
+            self._carry = ""
+            self._text.append(f'"{IMAGE_REF_PREFIX}images[{len(self.files)}]')
+            self.files.append(Path(name))
+            return
+        self._text.append('"')
+
+    def _scan_string(self, text: str, pos: int) -> int:
+        if self._unicode is not None:
+            return self._scan_unicode(text, pos)
+        if self._escape:
+            self._escape = False
+            self._escaped(text[pos])
+            return pos + 1
+        # str.find is much faster than a regex over megabytes of base64.
+        quote = text.find('"', pos)
+        backslash = text.find("\\", pos, quote if quote != -1 else len(text))
+        index = backslash if backslash != -1 else quote
+        if index == -1:
+            self._string_content(text[pos:])
+            return len(text)
+        if index > pos:
+            self._string_content(text[pos:index])
+        if text[index] == "\\":
+            if index + 1 < len(text):
+                self._escaped(text[index + 1])
+                return index + 2
+            self._escape = True
+            return index + 1
+        self._close_string()
+        return index + 1
+
+    def _escaped(self, char: str) -> None:
+        if self._blob is None:
+            self._string_content(char, escaped=True)
+        elif char == "u":
+            self._unicode = ""
+        elif char == "/":
+            self._string_content("/")
+        elif char not in "nr":
+            # Line-break escapes carry no data; anything else cannot be base64.
+            raise ValueError(f"invalid escape \\{char} in inline image data")
+
+    def _scan_unicode(self, text: str, pos: int) -> int:
+        # Encoders may write any base64 character as \uXXXX (e.g. "=" as \u003d).
+        taken = text[pos : pos + 4 - len(self._unicode or "")]
+        digits = (self._unicode or "") + taken
+        if len(digits) < 4:
+            self._unicode = digits
+            return pos + len(taken)
+        self._unicode = None
+        char = chr(int(digits, 16)) if all(c in string.hexdigits for c in digits) else ""
+        if char not in _BASE64_CHARS:
+            raise ValueError(f"invalid escape \\u{digits} in inline image data")
+        self._string_content(char)
+        return pos + len(taken)
+
+    def _string_content(self, value: str, escaped: bool = False) -> None:
+        if self._blob is not None:
+            self._carry += value
+            if len(self._carry) >= _BASE64_FLUSH_CHARS:
+                usable = len(self._carry) // 4 * 4
+                self._blob.write(base64.b64decode(self._carry[:usable]))
+                self._carry = self._carry[usable:]
+            return
+        text = f"\\{value}" if escaped else value
+        self._text.append(text)
+        if self._is_key:
+            self._key_parts.append(text)
+
+    def _close_string(self) -> None:
+        self._in_string = False
+        self._text.append('"')
+        if self._blob is not None:
+            if self._carry:
+                self._blob.write(base64.b64decode(self._carry + "=" * (-len(self._carry) % 4)))
+            self._blob.close()
+            self._blob = None
+            self._carry = ""
+        elif self._is_key:
+            self._last_key = "".join(self._key_parts)
+
+
+def spool_inline_images(
+    chunks: Iterable[bytes], spool_dir: Optional[Path] = None
+) -> Tuple[Any, List[Path]]:
+    spooler = InlineImageSpooler(spool_dir)
+    try:
+        for chunk in chunks:
+            spooler.feed(chunk)
+    except BaseException:
+        spooler.discard()
+        raise
+    return spooler.finish()
+
+
+def spooled_image_path(item: str) -> Optional[Path]:
+    """The file behind a ``file://`` image written by the spooler, else ``None``."""
+    if not item.startswith("file://"):
+        return None
+    path = Path(url2pathname(urlparse(item).path))
+    if not path.name.startswith(SPOOL_PREFIX):
+        return None
+    return path
+
+
+def _inline_mimes(node: Any, found: Optional[dict] = None) -> dict:
+    found = {} if found is None else found
+    if isinstance(node, dict):
+        for key in INLINE_KEYS:
+            inline = node.get(key)
+            data = inline.get("data") if isinstance(inline, dict) else None
+            if isinstance(data, str) and data.startswith(f"{IMAGE_REF_PREFIX}images["):
+                position = int(data[len(IMAGE_REF_PREFIX) + 7 : -1])
+                mime = next((inline[k] for k in MIME_KEYS if inline.get(k)), "image/png")
+                found[position] = str(mime)
+        for value in node.values():
+            _inline_mimes(value, found)
+    elif isinstance(node, list):
+        for item in node:
+            _inline_mimes(item, found)
+    return found
+
+
+class StreamingJSONBody:
+    """Request body for a JSON payload whose ``Base64File`` values are streamed.
+
+    The envelope is serialized with placeholders; iterating yields it around the
+    files' base64 slices, so a large input image is never held as one string.
+    ``len()`` is exact up front, which gives ``requests`` a Content-Length rather
+    than a chunked upload. Iteration re-reads the files, so retries can resend it.
+    """
+
+    def __init__(self, payload: Any):
+        token = f"igt-upload-{secrets.token_hex(8)}"
+        files: List[Base64File] = []
+        text = json.dumps(_swap_files(payload, token, files), allow_nan=False)
+        self.parts: List[Union[bytes, Base64File]] = []
+        pieces = re.split(rf'"{token}-(\d+)"', text)
+        for index, piece in enumerate(pieces):
+            if index % 2:
+                self.parts.extend([b'"', files[int(piece)], b'"'])
+            elif piece:
+                self.parts.append(piece.encode("utf-8"))
+        self.files = files
+
+    @classmethod
+    def wrap(cls, payload: Any) -> Optional["StreamingJSONBody"]:
+        """A streaming body if ``payload`` holds any ``Base64File``, else ``None``."""
+        return cls(payload) if _contains_file(payload) else None
+
+    def __len__(self) -> int:
+        return sum(
+            part.encoded_length() if isinstance(part, Base64File) else len(part)
+            for part in self.parts
+        )
+
+    def __iter__(self) -> Iterator[bytes]:
+        for part in self.parts:
+            if isinstance(part, Base64File):
+                yield from part.iter_encoded()
+            else:
+                yield part
+
+    def async_stream(self) -> "AsyncJSONBody":
+        """The same bytes for ``httpx.AsyncClient``, read in a worker thread."""
+        return AsyncJSONBody(self)
+
+
+class AsyncJSONBody:
+    """Async-only view of a ``StreamingJSONBody``.
+
+    httpx picks a sync stream for anything with ``__iter__``, which an
+    ``AsyncClient`` then refuses, so this wrapper has ``__aiter__`` alone.
+    """
+
+    def __init__(self, body: StreamingJSONBody):
+        self.body = body
+
+    def __len__(self) -> int:
+        return len(self.body)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        # Reading and encoding a slice blocks; keep it off the event loop.
+        chunks = iter(self.body)
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+
+def _swap_files(node: Any, token: str, files: List[Base64File]) -> Any:
+    if isinstance(node, Base64File):
+        files.append(node)
+        return f"{token}-{len(files) - 1}"
+    if isinstance(node, dict):
+        return {key: _swap_files(value, token, files) for key, value in node.items()}
+    if isinstance(node, (list, tuple)):
+        return [_swap_files(item, token, files) for item in node]
+    return node
+
+
+def _contains_file(node: Any) -> bool:
+    if isinstance(node, Base64File):
+        return True
+    if isinstance(node, dict):
+        return any(_contains_file(value) for value in node.values())
+    if isinstance(node, (list, tuple)):
+        return any(_contains_file(item) for item in node)
+    return False
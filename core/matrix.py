@@ -0,0 +1,158 @@
+import itertools
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from core.io_utils import iter_prompts
+from core.models import TASK_IMAGE2IMAGE, TASK_TEXT2IMAGE, GenerationRequest
+from core.services.generation import resolve_request_size
+
+MATRIX_DIMENSIONS = ("prompt", "provider", "model", "size", "seed")
+MATRIX_SUMMARY_FIELDS = MATRIX_DIMENSIONS + ("status", "run_dir", "error")
+
+SPEC_KEYS = {
+    "task_type",
+    "models",
+    "prompts",
+    "prompts_file",
+    "sizes",
+    "seeds",
+    "n",
+    "negative_prompt",
+    "input_image",
+    "extra",
+}
+
+
+class MatrixSpec:
+    """Cross product of prompts x providers/models x sizes x seeds for ``igt matrix``.
+
+    ``models`` maps each provider to its model list, so only real provider/model
+    pairs are expanded. Cells are generated lazily, prompt by prompt, so a large
+    ``prompts_file`` is never loaded whole.
+    """
+
+    def __init__(
+        self,
+        task_type: str,
+        models: Dict[str, List[str]],
+        prompts: Optional[List[str]] = None,
+        prompts_file: Optional[str] = None,
+        sizes: Optional[List[Optional[str]]] = None,
+        seeds: Optional[List[Optional[int]]] = None,
+        n: int = 1,
+        negative_prompt: Optional[str] = None,
+        input_image: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ):
+        if task_type not in {TASK_TEXT2IMAGE, TASK_IMAGE2IMAGE}:
+            raise ValueError(f"unsupported matrix task_type: {task_type}")
+        if not models or not all(models.values()):
+            raise ValueError("matrix spec needs at least one model per provider in 'models'")
+        if bool(prompts) == bool(prompts_file):
+            raise ValueError("matrix spec needs exactly one of 'prompts' or 'prompts_file'")
+        self.task_type = task_type
+        self.models = models
+        self.prompts = prompts
+        self.prompts_file = prompts_file
+        self.sizes = sizes or [None]
+        self.seeds = seeds or [None]
+        self.n = n
+        self.negative_prompt = negative_prompt
+        self.input_image = input_image
+        self.extra = extra or {}
+
+    @classmethod
+    def load(cls, path: Path) -> "MatrixSpec":
+        text = path.read_text(encoding="utf-8")
+        if path.suffix.lower() in {".yaml", ".yml"}:
+            data = _load_yaml(text, path)
+        else:
+            data = json.loads(text)
+        return cls.from_dict(data, base_dir=path.parent)
+
+    @classmethod
+    def from_dict(cls, data: Any, base_dir: Optional[Path] = None) -> "MatrixSpec":
+        if not isinstance(data, dict):
+            raise ValueError("matrix spec must be a mapping")
+        unknown = sorted(set(data) - SPEC_KEYS)
+        if unknown:
+            raise ValueError(f"unknown matrix spec keys: {', '.join(unknown)}")
+        models = data.get("models")
+        if not isinstance(models, dict):
+            raise ValueError("matrix spec 'models' must map provider -> list of models")
+        prompts_file = data.get("prompts_file")
+        if prompts_file and prompts_file != "-" and base_dir is not None:
+            # Relative paths are relative to the spec, not to the working directory.
+            prompts_file = str((base_dir / prompts_file).resolve())
+        return cls(
+            task_type=data.get("task_type", TASK_TEXT2IMAGE),
+            models={
+                str(provider): [str(model) for model in _as_list(names)]
+                for provider, names in models.items()
+            },
+            prompts=[str(prompt) for prompt in _as_list(data.get("prompts")) if str(prompt)],
+            prompts_file=prompts_file,
+            sizes=[None if size is None else str(size) for size in _as_list(data.get("sizes"))],
+            seeds=[None if seed is None else int(seed) for seed in _as_list(data.get("seeds"))],
+            n=int(data.get("n", 1)),
+            negative_prompt=data.get("negative_prompt"),
+            input_image=data.get("input_image"),
+            extra=data.get("extra"),
+        )
+
+    def providers(self) -> List[str]:
+        return list(self.models)
+
+    def cells_per_prompt(self) -> int:
+        targets = sum(len(names) for names in self.models.values())
+        return targets * len(self.sizes) * len(self.seeds)
+
+    def expand(self) -> Iterator[Tuple[Dict[str, str], GenerationRequest]]:
+        """Yield ``(dimensions, request)`` for every cell, prompt by prompt."""
+        default_size = resolve_request_size(self.task_type, None, self.input_image)
+        targets = [(provider, model) for provider, names in self.models.items() for model in names]
+        prompts = iter(self.prompts) if self.prompts else iter_prompts(str(self.prompts_file))
+        for prompt in prompts:
+            for (provider, model), size, seed in itertools.product(
+                targets, self.sizes, self.seeds
+            ):
+                request = GenerationRequest(
+                    provider=provider,
+                    model=model,
+                    task_type=self.task_type,
+                    prompt=prompt,
+                    negative_prompt=self.negative_prompt,
+                    input_image=self.input_image,
+                    size=size or default_size,
+                    n=self.n,
+                    seed=seed,
+                    extra=self.extra,
+                )
+                dimensions = {
+                    "prompt": prompt,
+                    "provider": provider,
+                    "model": model,
+                    "size": request.size or "",
+                    "seed": "" if seed is None else str(seed),
+                }
+                yield dimensions, request
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def _load_yaml(text: str, path: Path) -> Any:
+    try:
+        import yaml
+    except ModuleNotFoundError:  # optional: pip install -e .[yaml]
+        raise ValueError(
+            f"{path} is YAML but PyYAML is not installed (pip install -e .[yaml]); "
+            "use a .json spec instead"
+        ) from None
+    return yaml.safe_load(text)
@@ -1,4 +1,7 @@
-from typing import Any, Dict, List, Literal, Optional
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
@@ -6,6 +9,8 @@ TASK_TEXT2IMAGE = "text_to_image"
 TASK_IMAGE2IMAGE = "image_to_image"
 ProviderType = Literal["alibaba", "google", "glm"]
 TaskType = Literal[TASK_TEXT2IMAGE, TASK_IMAGE2IMAGE]
+KEEP_RAW_RESPONSE_ENV = "IGT_KEEP_RAW_RESPONSE"
+IMAGE_REF_PREFIX = "igt-image:"
 
 
 class GenerationRequest(BaseModel):
@@ -66,3 +71,82 @@ class GenerationResponse(BaseModel):
 
     def to_dict(self) -> Dict[str, Any]:
         return self.model_dump()
+
+
+def request_hash(request: GenerationRequest) -> str:
+    """Stable SHA-256 of the request fields, used to match jobs across runs."""
+    payload = json.dumps(request.to_dict(), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def keep_raw_response() -> bool:
+    """Whether raw provider bodies keep their inline image data (``IGT_KEEP_RAW_RESPONSE``)."""
+    raw = os.getenv(KEEP_RAW_RESPONSE_ENV, "off").strip().lower()
+    return raw in {"1", "true", "yes", "on"}
+
+
+def externalize_image_data(raw: Any, images: List[str]) -> Any:
+    """Replace inline image payloads in ``raw`` with ``igt-image:images[i]`` references.
+
+    ``images`` keeps the only in-memory copy; ``persist_run`` later points the
+    references at the saved files. The structure is edited in place. Values are
+    matched by ``image_digest`` and confirmed in place, so no payload is hashed
+    in full or copied.
+    """
+    index: Dict[Tuple[int, str, str, str], List[Tuple[str, int, int]]] = {}
+    for position, item in enumerate(images):
+        if item.startswith("http://") or item.startswith("https://"):
+            continue
+        starts = [0]
+        if item.startswith("data:"):
+            comma = item.find(",", 0, 256)
+            if comma >= 0:
+                starts.append(comma + 1)
+        for start in starts:
+            index.setdefault(image_digest(item, start), []).append((item, start, position))
+    if not index:
+        return raw
+
+    def _ref(value: str) -> Optional[str]:
+        for item, start, position in index.get(image_digest(value), ()):
+            if len(item) - start == len(value) and item.startswith(value, start):
+                return f"{IMAGE_REF_PREFIX}images[{position}]"
+        return None
+
+    return _replace_strings(raw, _ref)
+
+
+def image_digest(value: str, start: int = 0) -> Tuple[int, str, str, str]:
+    """Length plus three short samples of ``value[start:]``, without copying it.
+
+    Base64 images sharing a format header and trailer still differ in the middle.
+    """
+    length = len(value) - start
+    middle = start + length // 2
+    tail = value[max(start, len(value) - 32) :]
+    return length, value[start : start + 32], value[middle : middle + 32], tail
+
+
+def link_image_refs(raw: Any, files: List[Optional[str]]) -> Any:
+    """Point ``igt-image:images[i]`` references at ``files[i]`` (relative to the run folder)."""
+    refs = {
+        f"{IMAGE_REF_PREFIX}images[{position}]": f"{IMAGE_REF_PREFIX}{name}"
+        for position, name in enumerate(files)
+        if name
+    }
+    if not refs:
+        return raw
+    return _replace_strings(raw, refs.get)
+
+
+def _replace_strings(node: Any, replace: Any) -> Any:
+    if isinstance(node, str):
+        replacement = replace(node)
+        return node if replacement is None else replacement
+    if isinstance(node, dict):
+        for key, value in node.items():
+            node[key] = _replace_strings(value, replace)
+    elif isinstance(node, list):
+        for position, value in enumerate(node):
+            node[position] = _replace_strings(value, replace)
+    return node
@@ -0,0 +1,291 @@
+import asyncio
+import email.utils
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+RATE_LIMITS_ENV = "IGT_RATE_LIMITS"
+THROTTLE_MAX_RETRIES_ENV = "IGT_THROTTLE_MAX_RETRIES"
+DEFAULT_THROTTLE_PAUSE_SECONDS = 5.0
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+class TokenBucket:
+    """Classic token bucket refilled at ``rate_per_minute`` with a small burst."""
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be > 0")
+        if burst < 1:
+            raise ValueError("burst must be >= 1")
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated_at: Optional[float] = None
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate_per_second
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def _refill(self, now: float) -> None:
+        if self.updated_at is not None:
+            elapsed = max(0.0, now - self.updated_at)
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_second)
+        self.updated_at = now
+
+
+class RateLimiter:
+    """Shared per provider/model request pacing.
+
+    Limits are keyed ``provider`` or ``provider:model`` in requests per minute; the
+    model-specific key wins. A 429 or an exhausted rate-limit header pauses the
+    whole key, so every worker waits instead of each one retrying on its own.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Mapping[str, float]] = None,
+        max_throttle_retries: int = 5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.max_throttle_retries = max_throttle_retries
+        self._buckets: Dict[str, TokenBucket] = {
+            key: TokenBucket(rate) for key, rate in (limits or {}).items()
+        }
+        self._paused_until: Dict[str, float] = {}
+        self.stats = {"acquired": 0, "waited_seconds": 0.0, "throttled": 0, "pauses": 0}
+
+    def acquire(self, provider: str, model: str) -> float:
+        waited = 0.0
+        while True:
+            delay = self._try_take(provider, model)
+            if delay <= 0:
+                self._record_acquire(waited)
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    async def aacquire(self, provider: str, model: str) -> float:
+        waited = 0.0
+        while True:
+            delay = self._try_take(provider, model)
+            if delay <= 0:
+                self._record_acquire(waited)
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def pause(self, provider: str, model: str, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        key = self._key(provider, model)
+        with self._lock:
+            until = self._clock() + seconds
+            if until > self._paused_until.get(key, 0.0):
+                self._paused_until[key] = until
+                self.stats["pauses"] += 1
+
+    def record_throttle(self, provider: str, model: str, retry_after: Optional[float]) -> float:
+        """Pause the key after a 429 and return the pause length used."""
+        seconds = retry_after if retry_after and retry_after > 0 else DEFAULT_THROTTLE_PAUSE_SECONDS
+        with self._lock:
+            self.stats["throttled"] += 1
+        self.pause(provider, model, seconds)
+        return seconds
+
+    def observe(self, provider: str, model: str, headers: Any) -> None:
+        """Pause proactively when headers say the quota window is used up."""
+        remaining, reset_after = parse_quota_headers(headers)
+        if remaining is not None and remaining <= 0 and reset_after:
+            self.pause(provider, model, reset_after)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats)
+
+    def _try_take(self, provider: str, model: str) -> float:
+        key = self._key(provider, model)
+        with self._lock:
+            now = self._clock()
+            paused = self._paused_until.get(key, 0.0) - now
+            if paused > 0:
+                return paused
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return 0.0
+            wait = bucket.wait_time(now)
+            if wait > 0:
+                return wait
+            bucket.take(now)
+            return 0.0
+
+    def _record_acquire(self, waited: float) -> None:
+        with self._lock:
+            self.stats["acquired"] += 1
+            self.stats["waited_seconds"] += waited
+
+    def _key(self, provider: str, model: str) -> str:
+        model_key = f"{provider}:{model}"
+        if model_key in self._buckets:
+            return model_key
+        if provider in self._buckets:
+            return provider
+        return model_key
+
+
+def parse_rate_limits(raw: Optional[str]) -> Dict[str, float]:
+    """Parse ``alibaba=60,google:gemini-2.5-flash-image=10`` (requests per minute)."""
+    limits: Dict[str, float] = {}
+    for item in (raw or "").split(","):
+        text = item.strip()
+        if not text:
+            continue
+        key, sep, value = text.rpartition("=")
+        key = key.strip()
+        try:
+            rate = float(value)
+        except ValueError:
+            rate = 0.0
+        if not sep or not key or rate <= 0:
+            raise ValueError(
+                f"invalid rate limit entry: {text!r} (use provider=RPM or provider:model=RPM)"
+            )
+        provider, colon, model = key.partition(":")
+        provider = provider.strip().lower()
+        limits[f"{provider}:{model.strip()}" if colon else provider] = rate
+    return limits
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either delta-seconds or an HTTP date."""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        return max(0.0, float(text))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def parse_quota_headers(headers: Any) -> Tuple[Optional[int], Optional[float]]:
+    """Return ``(remaining, reset_after_seconds)`` from common x-ratelimit headers."""
+    if headers is None:
+        return None, None
+    remaining_raw = _first_header(
+        headers, ("x-ratelimit-remaining-requests", "x-ratelimit-remaining", "ratelimit-remaining")
+    )
+    reset_raw = _first_header(
+        headers, ("x-ratelimit-reset-requests", "x-ratelimit-reset", "ratelimit-reset")
+    )
+    remaining: Optional[int] = None
+    if remaining_raw is not None:
+        try:
+            remaining = int(float(remaining_raw))
+        except ValueError:
+            remaining = None
+    return remaining, _parse_reset(reset_raw)
+
+
+def retry_after_from_response(headers: Any, raw: Any) -> Optional[float]:
+    """Best server hint for how long to wait after a 429."""
+    if headers is not None:
+        retry_after = parse_retry_after(_first_header(headers, ("retry-after",)))
+        if retry_after is not None:
+            return retry_after
+        remaining, reset_after = parse_quota_headers(headers)
+        if reset_after is not None and (remaining is None or remaining <= 0):
+            return reset_after
+    # Google returns google.rpc.RetryInfo in the error body: {"retryDelay": "30s"}.
+    return _retry_delay_from_body(raw)
+
+
+def _retry_delay_from_body(raw: Any) -> Optional[float]:
+    if not isinstance(raw, dict):
+        return None
+    error = raw.get("error")
+    if not isinstance(error, dict):
+        return None
+    details = error.get("details")
+    if not isinstance(details, list):
+        return None
+    for item in details:
+        if isinstance(item, dict) and isinstance(item.get("retryDelay"), str):
+            return _parse_duration(item["retryDelay"])
+    return None
+
+
+def _first_header(headers: Any, names: Tuple[str, ...]) -> Optional[str]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return str(value)
+    return None
+
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    text = value.strip()
+    try:
+        number = float(text)
+    except ValueError:
+        return _parse_duration(text)
+    if number > 1_000_000_000:
+        # Epoch seconds.
+        return max(0.0, number - time.time())
+    return max(0.0, number)
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse ``30s``, ``1m30s`` or ``250ms`` style durations."""
+    text = value.strip().lower()
+    parts = _DURATION_PART.findall(text)
+    if not parts or "".join(number + unit for number, unit in parts) != text:
+        return None
+    scale = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+_DEFAULT_LIMITER: Optional[RateLimiter] = None
+_DEFAULT_LIMITER_LOCK = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter configured from ``IGT_RATE_LIMITS`` on first use."""
+    global _DEFAULT_LIMITER
+    with _DEFAULT_LIMITER_LOCK:
+        if _DEFAULT_LIMITER is None:
+            _DEFAULT_LIMITER = RateLimiter(
+                limits=parse_rate_limits(os.getenv(RATE_LIMITS_ENV, "")),
+                max_throttle_retries=int(os.getenv(THROTTLE_MAX_RETRIES_ENV, "5")),
+            )
+        return _DEFAULT_LIMITER
+
+
+def reset_rate_limiter() -> None:
+    """Drop the shared limiter so the next use re-reads the environment."""
+    global _DEFAULT_LIMITER
+    with _DEFAULT_LIMITER_LOCK:
+        _DEFAULT_LIMITER = None
+
+
+def observe_response_headers(provider: str, model: str, headers: Any) -> None:
+    get_rate_limiter().observe(provider, model, headers)
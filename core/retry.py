@@ -0,0 +1,216 @@
+import os
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from pydantic import ValidationError
+
+from adapters.errors import (
+    AuthError,
+    ClientRequestError,
+    InputError,
+    ThrottledError,
+    TransientError,
+)
+from core.circuit import CircuitBreaker, CircuitOpenError
+from core.ratelimit import RateLimiter
+
+ERROR_TRANSIENT = "transient"
+ERROR_THROTTLED = "throttled"
+ERROR_CLIENT = "client"
+ERROR_AUTH = "auth"
+ERROR_UNKNOWN = "unknown"
+NON_RETRYABLE_ERRORS = {ERROR_CLIENT, ERROR_AUTH}
+
+
+def classify_error(exc: BaseException) -> str:
+    if isinstance(exc, ThrottledError):
+        return ERROR_THROTTLED
+    if isinstance(exc, AuthError):
+        return ERROR_AUTH
+    if isinstance(exc, ClientRequestError):
+        return ERROR_CLIENT
+    if isinstance(exc, TransientError):
+        return ERROR_TRANSIENT
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout, TimeoutError, ConnectionError)):
+        return ERROR_TRANSIENT
+    if _is_httpx_transport_error(exc):
+        return ERROR_TRANSIENT
+    if isinstance(exc, (ValidationError, InputError)):
+        # Invalid requests, missing endpoints, unusable inputs: same result every attempt.
+        return ERROR_CLIENT
+    # Plain ValueError/KeyError may come from a truncated body; let those retry.
+    return ERROR_UNKNOWN
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter, a total deadline and fail-fast classes.
+
+    Attempt ``n`` (0-based retry index) waits ``base * multiplier**n`` capped at
+    ``max_delay``, then shortened by up to ``jitter`` (a fraction) so concurrent
+    workers do not retry in lockstep. Client and auth errors are never retried.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 1,
+        base_delay_seconds: float = 2.0,
+        multiplier: float = 2.0,
+        max_delay_seconds: float = 60.0,
+        jitter: float = 0.5,
+        deadline_seconds: Optional[float] = None,
+        rng: Callable[[], float] = random.random,
+    ):
+        if max_retries < 0:
+            raise ValueError("max_retries must be >= 0")
+        if not 0 <= jitter <= 1:
+            raise ValueError("jitter must be between 0 and 1")
+        self.max_retries = max_retries
+        self.base_delay_seconds = base_delay_seconds
+        self.multiplier = multiplier
+        self.max_delay_seconds = max_delay_seconds
+        self.jitter = jitter
+        self.deadline_seconds = deadline_seconds or None
+        self._rng = rng
+
+    @classmethod
+    def from_env(cls, max_retries: int, retry_delay_seconds: float) -> "RetryPolicy":
+        return cls(
+            max_retries=max_retries,
+            base_delay_seconds=retry_delay_seconds,
+            multiplier=float(os.getenv("RETRY_BACKOFF_MULTIPLIER", "2")),
+            max_delay_seconds=float(os.getenv("RETRY_MAX_DELAY_SECONDS", "60")),
+            jitter=float(os.getenv("RETRY_JITTER", "0.5")),
+            deadline_seconds=float(os.getenv("RETRY_DEADLINE_SECONDS", "0")),
+        )
+
+    def is_retryable(self, kind: str) -> bool:
+        return kind not in NON_RETRYABLE_ERRORS
+
+    def backoff(self, retry_index: int, retry_after: Optional[float] = None) -> float:
+        delay = self.base_delay_seconds * (self.multiplier**retry_index)
+        delay = min(self.max_delay_seconds, delay)
+        delay -= delay * self.jitter * self._rng()
+        if retry_after:
+            # Never retry sooner than the server asked.
+            delay = max(delay, retry_after)
+        return max(0.0, delay)
+
+
+class RetryState:
+    """Bookkeeping for one request's attempts, shared by the sync and async loops."""
+
+    def __init__(
+        self,
+        policy: RetryPolicy,
+        limiter: RateLimiter,
+        provider: str,
+        model: str,
+        timeline: Optional[List[Dict[str, Any]]] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.policy = policy
+        self.breaker = breaker
+        self.limiter = limiter
+        self.provider = provider
+        self.model = model
+        self.timeline = timeline if timeline is not None else []
+        self.retries = 0
+        self.throttled = 0
+        self._started = time.monotonic()
+        self._attempt_started = self._started
+        self._probing = False
+
+    def check_circuit(self) -> None:
+        """Raise CircuitOpenError instead of calling a provider that is tripped."""
+        if self.breaker is None:
+            return
+        allowed, self._probing = self.breaker.admit()
+        if not allowed:
+            raise CircuitOpenError(self.provider)
+
+    def release(self) -> None:
+        """Give back a half-open probe whose attempt was cancelled or interrupted."""
+        if self._probing and self.breaker is not None:
+            self.breaker.release_probe()
+        self._probing = False
+
+    def start_attempt(self) -> None:
+        self._attempt_started = time.monotonic()
+
+    def on_success(self) -> None:
+        self._probing = False
+        if self.breaker is not None:
+            self.breaker.record_success()
+        self._record("ok")
+
+    def on_failure(self, exc: BaseException) -> float:
+        """Return the delay before the next attempt, or raise when giving up."""
+        kind = classify_error(exc)
+        entry = self._record("error", exc=exc, kind=kind)
+        self._probing = False
+        if self.breaker is not None:
+            if kind == ERROR_TRANSIENT:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+        if kind == ERROR_THROTTLED:
+            self.throttled += 1
+            if self.throttled > self.limiter.max_throttle_retries:
+                raise RuntimeError(f"Request failed after retries: {exc}") from exc
+            retry_after = getattr(exc, "retry_after", None)
+            # The limiter pause covers the wait; acquire() sleeps before the next attempt.
+            entry["sleep_seconds"] = round(
+                self.limiter.record_throttle(self.provider, self.model, retry_after), 3
+            )
+            self._check_deadline(exc, entry["sleep_seconds"])
+            return 0.0
+
+        if not self.policy.is_retryable(kind):
+            raise RuntimeError(f"Request failed ({kind} error, not retried): {exc}") from exc
+        if self.retries >= self.policy.max_retries:
+            raise RuntimeError(f"Request failed after retries: {exc}") from exc
+
+        delay = self.policy.backoff(self.retries, getattr(exc, "retry_after", None))
+        self._check_deadline(exc, delay)
+        self.retries += 1
+        entry["sleep_seconds"] = round(delay, 3)
+        return delay
+
+    def _check_deadline(self, exc: BaseException, delay: float) -> None:
+        deadline = self.policy.deadline_seconds
+        if deadline is None:
+            return
+        if time.monotonic() - self._started + delay > deadline:
+            raise RuntimeError(
+                f"Request failed (retry deadline {deadline:g}s exceeded): {exc}"
+            ) from exc
+
+    def _record(
+        self, outcome: str, exc: Optional[BaseException] = None, kind: str = ""
+    ) -> Dict[str, Any]:
+        now = time.monotonic()
+        entry: Dict[str, Any] = {
+            "attempt": len(self.timeline) + 1,
+            "offset_ms": int((self._attempt_started - self._started) * 1000),
+            "duration_ms": int((now - self._attempt_started) * 1000),
+            "outcome": outcome,
+        }
+        if exc is not None:
+            entry["error_kind"] = kind
+            entry["error"] = str(exc)[:500]
+            status_code = getattr(exc, "status_code", None)
+            if status_code is not None:
+                entry["status_code"] = status_code
+        self.timeline.append(entry)
+        return entry
+
+
+def _is_httpx_transport_error(exc: BaseException) -> bool:
+    try:
+        import httpx
+    except ModuleNotFoundError:
+        return False
+    return isinstance(exc, httpx.TransportError)
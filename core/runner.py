@@ -1,16 +1,64 @@
+import asyncio
 import base64
+import csv
+import hashlib
+import json
+import logging
 import os
+import secrets
+import shutil
+import threading
 import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, List, Protocol, Tuple
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Tuple,
+)
 
 import requests
 
+from core.blobs import BlobStore
+from core.cache import ENTRY_FILENAME, get_response_cache
+from core.circuit import CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError
 from core.io_utils import ensure_dir, json_dump
-from core.models import GenerationRequest, GenerationResponse
+from core.jsonstream import spooled_image_path
+from core.models import (
+    IMAGE_REF_PREFIX,
+    GenerationRequest,
+    GenerationResponse,
+    keep_raw_response,
+    link_image_refs,
+    request_hash,
+)
+from core.ratelimit import RateLimiter, get_rate_limiter
+from core.retry import RetryPolicy, RetryState
 from core.services.generation import prepare_request_for_execution
 
 PERSIST_PREPROCESSED_INPUT_ENV = "IGT_PERSIST_PREPROCESSED_INPUT"
+BATCH_CONCURRENCY_ENV = "IGT_BATCH_CONCURRENCY"
+BATCH_EXECUTOR_ENV = "IGT_BATCH_EXECUTOR"
+BATCH_EXECUTORS = ("thread", "async")
+PROVIDER_CONCURRENCY_ENV = "IGT_PROVIDER_CONCURRENCY"
+COALESCE_ENV = "IGT_COALESCE"
+COALESCE_MODES = ("off", "seeded", "all")
+DOWNLOAD_CONCURRENCY_ENV = "IGT_DOWNLOAD_CONCURRENCY"
+DOWNLOAD_RESUME_ATTEMPTS = 3
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+LOGGER = logging.getLogger("image_gen_test_tool")
+
+_DOWNLOAD_POOL: Optional[ThreadPoolExecutor] = None
+_DOWNLOAD_POOL_LOCK = threading.Lock()
 
 
 class GenerationAdapter(Protocol):
@@ -39,18 +87,686 @@ def run_with_retry_with_artifacts(
     request: GenerationRequest,
     max_retries: int,
     retry_delay_seconds: int,
+    rate_limiter: Optional[RateLimiter] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    attempts: Optional[List[Dict[str, Any]]] = None,
+    breaker: Optional[CircuitBreaker] = None,
 ) -> Tuple[GenerationResponse, List[Path]]:
+    """Call the adapter until it succeeds or the retry policy gives up.
+
+    When ``attempts`` is given, one timeline entry per attempt is appended to it.
+    With a ``breaker``, an open circuit raises CircuitOpenError before any call.
+    """
+    limiter = rate_limiter or get_rate_limiter()
+    policy = retry_policy or RetryPolicy.from_env(max_retries, retry_delay_seconds)
     prepared_request, cleanup_paths = prepare_request_for_execution(request)
-    last_error = None
-    for attempt in range(max_retries + 1):
+    state = RetryState(
+        policy,
+        limiter,
+        prepared_request.provider,
+        prepared_request.model,
+        timeline=attempts,
+        breaker=breaker,
+    )
+    try:
+        while True:
+            state.check_circuit()
+            limiter.acquire(state.provider, state.model)
+            state.start_attempt()
+            try:
+                response = adapter.generate(prepared_request)
+            except Exception as exc:  # noqa: BLE001
+                time.sleep(state.on_failure(exc))
+                continue
+            state.on_success()
+            return response, cleanup_paths
+    except BaseException:
+        # Also KeyboardInterrupt / CancelledError: never leave the probe slot taken.
+        state.release()
+        cleanup_temp_files(cleanup_paths)
+        raise
+
+
+async def arun_with_retry_with_artifacts(
+    adapter: GenerationAdapter,
+    request: GenerationRequest,
+    max_retries: int,
+    retry_delay_seconds: int,
+    rate_limiter: Optional[RateLimiter] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    attempts: Optional[List[Dict[str, Any]]] = None,
+    breaker: Optional[CircuitBreaker] = None,
+) -> Tuple[GenerationResponse, List[Path]]:
+    limiter = rate_limiter or get_rate_limiter()
+    policy = retry_policy or RetryPolicy.from_env(max_retries, retry_delay_seconds)
+    prepared_request, cleanup_paths = await asyncio.to_thread(
+        prepare_request_for_execution, request
+    )
+    state = RetryState(
+        policy,
+        limiter,
+        prepared_request.provider,
+        prepared_request.model,
+        timeline=attempts,
+        breaker=breaker,
+    )
+    try:
+        while True:
+            state.check_circuit()
+            await limiter.aacquire(state.provider, state.model)
+            state.start_attempt()
+            try:
+                response = await agenerate(adapter, prepared_request)
+            except Exception as exc:  # noqa: BLE001
+                await asyncio.sleep(state.on_failure(exc))
+                continue
+            state.on_success()
+            return response, cleanup_paths
+    except BaseException:
+        # Also KeyboardInterrupt / CancelledError: never leave the probe slot taken.
+        state.release()
+        cleanup_temp_files(cleanup_paths)
+        raise
+
+
+async def agenerate(adapter: GenerationAdapter, request: GenerationRequest) -> GenerationResponse:
+    native = getattr(adapter, "agenerate", None)
+    if native is None:
+        return await asyncio.to_thread(adapter.generate, request)
+    return await native(request)
+
+
+class SingleFlight:
+    """Lets concurrent identical requests share one provider call.
+
+    The first caller for a request hash runs it; identical requests arriving
+    while it is in flight wait for its row and get their own run folder that
+    points at the first run's images. ``seeded`` mode only coalesces requests
+    with an explicit seed, since unseeded duplicates are usually meant to sample
+    different images.
+    """
+
+    def __init__(self, mode: str = "seeded"):
+        if mode not in COALESCE_MODES:
+            raise ValueError(f"unsupported coalesce mode: {mode}")
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._flights: Dict[str, Future] = {}
+        self.stats = {"calls": 0, "shared": 0}
+
+    @classmethod
+    def from_env(cls, value: Optional[str] = None) -> Optional["SingleFlight"]:
+        """``None`` when coalescing is off (``IGT_COALESCE``, default ``seeded``)."""
+        mode = (value or os.getenv(COALESCE_ENV, "seeded")).strip().lower()
+        if mode == "off":
+            return None
+        return cls(mode)
+
+    def key(self, request: GenerationRequest) -> Optional[str]:
+        if self.mode == "seeded" and request.seed is None:
+            return None
+        return request_hash(request)
+
+    def join(self, key: str) -> Tuple[Future, bool]:
+        """Return the flight for ``key`` and whether the caller leads (must run it)."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.stats["shared"] += 1
+                return flight, False
+            flight = Future()
+            self._flights[key] = flight
+            self.stats["calls"] += 1
+            return flight, True
+
+    def finish(self, key: str, row: Dict[str, str]) -> None:
+        with self._lock:
+            flight = self._flights.pop(key)
+        flight.set_result(row)
+
+
+def run_and_persist(
+    adapter: GenerationAdapter,
+    request: GenerationRequest,
+    output_root: Path,
+    max_retries: int,
+    retry_delay_seconds: int,
+    breaker: Optional[CircuitBreaker] = None,
+    flights: Optional[SingleFlight] = None,
+) -> Dict[str, str]:
+    key = flights.key(request) if flights is not None else None
+    if flights is None or key is None:
+        return _run_and_persist_once(
+            adapter, request, output_root, max_retries, retry_delay_seconds, breaker
+        )
+    flight, leader = flights.join(key)
+    if not leader:
+        return _shared_result(output_root, request, flight.result())
+    row = result_row(request, status="failed", error="coalesced request did not finish")
+    try:
+        row = _run_and_persist_once(
+            adapter, request, output_root, max_retries, retry_delay_seconds, breaker
+        )
+    finally:
+        flights.finish(key, row)
+    return row
+
+
+def _run_and_persist_once(
+    adapter: GenerationAdapter,
+    request: GenerationRequest,
+    output_root: Path,
+    max_retries: int,
+    retry_delay_seconds: int,
+    breaker: Optional[CircuitBreaker] = None,
+) -> Dict[str, str]:
+    cache_key, cached_dir = lookup_cached_run(request)
+    if cached_dir is not None:
         try:
-            return adapter.generate(prepared_request), cleanup_paths
+            run_dir = persist_cached_run(output_root, request, cached_dir)
         except Exception as exc:  # noqa: BLE001
-            last_error = exc
-            if attempt == max_retries:
-                break
-            time.sleep(retry_delay_seconds)
-    raise RuntimeError(f"Request failed after retries: {last_error}") from last_error
+            return result_row(request, status="failed", error=str(exc))
+        return result_row(request, status="ok", run_dir=str(run_dir))
+    attempts: List[Dict[str, Any]] = []
+    try:
+        response, preprocessed_inputs = run_with_retry_with_artifacts(
+            adapter=adapter,
+            request=request,
+            max_retries=max_retries,
+            retry_delay_seconds=retry_delay_seconds,
+            attempts=attempts,
+            breaker=breaker,
+        )
+        try:
+            run_dir = persist_run(
+                output_root,
+                request,
+                response,
+                preprocessed_inputs=preprocessed_inputs,
+                session=getattr(adapter, "session", None),
+                attempts=attempts,
+            )
+        finally:
+            cleanup_temp_files(preprocessed_inputs)
+        store_cached_run(cache_key, run_dir)
+    except CircuitOpenError as exc:
+        # Never called the provider; left for a later run instead of counted as failed.
+        return result_row(request, status="parked", error=str(exc))
+    except Exception as exc:  # noqa: BLE001
+        return result_row(request, status="failed", error=str(exc))
+    return result_row(request, status="ok", run_dir=str(run_dir))
+
+
+def result_row(
+    request: GenerationRequest, status: str, run_dir: str = "", error: str = ""
+) -> Dict[str, str]:
+    return {
+        "provider": request.provider,
+        "model": request.model,
+        "prompt": request.prompt,
+        "status": status,
+        "run_dir": run_dir,
+        "error": error,
+    }
+
+
+def _shared_result(
+    output_root: Path, request: GenerationRequest, leader_row: Dict[str, str]
+) -> Dict[str, str]:
+    if leader_row["status"] != "ok":
+        return result_row(request, status=leader_row["status"], error=leader_row["error"])
+    try:
+        run_dir = persist_shared_run(output_root, request, Path(leader_row["run_dir"]))
+    except Exception as exc:  # noqa: BLE001
+        return result_row(request, status="failed", error=str(exc))
+    return result_row(request, status="ok", run_dir=str(run_dir))
+
+
+def iter_run_results(
+    adapters: Mapping[str, GenerationAdapter],
+    jobs: Iterable[GenerationRequest],
+    output_root: Path,
+    max_retries: int,
+    retry_delay_seconds: int,
+    concurrency: int = 1,
+    provider_limits: Optional[Mapping[str, int]] = None,
+    breakers: Optional[CircuitBreakerRegistry] = None,
+    on_complete: Optional[Callable[[int, Dict[str, str]], None]] = None,
+    ordered: bool = True,
+    flights: Optional[SingleFlight] = None,
+) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Run jobs on a bounded worker pool and yield ``(index, row)`` in input order.
+
+    ``provider_limits`` caps in-flight requests per provider on top of the global
+    ``concurrency``. Jobs are pulled lazily from ``jobs`` so only a small window is
+    held in memory; a job whose provider is at its cap waits in that window while
+    jobs for other providers are dispatched. ``on_complete`` fires as each job
+    finishes, before rows are put back in order. With ``ordered=False`` rows are
+    yielded as they finish, so one slow job never holds back the rest. ``flights``
+    lets identical in-flight requests share one provider call.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be >= 1")
+    limits = dict(provider_limits or {})
+    for provider, limit in limits.items():
+        if limit < 1:
+            raise ValueError(f"provider concurrency for {provider} must be >= 1")
+
+    window = max(concurrency * 4, 8)
+    source = iter(enumerate(jobs))
+    exhausted = False
+    backlog: Deque[Tuple[int, GenerationRequest]] = deque()
+    in_flight: Dict[Future, Tuple[int, str]] = {}
+    provider_counts: Dict[str, int] = {}
+    ready: Dict[int, Dict[str, str]] = {}
+    next_index = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="igt-batch") as pool:
+        while True:
+            while not exhausted and len(backlog) + len(in_flight) + len(ready) < window:
+                try:
+                    backlog.append(next(source))
+                except StopIteration:
+                    exhausted = True
+
+            deferred: Deque[Tuple[int, GenerationRequest]] = deque()
+            while backlog and len(in_flight) < concurrency:
+                index, request = backlog.popleft()
+                provider = request.provider
+                limit = limits.get(provider)
+                if limit is not None and provider_counts.get(provider, 0) >= limit:
+                    deferred.append((index, request))
+                    continue
+                provider_counts[provider] = provider_counts.get(provider, 0) + 1
+                future = pool.submit(
+                    _run_job,
+                    adapters,
+                    request,
+                    output_root,
+                    max_retries,
+                    retry_delay_seconds,
+                    breakers,
+                    flights,
+                )
+                in_flight[future] = (index, provider)
+            deferred.extend(backlog)
+            backlog = deferred
+
+            if not in_flight:
+                if exhausted and not backlog:
+                    break
+                continue
+
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                index, provider = in_flight.pop(future)
+                provider_counts[provider] -= 1
+                row = future.result()
+                if on_complete is not None:
+                    on_complete(index, row)
+                if ordered:
+                    ready[index] = row
+                else:
+                    yield index, row
+            while next_index in ready:
+                yield next_index, ready.pop(next_index)
+                next_index += 1
+
+
+def run_requests_concurrently(
+    adapters: Mapping[str, GenerationAdapter],
+    jobs: Iterable[GenerationRequest],
+    output_root: Path,
+    max_retries: int,
+    retry_delay_seconds: int,
+    concurrency: int = 1,
+    provider_limits: Optional[Mapping[str, int]] = None,
+    breakers: Optional[CircuitBreakerRegistry] = None,
+    on_result: Optional[Callable[[int, Dict[str, str]], None]] = None,
+    on_complete: Optional[Callable[[int, Dict[str, str]], None]] = None,
+    collect_rows: bool = True,
+    ordered: bool = True,
+    flights: Optional[SingleFlight] = None,
+) -> List[Dict[str, str]]:
+    """Drive ``iter_run_results`` to the end; pass ``collect_rows=False`` to stream.
+
+    Without collected rows only ``on_result``/``on_complete`` see results, so
+    memory stays flat however many jobs ``jobs`` yields.
+    """
+    rows: List[Dict[str, str]] = []
+    for index, row in iter_run_results(
+        adapters=adapters,
+        jobs=jobs,
+        output_root=output_root,
+        max_retries=max_retries,
+        retry_delay_seconds=retry_delay_seconds,
+        concurrency=concurrency,
+        provider_limits=provider_limits,
+        breakers=breakers,
+        on_complete=on_complete,
+        ordered=ordered,
+        flights=flights,
+    ):
+        if collect_rows:
+            rows.append(row)
+        if on_result is not None:
+            on_result(index, row)
+    return rows
+
+
+async def arun_and_persist(
+    adapter: GenerationAdapter,
+    request: GenerationRequest,
+    output_root: Path,
+    max_retries: int,
+    retry_delay_seconds: int,
+    breaker: Optional[CircuitBreaker] = None,
+    flights: Optional[SingleFlight] = None,
+) -> Dict[str, str]:
+    key = flights.key(request) if flights is not None else None
+    if flights is None or key is None:
+        return await _arun_and_persist_once(
+            adapter, request, output_root, max_retries, retry_delay_seconds, breaker
+        )
+    flight, leader = flights.join(key)
+    if not leader:
+        leader_row = await asyncio.wrap_future(flight)
+        return await asyncio.to_thread(_shared_result, output_root, request, leader_row)
+    row = result_row(request, status="failed", error="coalesced request did not finish")
+    try:
+        row = await _arun_and_persist_once(
+            adapter, request, output_root, max_retries, retry_delay_seconds, breaker
+        )
+    finally:
+        flights.finish(key, row)
+    return row
+
+
+async def _arun_and_persist_once(
+    adapter: GenerationAdapter,
+    request: GenerationRequest,
+    output_root: Path,
+    max_retries: int,
+    retry_delay_seconds: int,
+    breaker: Optional[CircuitBreaker] = None,
+) -> Dict[str, str]:
+    cache_key, cached_dir = await asyncio.to_thread(lookup_cached_run, request)
+    if cached_dir is not None:
+        try:
+            run_dir = await asyncio.to_thread(persist_cached_run, output_root, request, cached_dir)
+        except Exception as exc:  # noqa: BLE001
+            return result_row(request, status="failed", error=str(exc))
+        return result_row(request, status="ok", run_dir=str(run_dir))
+    attempts: List[Dict[str, Any]] = []
+    try:
+        response, preprocessed_inputs = await arun_with_retry_with_artifacts(
+            adapter=adapter,
+            request=request,
+            max_retries=max_retries,
+            retry_delay_seconds=retry_delay_seconds,
+            attempts=attempts,
+            breaker=breaker,
+        )
+        try:
+            run_dir = await apersist_run(
+                output_root,
+                request,
+                response,
+                preprocessed_inputs=preprocessed_inputs,
+                session=getattr(adapter, "session", None),
+                attempts=attempts,
+            )
+        finally:
+            cleanup_temp_files(preprocessed_inputs)
+        await asyncio.to_thread(store_cached_run, cache_key, run_dir)
+    except CircuitOpenError as exc:
+        # Never called the provider; left for a later run instead of counted as failed.
+        return result_row(request, status="parked", error=str(exc))
+    except Exception as exc:  # noqa: BLE001
+        return result_row(request, status="failed", error=str(exc))
+    return result_row(request, status="ok", run_dir=str(run_dir))
+
+
+async def arun_requests_concurrently(
+    adapters: Mapping[str, GenerationAdapter],
+    jobs: Iterable[GenerationRequest],
+    output_root: Path,
+    max_retries: int,
+    retry_delay_seconds: int,
+    concurrency: int = 1,
+    provider_limits: Optional[Mapping[str, int]] = None,
+    breakers: Optional[CircuitBreakerRegistry] = None,
+    on_result: Optional[Callable[[int, Dict[str, str]], None]] = None,
+    on_complete: Optional[Callable[[int, Dict[str, str]], None]] = None,
+    collect_rows: bool = True,
+    ordered: bool = True,
+    flights: Optional[SingleFlight] = None,
+) -> List[Dict[str, str]]:
+    """Event-loop counterpart of ``run_requests_concurrently``.
+
+    Each job is a coroutine rather than a worker thread, so waiting on the network
+    (including Alibaba task polling) costs no thread. Rows come back in input
+    order unless ``ordered=False``.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be >= 1")
+    limits = dict(provider_limits or {})
+    for provider, limit in limits.items():
+        if limit < 1:
+            raise ValueError(f"provider concurrency for {provider} must be >= 1")
+
+    global_slots = asyncio.Semaphore(concurrency)
+    provider_slots = {provider: asyncio.Semaphore(limit) for provider, limit in limits.items()}
+    window = max(concurrency * 4, 8)
+    pending: set = set()
+    ready: Dict[int, Dict[str, str]] = {}
+    rows: List[Dict[str, str]] = []
+    next_index = 0
+
+    async def _run_one(index: int, request: GenerationRequest) -> Tuple[int, Dict[str, str]]:
+        adapter = adapters.get(request.provider)
+        if adapter is None:
+            return index, result_row(
+                request, status="failed", error=f"no adapter for provider: {request.provider}"
+            )
+        provider_slot = provider_slots.get(request.provider)
+        # Take the provider slot first so a capped provider never holds a global slot idle.
+        async with provider_slot or _NULL_ASYNC_SLOT:
+            async with global_slots:
+                row = await arun_and_persist(
+                    adapter,
+                    request,
+                    output_root,
+                    max_retries,
+                    retry_delay_seconds,
+                    breaker=breakers.get(request.provider) if breakers is not None else None,
+                    flights=flights,
+                )
+        return index, row
+
+    def _flush(done: Iterable[Any]) -> None:
+        nonlocal next_index
+        for task in done:
+            index, row = task.result()
+            if on_complete is not None:
+                on_complete(index, row)
+            if ordered:
+                ready[index] = row
+                continue
+            if collect_rows:
+                rows.append(row)
+            if on_result is not None:
+                on_result(index, row)
+        while next_index in ready:
+            row = ready.pop(next_index)
+            if collect_rows:
+                rows.append(row)
+            if on_result is not None:
+                on_result(next_index, row)
+            next_index += 1
+
+    for index, request in enumerate(jobs):
+        while len(pending) + len(ready) >= window:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            _flush(done)
+        pending.add(asyncio.create_task(_run_one(index, request)))
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        _flush(done)
+    return rows
+
+
+def run_requests_on_event_loop(
+    adapters: Mapping[str, GenerationAdapter],
+    jobs: Iterable[GenerationRequest],
+    output_root: Path,
+    max_retries: int,
+    retry_delay_seconds: int,
+    concurrency: int = 1,
+    provider_limits: Optional[Mapping[str, int]] = None,
+    breakers: Optional[CircuitBreakerRegistry] = None,
+    on_result: Optional[Callable[[int, Dict[str, str]], None]] = None,
+    on_complete: Optional[Callable[[int, Dict[str, str]], None]] = None,
+    collect_rows: bool = True,
+    ordered: bool = True,
+    flights: Optional[SingleFlight] = None,
+) -> List[Dict[str, str]]:
+    """Run ``arun_requests_concurrently`` on a fresh event loop from synchronous code."""
+
+    async def _main() -> List[Dict[str, str]]:
+        try:
+            return await arun_requests_concurrently(
+                adapters=adapters,
+                jobs=jobs,
+                output_root=output_root,
+                max_retries=max_retries,
+                retry_delay_seconds=retry_delay_seconds,
+                concurrency=concurrency,
+                provider_limits=provider_limits,
+                breakers=breakers,
+                on_result=on_result,
+                on_complete=on_complete,
+                collect_rows=collect_rows,
+                ordered=ordered,
+                flights=flights,
+            )
+        finally:
+            for adapter in adapters.values():
+                aclose = getattr(adapter, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+
+    return asyncio.run(_main())
+
+
+def run_batch_requests(
+    adapters: Mapping[str, GenerationAdapter],
+    jobs: Iterable[GenerationRequest],
+    output_root: Path,
+    max_retries: int,
+    retry_delay_seconds: int,
+    concurrency: int = 1,
+    provider_limits: Optional[Mapping[str, int]] = None,
+    breakers: Optional[CircuitBreakerRegistry] = None,
+    on_result: Optional[Callable[[int, Dict[str, str]], None]] = None,
+    on_complete: Optional[Callable[[int, Dict[str, str]], None]] = None,
+    collect_rows: bool = True,
+    ordered: bool = True,
+    flights: Optional[SingleFlight] = None,
+    executor: str = "thread",
+) -> List[Dict[str, str]]:
+    if executor not in BATCH_EXECUTORS:
+        raise ValueError(f"unsupported executor: {executor}")
+    run = run_requests_on_event_loop if executor == "async" else run_requests_concurrently
+    return run(
+        adapters=adapters,
+        jobs=jobs,
+        output_root=output_root,
+        max_retries=max_retries,
+        retry_delay_seconds=retry_delay_seconds,
+        concurrency=concurrency,
+        provider_limits=provider_limits,
+        breakers=breakers,
+        on_result=on_result,
+        on_complete=on_complete,
+        collect_rows=collect_rows,
+        ordered=ordered,
+        flights=flights,
+    )
+
+
+class _NullAsyncSlot:
+    async def __aenter__(self) -> None:
+        return None
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NULL_ASYNC_SLOT = _NullAsyncSlot()
+
+
+def _run_job(
+    adapters: Mapping[str, GenerationAdapter],
+    request: GenerationRequest,
+    output_root: Path,
+    max_retries: int,
+    retry_delay_seconds: int,
+    breakers: Optional[CircuitBreakerRegistry] = None,
+    flights: Optional[SingleFlight] = None,
+) -> Dict[str, str]:
+    adapter = adapters.get(request.provider)
+    if adapter is None:
+        return result_row(
+            request, status="failed", error=f"no adapter for provider: {request.provider}"
+        )
+    breaker = breakers.get(request.provider) if breakers is not None else None
+    return run_and_persist(
+        adapter,
+        request,
+        output_root,
+        max_retries,
+        retry_delay_seconds,
+        breaker=breaker,
+        flights=flights,
+    )
+
+
+def resolve_batch_concurrency(value: Optional[int] = None) -> int:
+    if value is None:
+        value = int(os.getenv(BATCH_CONCURRENCY_ENV, "1"))
+    if value < 1:
+        raise ValueError("concurrency must be >= 1")
+    return value
+
+
+def resolve_batch_executor(value: Optional[str] = None) -> str:
+    if value is None:
+        value = os.getenv(BATCH_EXECUTOR_ENV, "thread")
+    value = value.strip().lower() or "thread"
+    if value not in BATCH_EXECUTORS:
+        raise ValueError(f"unsupported executor: {value} (use thread or async)")
+    return value
+
+
+def parse_provider_limits(raw: Optional[str]) -> Dict[str, int]:
+    """Parse ``alibaba=2,google=4`` into ``{"alibaba": 2, "google": 4}``."""
+    limits: Dict[str, int] = {}
+    if raw is None:
+        raw = os.getenv(PROVIDER_CONCURRENCY_ENV, "")
+    for item in raw.split(","):
+        text = item.strip()
+        if not text:
+            continue
+        if "=" not in text:
+            raise ValueError(f"invalid provider concurrency entry: {text!r} (use provider=N)")
+        provider, limit_text = text.split("=", 1)
+        provider = provider.strip().lower()
+        limit_text = limit_text.strip()
+        if not provider or not limit_text.isdigit() or int(limit_text) < 1:
+            raise ValueError(f"invalid provider concurrency entry: {text!r} (use provider=N)")
+        limits[provider] = int(limit_text)
+    return limits
 
 
 def persist_run(
@@ -58,17 +774,31 @@ def persist_run(
     request: GenerationRequest,
     response: GenerationResponse,
     preprocessed_inputs: List[Path] | None = None,
+    session: Optional[requests.Session] = None,
+    attempts: Optional[List[Dict[str, Any]]] = None,
 ) -> Path:
     timestamp = time.strftime("%Y%m%d-%H%M%S")
     run_dir = ensure_dir(
         output_root / f"{timestamp}_{request.provider}_{request.task_type}_{response.request_id}"
     )
     json_dump(run_dir / "request.json", request.to_dict())
-    json_dump(run_dir / "response.json", response.to_dict())
-    saved = save_images(run_dir, response.images)
-    json_dump(run_dir / "saved_images.json", {"saved_files": saved})
+    if attempts:
+        json_dump(run_dir / "attempts.json", {"attempts": attempts})
+    blobs = BlobStore.from_env(output_root)
+    blob_refs: Dict[str, str] = {}
+    downloads: List[Dict[str, Any]] = []
+    saved = save_images(
+        run_dir,
+        response.images,
+        session=session,
+        blobs=blobs,
+        blob_refs=blob_refs,
+        downloads=downloads,
+    )
+    json_dump(run_dir / "saved_images.json", _saved_manifest(saved, blob_refs, downloads))
+    json_dump(run_dir / "response.json", _response_payload(run_dir, response, saved))
     if preprocessed_inputs and should_persist_preprocessed_inputs():
-        saved_preprocessed = save_preprocessed_inputs(run_dir, preprocessed_inputs)
+        saved_preprocessed = save_preprocessed_inputs(run_dir, preprocessed_inputs, blobs=blobs)
         if saved_preprocessed:
             json_dump(
                 run_dir / "preprocessed_inputs.json",
@@ -77,51 +807,367 @@ def persist_run(
     return run_dir
 
 
-def save_images(run_dir: Path, images: List[str]) -> List[str]:
+async def apersist_run(
+    output_root: Path,
+    request: GenerationRequest,
+    response: GenerationResponse,
+    preprocessed_inputs: List[Path] | None = None,
+    session: Optional[requests.Session] = None,
+    attempts: Optional[List[Dict[str, Any]]] = None,
+) -> Path:
+    # File writes and image downloads block; run them on the default executor.
+    return await asyncio.to_thread(
+        persist_run,
+        output_root,
+        request,
+        response,
+        preprocessed_inputs,
+        session,
+        attempts,
+    )
+
+
+def persist_shared_run(
+    output_root: Path, request: GenerationRequest, source_run_dir: Path
+) -> Path:
+    """Record a coalesced request as its own run that reuses ``source_run_dir``'s images.
+
+    The images are hardlinked (or blob-linked, or copied) into the new run's own
+    ``images/`` folder, so its refs resolve and it outlives the leader's run.
+    """
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    source_name = source_run_dir.name.split("_", 1)[-1]
+    run_dir = ensure_dir(output_root / f"{timestamp}_{source_name}_shared-{secrets.token_hex(3)}")
+    json_dump(run_dir / "request.json", request.to_dict())
+    shutil.copyfile(source_run_dir / "response.json", run_dir / "response.json")
+    source_saved = json.loads((source_run_dir / "saved_images.json").read_text(encoding="utf-8"))
+    source_refs: Dict[str, str] = source_saved.get("blobs", {})
+    blobs = BlobStore.from_env(output_root)
+    images_dir = ensure_dir(run_dir / "images")
+    blob_refs: Dict[str, str] = {}
     saved_files: List[str] = []
+    for source in map(Path, source_saved.get("saved_files", [])):
+        target = images_dir / source.name
+        digest = source_refs.get(source.name)
+        if blobs is not None and digest is not None and blobs.path(digest).exists():
+            blobs.link(digest, target)
+            blob_refs[source.name] = digest
+        else:
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copyfile(source, target)
+        saved_files.append(str(target))
+    json_dump(
+        run_dir / "saved_images.json",
+        {**_saved_manifest(saved_files, blob_refs), "shared_from": str(source_run_dir)},
+    )
+    return run_dir
+
+
+def lookup_cached_run(request: GenerationRequest) -> Tuple[Optional[str], Optional[Path]]:
+    """Return the request's cache key and, on a hit, the cached entry folder."""
+    cache = get_response_cache()
+    if cache is None:
+        return None, None
+    try:
+        key = cache.key(request)
+        if key is None or not cache.readable:
+            return key, None
+        return key, cache.lookup(key)
+    except Exception as exc:  # noqa: BLE001
+        # An unreadable input or cache folder only costs the hit; the run goes ahead.
+        LOGGER.warning("cache lookup failed for %s: %s", request.provider, exc)
+        return None, None
+
+
+def store_cached_run(key: Optional[str], run_dir: Path) -> None:
+    cache = get_response_cache()
+    if cache is None or key is None or not cache.writable:
+        return
+    try:
+        cache.store(key, run_dir)
+    except Exception as exc:  # noqa: BLE001
+        # A full or read-only cache never fails the run itself.
+        LOGGER.warning("cache store failed for %s: %s", run_dir, exc)
+
+
+def persist_cached_run(output_root: Path, request: GenerationRequest, entry_dir: Path) -> Path:
+    """Record a cache hit as a new run folder with copies of the cached images."""
+    response = json.loads((entry_dir / "response.json").read_text(encoding="utf-8"))
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    run_dir = ensure_dir(
+        output_root
+        / (
+            f"{timestamp}_{request.provider}_{request.task_type}_{response.get('request_id')}"
+            f"_cached-{secrets.token_hex(3)}"
+        )
+    )
+    json_dump(run_dir / "request.json", request.to_dict())
+    shutil.copyfile(entry_dir / "response.json", run_dir / "response.json")
+    images_dir = ensure_dir(run_dir / "images")
+    blobs = BlobStore.from_env(output_root)
+    blob_refs: Dict[str, str] = {}
+    saved_files: List[str] = []
+    entry = json.loads((entry_dir / ENTRY_FILENAME).read_text(encoding="utf-8"))
+    for name in entry.get("images", []):
+        target = images_dir / name
+        if blobs is None:
+            shutil.copyfile(entry_dir / "images" / name, target)
+        else:
+            blob_refs[name] = blobs.write_file(target, entry_dir / "images" / name)
+        saved_files.append(str(target))
+    json_dump(
+        run_dir / "saved_images.json",
+        {**_saved_manifest(saved_files, blob_refs), "cached_from": entry_dir.name},
+    )
+    return run_dir
+
+
+def save_images(
+    run_dir: Path,
+    images: List[str],
+    session: Optional[requests.Session] = None,
+    blobs: Optional[BlobStore] = None,
+    blob_refs: Optional[Dict[str, str]] = None,
+    downloads: Optional[List[Dict[str, Any]]] = None,
+) -> List[str]:
+    """Write the response images into ``run_dir/images``.
+
+    URL images are downloaded in parallel on the shared download pool. With a
+    ``blobs`` store the files are hardlinks into it, and ``blob_refs`` (when
+    given) receives each file name's content hash. ``downloads`` receives one
+    size/throughput entry per finished download.
+    """
+    # Reuse the adapter's keep-alive pool when given; provider CDNs are usually the same host.
+    http = session if session is not None else requests
+    refs = blob_refs if blob_refs is not None else {}
+    transfers = downloads if downloads is not None else []
+    slots: List[List[str]] = [[] for _ in images]
+    pending: List[Tuple[int, str, Path, Future]] = []
     images_dir = ensure_dir(run_dir / "images")
     for index, item in enumerate(images, start=1):
         filename = f"image_{index:02d}"
+        slot = slots[index - 1]
         if item.startswith("http://") or item.startswith("https://"):
             target = images_dir / f"{filename}.bin"
+            future = _download_pool().submit(download_to_file, http, item, target, blobs)
+            pending.append((index, item, target, future))
+            continue
+
+        spooled = spooled_image_path(item)
+        if spooled is not None:
+            # Decoded to a temp file while the response streamed in; move it into place.
+            target = images_dir / f"{filename}{spooled.suffix or '.png'}"
             try:
-                resp = requests.get(item, timeout=60)
-                resp.raise_for_status()
-                with open(target, "wb") as f:
-                    f.write(resp.content)
-                saved_files.append(str(target))
-                alias = _write_bin_alias_file(target, resp.content)
-                if alias:
-                    saved_files.append(str(alias))
+                _adopt_image_file(target, spooled, blobs, refs)
+                slot.append(str(target))
             except Exception:  # noqa: BLE001
-                txt_target = images_dir / f"{filename}.url.txt"
+                txt_target = images_dir / f"{filename}.txt"
                 txt_target.write_text(item, encoding="utf-8")
-                saved_files.append(str(txt_target))
+                slot.append(str(txt_target))
             continue
 
         if item.startswith("data:image/"):
             header, b64 = item.split(",", 1)
             ext = _ext_from_data_uri_header(header)
             target = images_dir / f"{filename}.{ext}"
-            _write_base64_image(target, b64)
-            saved_files.append(str(target))
+            _write_base64_image(target, b64, blobs, refs)
+            slot.append(str(target))
             continue
 
         # Try raw base64 as a fallback.
         try:
             target = images_dir / f"{filename}.png"
-            _write_base64_image(target, item)
-            saved_files.append(str(target))
+            _write_base64_image(target, item, blobs, refs)
+            slot.append(str(target))
         except Exception:  # noqa: BLE001
             txt_target = images_dir / f"{filename}.txt"
             txt_target.write_text(item, encoding="utf-8")
-            saved_files.append(str(txt_target))
-    return saved_files
+            slot.append(str(txt_target))
 
+    for index, item, target, future in pending:
+        slot = slots[index - 1]
+        try:
+            stats = future.result()
+            digest = stats.pop("sha256", None)
+            if digest:
+                refs[target.name] = digest
+            transfers.append(stats)
+            slot.append(str(target))
+            alias = _write_bin_alias_file(target, blobs, refs)
+            if alias:
+                slot.append(str(alias))
+        except Exception:  # noqa: BLE001
+            txt_target = images_dir / f"image_{index:02d}.url.txt"
+            txt_target.write_text(item, encoding="utf-8")
+            slot.append(str(txt_target))
+    return [path for slot in slots for path in slot]
 
-def _write_base64_image(path: Path, b64_payload: str) -> None:
-    with open(path, "wb") as f:
-        f.write(base64.b64decode(b64_payload))
+
+def download_to_file(
+    http: Any, url: str, target: Path, blobs: Optional[BlobStore] = None
+) -> Dict[str, Any]:
+    """Stream ``url`` into ``target`` through a ``.part`` file renamed on success.
+
+    A dropped connection or short body is resumed with a Range request (up to
+    ``DOWNLOAD_RESUME_ATTEMPTS`` times); a server that ignores Range restarts the
+    file. The size is checked against Content-Length / Content-Range.
+    """
+    part = target.with_name(f"{target.name}.part")
+    hasher = hashlib.sha256() if blobs is not None else None
+    written = 0
+    expected: Optional[int] = None
+    resumes = 0
+    started = time.monotonic()
+    try:
+        with open(part, "wb") as f:
+            while True:
+                headers = {"Range": f"bytes={written}-"} if written else None
+                try:
+                    resp = http.get(url, timeout=60, stream=True, headers=headers)
+                    try:
+                        resp.raise_for_status()
+                        if written and resp.status_code != 206:
+                            # Range was ignored; the body starts from byte 0 again.
+                            f.seek(0)
+                            f.truncate()
+                            written = 0
+                            hasher = hashlib.sha256() if blobs is not None else None
+                        expected = _expected_length(resp, written)
+                        for chunk in resp.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                            f.write(chunk)
+                            written += len(chunk)
+                            if hasher is not None:
+                                hasher.update(chunk)
+                    finally:
+                        resp.close()
+                except (
+                    requests.ConnectionError,
+                    requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError,
+                ):
+                    if resumes >= DOWNLOAD_RESUME_ATTEMPTS:
+                        raise
+                    resumes += 1
+                    continue
+                if expected is not None and written < expected:
+                    if resumes >= DOWNLOAD_RESUME_ATTEMPTS:
+                        raise OSError(f"download truncated: {written} of {expected} bytes")
+                    resumes += 1
+                    continue
+                break
+        if expected is not None and written != expected:
+            raise OSError(f"download size mismatch: {written} of {expected} bytes")
+        if hasher is not None and blobs is not None:
+            digest = blobs.adopt(target, part, hasher.hexdigest())
+        else:
+            digest = None
+            os.replace(part, target)
+    except BaseException:
+        part.unlink(missing_ok=True)
+        raise
+    elapsed = max(time.monotonic() - started, 1e-6)
+    stats: Dict[str, Any] = {
+        "file": target.name,
+        "bytes": written,
+        "elapsed_ms": int(elapsed * 1000),
+        "bytes_per_second": int(written / elapsed),
+        "resumed": resumes,
+    }
+    if digest:
+        stats["sha256"] = digest
+    return stats
+
+
+def _expected_length(resp: Any, offset: int) -> Optional[int]:
+    headers = getattr(resp, "headers", None) or {}
+    if resp.status_code == 206:
+        total = str(headers.get("Content-Range", "")).rsplit("/", 1)[-1]
+        return int(total) if total.isdigit() else None
+    if str(headers.get("Content-Encoding", "identity")).lower() not in ("", "identity"):
+        # iter_content decodes gzip/deflate, so the header no longer matches the bytes written.
+        return None
+    length = str(headers.get("Content-Length", ""))
+    return offset + int(length) if length.isdigit() else None
+
+
+def _download_pool() -> ThreadPoolExecutor:
+    """Process-wide pool that bounds image downloads across all jobs."""
+    global _DOWNLOAD_POOL
+    with _DOWNLOAD_POOL_LOCK:
+        if _DOWNLOAD_POOL is None:
+            workers = max(1, int(os.getenv(DOWNLOAD_CONCURRENCY_ENV, "8")))
+            _DOWNLOAD_POOL = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="igt-download"
+            )
+        return _DOWNLOAD_POOL
+
+
+def _response_payload(
+    run_dir: Path, response: GenerationResponse, saved_files: List[str]
+) -> Dict[str, Any]:
+    """``response.json`` contents with inline image data replaced by saved file paths."""
+    payload = response.to_dict()
+    if keep_raw_response():
+        return payload
+    files: List[Optional[str]] = [None] * len(response.images)
+    for saved in saved_files:
+        path = Path(saved)
+        stem = path.name.split(".", 1)[0]
+        position = int(stem.split("_", 1)[1]) - 1 if stem.startswith("image_") else -1
+        if 0 <= position < len(files) and files[position] is None:
+            files[position] = path.relative_to(run_dir).as_posix()
+    payload["raw_response"] = link_image_refs(payload["raw_response"], files)
+    payload["images"] = [
+        item
+        if item.startswith("http://") or item.startswith("https://") or not files[position]
+        else f"{IMAGE_REF_PREFIX}{files[position]}"
+        for position, item in enumerate(payload["images"])
+    ]
+    return payload
+
+
+def _saved_manifest(
+    saved_files: List[str],
+    blob_refs: Dict[str, str],
+    downloads: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    manifest: Dict[str, Any] = {"saved_files": saved_files}
+    if blob_refs:
+        manifest["blobs"] = blob_refs
+    if downloads:
+        manifest["downloads"] = downloads
+    return manifest
+
+
+def _write_image_bytes(
+    path: Path, content: bytes, blobs: Optional[BlobStore], refs: Dict[str, str]
+) -> None:
+    if blobs is None:
+        with open(path, "wb") as f:
+            f.write(content)
+        return
+    refs[path.name] = blobs.write(path, content)
+
+
+def _adopt_image_file(
+    target: Path, source: Path, blobs: Optional[BlobStore], refs: Dict[str, str]
+) -> None:
+    if blobs is None:
+        shutil.move(source, target)
+        return
+    refs[target.name] = blobs.write_file(target, source)
+    source.unlink(missing_ok=True)
+
+
+def _write_base64_image(
+    path: Path,
+    b64_payload: str,
+    blobs: Optional[BlobStore] = None,
+    refs: Optional[Dict[str, str]] = None,
+) -> None:
+    _write_image_bytes(path, base64.b64decode(b64_payload), blobs, refs if refs is not None else {})
 
 
 def _ext_from_data_uri_header(header: str) -> str:
@@ -133,13 +1179,22 @@ def _ext_from_data_uri_header(header: str) -> str:
     return subtype or "png"
 
 
-def _write_bin_alias_file(bin_path: Path, content: bytes) -> Path | None:
+def _write_bin_alias_file(
+    bin_path: Path,
+    blobs: Optional[BlobStore] = None,
+    refs: Optional[Dict[str, str]] = None,
+) -> Path | None:
     ext = _resolve_bin_alias_ext()
     if not ext:
         return None
     alias_path = bin_path.with_suffix(f".{ext}")
-    with open(alias_path, "wb") as f:
-        f.write(content)
+    digest = (refs or {}).get(bin_path.name)
+    if blobs is not None and digest:
+        # One more link to the same bytes, not a second copy.
+        blobs.link(digest, alias_path)
+        refs[alias_path.name] = digest
+    else:
+        shutil.copyfile(bin_path, alias_path)
     return alias_path
 
 
@@ -159,7 +1214,9 @@ def should_persist_preprocessed_inputs() -> bool:
     return raw in {"1", "true", "yes", "on"}
 
 
-def save_preprocessed_inputs(run_dir: Path, preprocessed_inputs: List[Path]) -> List[str]:
+def save_preprocessed_inputs(
+    run_dir: Path, preprocessed_inputs: List[Path], blobs: Optional[BlobStore] = None
+) -> List[str]:
     saved_files: List[str] = []
     target_dir = ensure_dir(run_dir / "preprocessed_inputs")
     for index, source in enumerate(preprocessed_inputs, start=1):
@@ -167,7 +1224,10 @@ def save_preprocessed_inputs(run_dir: Path, preprocessed_inputs: List[Path]) ->
             continue
         suffix = source.suffix.lower() or ".png"
         target = target_dir / f"input_{index:02d}{suffix}"
-        target.write_bytes(source.read_bytes())
+        if blobs is None:
+            target.write_bytes(source.read_bytes())
+        else:
+            blobs.write_file(target, source)
         saved_files.append(str(target))
     return saved_files
 
@@ -180,24 +1240,65 @@ def cleanup_temp_files(paths: List[Path]) -> None:
             continue
 
 
-def summarize_results(results: List[Dict[str, str]], output_path: Path) -> None:
-    lines = ["provider,model,prompt,status,run_dir,error"]
-    for row in results:
-        line = ",".join(
-            [
-                _escape_csv(row.get("provider", "")),
-                _escape_csv(row.get("model", "")),
-                _escape_csv(row.get("prompt", "")),
-                _escape_csv(row.get("status", "")),
-                _escape_csv(row.get("run_dir", "")),
-                _escape_csv(row.get("error", "")),
-            ]
-        )
-        lines.append(line)
-    output_path.write_text("\n".join(lines), encoding="utf-8")
+SUMMARY_FIELDS = ("provider", "model", "prompt", "status", "run_dir", "error")
 
 
-def _escape_csv(value: str) -> str:
-    if "," in value or '"' in value or "\n" in value:
-        return '"' + value.replace('"', '""') + '"'
-    return value
+class SummaryWriter:
+    """Write result rows to CSV as they arrive.
+
+    The file is flushed every ``flush_every`` rows or ``flush_seconds``, so a
+    killed batch still leaves a usable summary and nothing is held in memory.
+    """
+
+    def __init__(
+        self,
+        output_path: Path,
+        fields: Iterable[str] = SUMMARY_FIELDS,
+        flush_every: int = 100,
+        flush_seconds: float = 2.0,
+    ):
+        self.output_path = output_path
+        self.fields = tuple(fields)
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.rows_written = 0
+        self._file = open(output_path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file, lineterminator="\n")
+        self._writer.writerow(self.fields)
+        self._unflushed = 0
+        self._flushed_at = time.monotonic()
+
+    def write(self, row: Mapping[str, Any]) -> None:
+        self._writer.writerow([_csv_value(row.get(field, "")) for field in self.fields])
+        self.rows_written += 1
+        self._unflushed += 1
+        if (
+            self._unflushed >= self.flush_every
+            or time.monotonic() - self._flushed_at >= self.flush_seconds
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        self._file.flush()
+        self._unflushed = 0
+        self._flushed_at = time.monotonic()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self) -> "SummaryWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def summarize_results(results: Iterable[Mapping[str, Any]], output_path: Path) -> None:
+    with SummaryWriter(output_path) as writer:
+        for row in results:
+            writer.write(row)
+
+
+def _csv_value(value: Any) -> str:
+    return "" if value is None else str(value)
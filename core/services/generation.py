@@ -7,10 +7,10 @@ import tempfile
 from pathlib import Path
 from typing import Dict, List, Optional
 
-import requests
 from PIL import Image, UnidentifiedImageError
 
 from adapters import AlibabaAdapter, GLMAdapter, GoogleAdapter
+from core.assets import get_input_assets
 from core.io_utils import infer_image_size
 from core.models import TASK_IMAGE2IMAGE, GenerationRequest
 
@@ -34,6 +34,7 @@ ALIBABA_AUTOCROP_ENV = "IGT_ALIBABA_IMAGE2IMAGE_AUTOCROP"
 
 def build_adapters_from_env() -> Dict[str, object]:
     timeout = int(os.getenv("HTTP_TIMEOUT_SECONDS", "120"))
+    pool_size = int(os.getenv("HTTP_POOL_SIZE", "10"))
     alibaba_region = os.getenv("ALIBABA_REGION", "intl").strip().lower()
     alibaba_host = ALIBABA_HOSTS.get(alibaba_region, ALIBABA_HOSTS["intl"])
     alibaba_sync_url = os.getenv("ALIBABA_TEXT2IMAGE_URL", "").strip() or (
@@ -65,18 +66,21 @@ def build_adapters_from_env() -> Dict[str, object]:
             async_url=alibaba_async_url,
             poll_interval_seconds=int(os.getenv("ALIBABA_POLL_INTERVAL_SECONDS", "10")),
             poll_timeout_seconds=int(os.getenv("ALIBABA_POLL_TIMEOUT_SECONDS", "300")),
+            pool_size=pool_size,
         ),
         "google": GoogleAdapter(
             api_key=os.getenv("GOOGLE_API_KEY", ""),
             text2image_url=google_text2image_url,
             image2image_url=google_image2image_url,
             timeout_seconds=timeout,
+            pool_size=pool_size,
         ),
         "glm": GLMAdapter(
             api_key=os.getenv("GLM_API_KEY", ""),
             text2image_url=glm_text2image_url,
             image2image_url=glm_image2image_url,
             timeout_seconds=timeout,
+            pool_size=pool_size,
         ),
     }
 
@@ -236,13 +240,11 @@ def _load_image_bytes(value: str) -> Optional[bytes]:
 
     if value.startswith("http://") or value.startswith("https://"):
         timeout = int(os.getenv("HTTP_TIMEOUT_SECONDS", "120"))
-        response = requests.get(value, timeout=timeout)
-        response.raise_for_status()
-        return response.content
+        return get_input_assets().remote(value, timeout=timeout).data
 
     path = Path(value)
     if path.exists() and path.is_file():
-        return path.read_bytes()
+        return get_input_assets().local(path).data
 
     return _safe_b64decode(value)
 
@@ -11,8 +11,9 @@ def list_history_entries(
     if not output_root.exists():
         return []
 
+    # Skip bookkeeping folders (e.g. tasks/) that are not run folders.
     run_dirs = sorted(
-        [p for p in output_root.iterdir() if p.is_dir()],
+        [p for p in output_root.iterdir() if p.is_dir() and (p / "request.json").exists()],
         key=lambda item: item.name,
         reverse=True,
     )
@@ -59,6 +60,7 @@ def load_history_run_details(run_dir: Path) -> Dict[str, Any]:
     response_path = run_dir / "response.json"
     saved_images_path = run_dir / "saved_images.json"
     preprocessed_inputs_path = run_dir / "preprocessed_inputs.json"
+    attempts_path = run_dir / "attempts.json"
     if not request_path.exists() or not response_path.exists():
         raise ValueError(f"history: invalid run folder (missing request/response): {run_dir}")
     request_payload = json.loads(request_path.read_text(encoding="utf-8"))
@@ -69,6 +71,9 @@ def load_history_run_details(run_dir: Path) -> Dict[str, Any]:
     preprocessed_payload: Dict[str, Any] = {}
     if preprocessed_inputs_path.exists():
         preprocessed_payload = json.loads(preprocessed_inputs_path.read_text(encoding="utf-8"))
+    attempts_payload: Dict[str, Any] = {}
+    if attempts_path.exists():
+        attempts_payload = json.loads(attempts_path.read_text(encoding="utf-8"))
     return {
         "run_id": run_dir.name,
         "run_dir": str(run_dir),
@@ -76,6 +81,7 @@ def load_history_run_details(run_dir: Path) -> Dict[str, Any]:
         "response": response_payload,
         "saved_images": saved_payload,
         "preprocessed_inputs": preprocessed_payload,
+        "attempts": attempts_payload,
     }
 
 
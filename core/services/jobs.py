@@ -0,0 +1,280 @@
+import heapq
+import itertools
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from core.circuit import CircuitBreakerRegistry
+from core.models import GenerationRequest
+from core.runner import SingleFlight, result_row, run_and_persist
+from core.services.history import load_history_run_details
+
+SERVE_WORKERS_ENV = "IGT_SERVE_WORKERS"
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_OK = "ok"
+JOB_FAILED = "failed"
+JOB_PARKED = "parked"
+JOB_CANCELLED = "cancelled"
+
+
+class JobNotFoundError(KeyError):
+    """No job with that id (or it was dropped from the finished-job window)."""
+
+
+class Job:
+    def __init__(self, job_id: str, request: GenerationRequest, priority: int):
+        self.id = job_id
+        self.request = request
+        self.priority = priority
+        self.status = JOB_QUEUED
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.run_dir = ""
+        self.error = ""
+        self.row: Dict[str, str] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "provider": self.request.provider,
+            "model": self.request.model,
+            "prompt": self.request.prompt,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "run_dir": self.run_dir,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """In-process priority queue of generation jobs drained by a worker pool.
+
+    Adapters (and their HTTP sessions) are built once and shared by every job.
+    Higher ``priority`` runs first; equal priorities run in submission order.
+    Results are persisted with ``run_and_persist`` like any other run; only the
+    most recent ``max_finished`` finished jobs are kept in memory.
+    ``provider_limits`` caps running jobs per provider; a capped job stays queued
+    while workers take jobs for other providers.
+    """
+
+    def __init__(
+        self,
+        adapters: Mapping[str, Any],
+        output_root: Path,
+        workers: int = 4,
+        max_retries: int = 1,
+        retry_delay_seconds: int = 2,
+        breakers: Optional[CircuitBreakerRegistry] = None,
+        max_finished: int = 1000,
+        flights: Optional[SingleFlight] = None,
+        provider_limits: Optional[Mapping[str, int]] = None,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        limits = dict(provider_limits or {})
+        for provider, limit in limits.items():
+            if limit < 1:
+                raise ValueError(f"provider concurrency for {provider} must be >= 1")
+        self.adapters = adapters
+        self.output_root = output_root
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_delay_seconds = retry_delay_seconds
+        self.breakers = breakers
+        self.max_finished = max_finished
+        self.flights = flights
+        self.provider_limits = limits
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[int, int, Job]] = []
+        self._seq = itertools.count()
+        self._jobs: Dict[str, Job] = {}
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._threads: List[threading.Thread] = []
+        self._running: Dict[str, int] = {}
+        self._stopping = False
+
+    def start(self) -> None:
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+            for number in range(self.workers):
+                thread = threading.Thread(
+                    target=self._work, name=f"igt-job-worker-{number}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop taking queued jobs; running jobs are allowed to finish."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+    def submit(self, request: GenerationRequest, priority: int = 0) -> Job:
+        if request.provider not in self.adapters:
+            raise ValueError(f"no adapter for provider: {request.provider}")
+        job = Job(secrets.token_hex(8), request, priority)
+        with self._cond:
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (-priority, next(self._seq), job))
+            self._cond.notify()
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self._cond:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundError(job_id)
+        return job
+
+    def list(self, status: Optional[str] = None) -> List[Job]:
+        with self._cond:
+            jobs = list(self._jobs.values())
+        return [job for job in jobs if status is None or job.status == status]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job; returns ``False`` once it has started."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise JobNotFoundError(job_id)
+            if job.status != JOB_QUEUED:
+                return False
+            # Left in the heap; workers skip it when it comes up.
+            self._finish(job, JOB_CANCELLED)
+            return True
+
+    def wait(self, job: Job, timeout: Optional[float] = None) -> bool:
+        """Block until ``job`` has finished; ``False`` if ``timeout`` ran out first."""
+        with self._cond:
+            return self._cond.wait_for(lambda: job.finished_at is not None, timeout)
+
+    def result(self, job_id: str) -> Dict[str, Any]:
+        """Saved run details of a finished job (request, response, images, attempts)."""
+        job = self.get(job_id)
+        if job.status != JOB_OK:
+            raise ValueError(f"job {job_id} has no result (status: {job.status})")
+        return load_history_run_details(Path(job.run_dir))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {"workers": self.workers, "jobs": counts}
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                job = None
+                while not self._stopping:
+                    job = self._next_job()
+                    if job is not None:
+                        break
+                    self._cond.wait()
+                if job is None:
+                    return
+                provider = job.request.provider
+                self._running[provider] = self._running.get(provider, 0) + 1
+                job.status = JOB_RUNNING
+                job.started_at = time.time()
+            row = result_row(job.request, status=JOB_FAILED, error="job did not finish")
+            try:
+                row = run_and_persist(
+                    self.adapters[job.request.provider],
+                    job.request,
+                    self.output_root,
+                    self.max_retries,
+                    self.retry_delay_seconds,
+                    breaker=(
+                        self.breakers.get(job.request.provider)
+                        if self.breakers is not None
+                        else None
+                    ),
+                    flights=self.flights,
+                )
+            except Exception as exc:  # noqa: BLE001
+                # Keep the worker alive; the job fails on its own.
+                row = result_row(job.request, status=JOB_FAILED, error=str(exc))
+            finally:
+                with self._cond:
+                    self._running[provider] -= 1
+                    job.row = row
+                    job.run_dir = row["run_dir"]
+                    job.error = row["error"]
+                    self._finish(job, row["status"])
+
+    def _next_job(self) -> Optional[Job]:
+        """Pop the best queued job whose provider is under its limit."""
+        capped: List[Tuple[int, int, Job]] = []
+        found = None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            job = entry[2]
+            if job.status != JOB_QUEUED:
+                continue
+            limit = self.provider_limits.get(job.request.provider)
+            if limit is not None and self._running.get(job.request.provider, 0) >= limit:
+                capped.append(entry)
+                continue
+            found = job
+            break
+        for entry in capped:
+            heapq.heappush(self._heap, entry)
+        return found
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        # Wakes waiters and any worker idling on a provider that now has room.
+        self._cond.notify_all()
+        self._finished[job.id] = None
+        while len(self._finished) > self.max_finished:
+            old_id, _ = self._finished.popitem(last=False)
+            self._jobs.pop(old_id, None)
+
+
+def run_jobs(
+    queue: JobQueue,
+    requests: Iterable[GenerationRequest],
+    on_result: Optional[Callable[[int, Dict[str, str]], None]] = None,
+    collect_rows: bool = True,
+) -> List[Dict[str, str]]:
+    """Submit ``requests`` to a started ``queue`` and wait for their rows.
+
+    Requests are pulled lazily so at most a small window is queued at once;
+    ``on_result`` gets ``(index, row)`` in input order, like ``run_batch_requests``.
+    """
+    window = max(queue.workers * 4, 8)
+    pending: Deque[Tuple[int, Job]] = deque()
+    rows: List[Dict[str, str]] = []
+
+    def _collect() -> None:
+        index, job = pending.popleft()
+        queue.wait(job)
+        row = job.row or result_row(job.request, status=job.status, error=job.error)
+        if on_result is not None:
+            on_result(index, row)
+        if collect_rows:
+            rows.append(row)
+
+    for index, request in enumerate(requests):
+        pending.append((index, queue.submit(request)))
+        if len(pending) >= window:
+            _collect()
+    while pending:
+        _collect()
+    return rows
@@ -0,0 +1,442 @@
+import json
+import os
+import secrets
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from core.circuit import CircuitBreakerRegistry
+from core.io_utils import append_jsonl, ensure_dir, json_dump, read_jsonl
+from core.journal import new_batch_id
+from core.models import GenerationRequest, request_hash
+from core.runner import SingleFlight, run_batch_requests
+
+SHARDS_DIRNAME = "shards"
+TABLE_FILENAME = "table.json"
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_LEASE_SECONDS = 120.0
+# Jobs that end in one of these are never run again; parked jobs stay pending.
+TERMINAL_STATUSES = {"ok", "failed"}
+
+
+def new_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{secrets.token_hex(2)}"
+
+
+class ShardTable:
+    """A batch materialized as chunked job files under ``{output_root}/shards/{id}/``.
+
+    ``jobs/NNNNNN.jsonl`` holds the requests of one chunk, ``results/`` gets one
+    fsynced line per finished job, ``leases/`` the claim on each chunk and
+    ``done/`` a marker once every job of a chunk has a terminal result. Everything
+    is plain files, so workers on several machines can share one output root.
+    """
+
+    def __init__(self, output_root: Path, table_id: str):
+        self.output_root = output_root
+        self.table_id = table_id
+        self.dir = output_root / SHARDS_DIRNAME / table_id
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def create(
+        cls,
+        output_root: Path,
+        jobs: Iterable[GenerationRequest],
+        settings: Optional[Dict[str, Any]] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> "ShardTable":
+        if chunk_size < 1:
+            raise ValueError("chunk size must be >= 1")
+        table = cls(output_root, new_batch_id())
+        for name in ("jobs", "results", "leases", "done"):
+            ensure_dir(table.dir / name)
+        count = 0
+        chunk_file = None
+        try:
+            for index, request in enumerate(jobs):
+                if index % chunk_size == 0:
+                    if chunk_file is not None:
+                        chunk_file.close()
+                    chunk_file = table._chunk_path(index // chunk_size).open("w", encoding="utf-8")
+                record = {"index": index, "request": request.to_dict()}
+                chunk_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count = index + 1
+        finally:
+            if chunk_file is not None:
+                chunk_file.close()
+        if count == 0:
+            raise ValueError("shard table has no jobs")
+        # Written last: a table without table.json is an interrupted create.
+        json_dump(
+            table.dir / TABLE_FILENAME,
+            {
+                "table_id": table.table_id,
+                "created_at": time.time(),
+                "jobs": count,
+                "chunk_size": chunk_size,
+                "chunks": (count + chunk_size - 1) // chunk_size,
+                **(settings or {}),
+            },
+        )
+        return table
+
+    @classmethod
+    def open(cls, output_root: Path, table_id: str) -> "ShardTable":
+        table = cls(output_root, table_id)
+        if not (table.dir / TABLE_FILENAME).exists():
+            raise ValueError(f"shard table not found: {table_id} (looked in {table.dir})")
+        return table
+
+    def info(self) -> Dict[str, Any]:
+        return json.loads((self.dir / TABLE_FILENAME).read_text(encoding="utf-8"))
+
+    def chunk_ids(self) -> List[int]:
+        return list(range(int(self.info()["chunks"])))
+
+    def load_chunk(self, chunk: int) -> List[Tuple[int, GenerationRequest]]:
+        return [
+            (record["index"], GenerationRequest(**record["request"]))
+            for record in read_jsonl(self._chunk_path(chunk))
+        ]
+
+    def results(self, chunk: int) -> Dict[int, Dict[str, Any]]:
+        """Latest result per job index in ``chunk``."""
+        return {record["index"]: record for record in read_jsonl(self._results_path(chunk))}
+
+    def record_result(
+        self, chunk: int, index: int, request: GenerationRequest, row: Dict[str, str]
+    ) -> None:
+        record = {"index": index, "hash": request_hash(request), "at": time.time(), **row}
+        with self._write_lock:
+            append_jsonl(self._results_path(chunk), record)
+
+    def is_done(self, chunk: int) -> bool:
+        return self._done_path(chunk).exists()
+
+    def mark_done(self, chunk: int) -> None:
+        self._done_path(chunk).touch()
+
+    def lease(self, chunk: int, owner: str, ttl_seconds: float) -> "Lease":
+        return Lease(self.dir / "leases" / f"{chunk:06d}.lease", owner, ttl_seconds)
+
+    def status(self) -> Dict[str, Any]:
+        chunks = {"done": 0, "leased": 0, "pending": 0}
+        jobs: Dict[str, int] = {}
+        now = time.time()
+        for chunk in self.chunk_ids():
+            if self.is_done(chunk):
+                chunks["done"] += 1
+            elif Lease.holder(self.dir / "leases" / f"{chunk:06d}.lease", now) is not None:
+                chunks["leased"] += 1
+            else:
+                chunks["pending"] += 1
+            for record in self.results(chunk).values():
+                jobs[record["status"]] = jobs.get(record["status"], 0) + 1
+        info = self.info()
+        jobs["not_run"] = info["jobs"] - sum(jobs.values())
+        return {
+            "table_id": self.table_id,
+            "jobs_total": info["jobs"],
+            "chunks": chunks,
+            "jobs": jobs,
+        }
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        """Result rows in job order, one chunk in memory at a time."""
+        for chunk in self.chunk_ids():
+            yield from (record for _, record in sorted(self.results(chunk).items()))
+
+    def _chunk_path(self, chunk: int) -> Path:
+        return self.dir / "jobs" / f"{chunk:06d}.jsonl"
+
+    def _results_path(self, chunk: int) -> Path:
+        return self.dir / "results" / f"{chunk:06d}.jsonl"
+
+    def _done_path(self, chunk: int) -> Path:
+        return self.dir / "done" / f"{chunk:06d}"
+
+
+class Lease:
+    """Expiring claim on one chunk, held as an ``O_EXCL`` file.
+
+    The file stores the owner and an ``expires_at`` wall-clock time that the
+    holder pushes forward with ``renew``. Anyone may take over an expired lease;
+    the takeover goes through an atomic rename so only one node wins. ``renew``
+    rewrites the file in place, so a live lease never disappears. Nodes are
+    assumed to have roughly synchronized clocks (well within the lease TTL).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        owner: str,
+        ttl_seconds: float = DEFAULT_LEASE_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.owner = owner
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._expires_at = 0.0
+
+    @staticmethod
+    def holder(
+        path: Path, now: Optional[float] = None, ttl_seconds: float = DEFAULT_LEASE_SECONDS
+    ) -> Optional[str]:
+        """Owner of a live lease at ``path``, or ``None`` if free or expired."""
+        record = _read_lease(path, ttl_seconds)
+        if record is None:
+            return None
+        if record["expires_at"] <= (time.time() if now is None else now):
+            return None
+        return record.get("owner")
+
+    def acquire(self) -> bool:
+        for _ in range(2):
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self._reclaim_expired():
+                    return False
+                continue
+            record = self._record()
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(json.dumps(record))
+                f.flush()
+                os.fsync(f.fileno())
+            self._expires_at = record["expires_at"]
+            return True
+        return False
+
+    def renew(self) -> bool:
+        """Push the expiry forward; ``False`` means the lease was lost to another node.
+
+        Past its own ``expires_at`` the lease may already be taken over, so it is
+        not renewed. Otherwise nobody else can take it, so after checking that
+        the file is still ours it is replaced atomically with a later expiry.
+        """
+        if self._clock() >= self._expires_at:
+            return False
+        record = _read_lease(self.path, self.ttl_seconds)
+        if record is None or record["owner"] != self.owner:
+            return False
+        fresh = self._record()
+        tmp = self.path.with_name(f"{self.path.name}.{self.owner}.tmp")
+        try:
+            tmp.write_text(json.dumps(fresh), encoding="utf-8")
+            os.replace(tmp, self.path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        self._expires_at = fresh["expires_at"]
+        return True
+
+    def release(self) -> None:
+        record = _read_lease(self.path, self.ttl_seconds)
+        if record is not None and record.get("owner") == self.owner:
+            self.path.unlink(missing_ok=True)
+
+    def _record(self) -> Dict[str, Any]:
+        return {"owner": self.owner, "expires_at": self._clock() + self.ttl_seconds}
+
+    def _reclaim_expired(self) -> bool:
+        record = _read_lease(self.path, self.ttl_seconds)
+        if record is not None and record["expires_at"] > self._clock():
+            return False
+        stale = self.path.with_name(f"{self.path.name}.{self.owner}.stale")
+        try:
+            os.rename(self.path, stale)
+        except FileNotFoundError:
+            return True
+        moved = _read_lease(stale, self.ttl_seconds)
+        if moved is not None and moved["expires_at"] > self._clock():
+            # Another node re-took the lease between our read and the rename; put it back.
+            _link_back(stale, self.path)
+            stale.unlink(missing_ok=True)
+            return False
+        stale.unlink(missing_ok=True)
+        return True
+
+
+def _link_back(source: Path, path: Path) -> bool:
+    """Hardlink ``source`` at ``path`` unless a lease was created there meanwhile."""
+    try:
+        os.link(source, path)
+    except FileExistsError:
+        return False
+    return True
+
+
+def _read_lease(path: Path, ttl_seconds: float) -> Optional[Dict[str, Any]]:
+    try:
+        text = path.read_text(encoding="utf-8")
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    try:
+        record = json.loads(text)
+        return {"owner": str(record["owner"]), "expires_at": float(record["expires_at"])}
+    except (ValueError, KeyError, TypeError):
+        # Created but not written yet (or torn): treat as live for one TTL from creation.
+        return {"owner": "", "expires_at": mtime + ttl_seconds}
+
+
+class _Heartbeat:
+    def __init__(self, lease: Lease):
+        self.lease = lease
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="igt-lease-heartbeat", daemon=True)
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.lease.ttl_seconds / 3):
+            try:
+                renewed = self.lease.renew()
+            except OSError:
+                renewed = False
+            if not renewed:
+                self.lost.set()
+                return
+
+
+def run_shard_worker(
+    table: ShardTable,
+    adapters: Mapping[str, Any],
+    max_retries: int,
+    retry_delay_seconds: int,
+    concurrency: int = 1,
+    provider_limits: Optional[Mapping[str, int]] = None,
+    breakers: Optional[CircuitBreakerRegistry] = None,
+    flights: Optional[SingleFlight] = None,
+    executor: str = "thread",
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    worker_id: Optional[str] = None,
+    wait: bool = True,
+    on_result: Optional[Callable[[int, Dict[str, str]], None]] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Dict[str, int]:
+    """Claim chunks one at a time and run their unfinished jobs until none are left.
+
+    With ``wait`` the worker keeps checking chunks leased by other nodes, so a
+    crashed node's chunks are picked up once its lease expires. Returns job
+    counts by status for this worker.
+    """
+    owner = worker_id or new_worker_id()
+    counts: Dict[str, int] = {}
+    while True:
+        remaining = 0
+        progressed = False
+        for chunk in table.chunk_ids():
+            if table.is_done(chunk):
+                continue
+            remaining += 1
+            lease = table.lease(chunk, owner, lease_seconds)
+            if not lease.acquire():
+                continue
+            try:
+                with _Heartbeat(lease) as heartbeat:
+                    ran = _run_chunk(
+                        table,
+                        chunk,
+                        heartbeat,
+                        adapters,
+                        max_retries,
+                        retry_delay_seconds,
+                        concurrency,
+                        provider_limits,
+                        breakers,
+                        flights,
+                        executor,
+                        counts,
+                        on_result,
+                    )
+                progressed = progressed or ran
+                if not heartbeat.lost.is_set() and _chunk_finished(table, chunk):
+                    table.mark_done(chunk)
+                    remaining -= 1
+            finally:
+                lease.release()
+        if remaining == 0 or not wait:
+            return counts
+        if not progressed:
+            sleep(max(1.0, lease_seconds / 4))
+
+
+def _run_chunk(
+    table: ShardTable,
+    chunk: int,
+    heartbeat: _Heartbeat,
+    adapters: Mapping[str, Any],
+    max_retries: int,
+    retry_delay_seconds: int,
+    concurrency: int,
+    provider_limits: Optional[Mapping[str, int]],
+    breakers: Optional[CircuitBreakerRegistry],
+    flights: Optional[SingleFlight],
+    executor: str,
+    counts: Dict[str, int],
+    on_result: Optional[Callable[[int, Dict[str, str]], None]],
+) -> bool:
+    finished = {
+        index
+        for index, record in table.results(chunk).items()
+        if record.get("status") in TERMINAL_STATUSES
+    }
+    todo = [(index, request) for index, request in table.load_chunk(chunk) if index not in finished]
+    started: List[Tuple[int, GenerationRequest]] = []
+    terminal = 0
+
+    def _jobs() -> Iterator[GenerationRequest]:
+        for index, request in todo:
+            if heartbeat.lost.is_set():
+                # Another node owns the chunk now; let it run the rest.
+                return
+            started.append((index, request))
+            yield request
+
+    def _record(position: int, row: Dict[str, str]) -> None:
+        nonlocal terminal
+        index, request = started[position]
+        table.record_result(chunk, index, request, row)
+        if row["status"] in TERMINAL_STATUSES:
+            terminal += 1
+
+    def _report(position: int, row: Dict[str, str]) -> None:
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+        if on_result is not None:
+            on_result(started[position][0], row)
+
+    run_batch_requests(
+        adapters=adapters,
+        jobs=_jobs(),
+        output_root=table.output_root,
+        max_retries=max_retries,
+        retry_delay_seconds=retry_delay_seconds,
+        concurrency=concurrency,
+        provider_limits=provider_limits,
+        breakers=breakers,
+        on_result=_report,
+        on_complete=_record,
+        collect_rows=False,
+        flights=flights,
+        executor=executor,
+    )
+    return terminal > 0
+
+
+def _chunk_finished(table: ShardTable, chunk: int) -> bool:
+    results = table.results(chunk)
+    return all(
+        results.get(index, {}).get("status") in TERMINAL_STATUSES
+        for index, _ in table.load_chunk(chunk)
+    )
@@ -0,0 +1,250 @@
+import contextlib
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from adapters.errors import TaskFailedError
+from core.io_utils import append_jsonl, ensure_dir, read_jsonl
+from core.models import GenerationRequest
+from core.ratelimit import RateLimiter, get_rate_limiter
+from core.retry import NON_RETRYABLE_ERRORS, classify_error
+from core.runner import cleanup_temp_files, persist_run
+from core.services.generation import prepare_request_for_execution
+
+TASKS_DIRNAME = "tasks"
+LEDGER_FILENAME = "ledger.jsonl"
+COLLECT_LOCK_FILENAME = "collect.lock"
+STALE_LOCK_SECONDS = 3600
+
+TASK_SUBMITTED = "submitted"
+TASK_COLLECTED = "collected"
+TASK_FAILED = "failed"
+TASK_PENDING = "pending"
+
+
+class TaskLedgerBusyError(RuntimeError):
+    """Another ``igt collect`` holds the ledger lock."""
+
+
+class TaskLedger:
+    """Append-only record of submitted async tasks under ``{output_root}/tasks/``.
+
+    Each line is an event (``submitted``, ``collected`` or ``failed``); the current
+    state of a task is its latest event. Appends are fsynced, so a killed process
+    never loses a task id it already printed.
+    """
+
+    def __init__(self, output_root: Path):
+        self.dir = output_root / TASKS_DIRNAME
+        self.path = self.dir / LEDGER_FILENAME
+        self.lock_path = self.dir / COLLECT_LOCK_FILENAME
+        self._write_lock = threading.Lock()
+        self._lock_token: Optional[str] = None
+
+    def record_submitted(self, request: GenerationRequest, task: Dict[str, Any]) -> None:
+        self._append(
+            {
+                "event": TASK_SUBMITTED,
+                "task_id": task["task_id"],
+                "task_url": task["task_url"],
+                "submitted_at": time.time(),
+                "request": request.to_dict(),
+                "create_task": task.get("create_task"),
+            }
+        )
+
+    def record_result(self, task_id: str, status: str, run_dir: str = "", error: str = "") -> None:
+        self._append(
+            {
+                "event": status,
+                "task_id": task_id,
+                "at": time.time(),
+                "run_dir": run_dir,
+                "error": error,
+            }
+        )
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Return ``task_id -> submitted record`` with the latest status folded in."""
+        tasks: Dict[str, Dict[str, Any]] = {}
+        for record in read_jsonl(self.path):
+            task_id = record.get("task_id")
+            if not isinstance(task_id, str):
+                continue
+            if record.get("event") == TASK_SUBMITTED:
+                tasks[task_id] = dict(record, status=TASK_PENDING, run_dir="", error="")
+            elif task_id in tasks:
+                tasks[task_id].update(
+                    status=record.get("event", ""),
+                    run_dir=record.get("run_dir", ""),
+                    error=record.get("error", ""),
+                )
+        return tasks
+
+    def pending(self) -> List[Dict[str, Any]]:
+        return [task for task in self.load().values() if task["status"] == TASK_PENDING]
+
+    @contextlib.contextmanager
+    def collect_lock(self) -> Iterator[None]:
+        """Hold ``collect.lock`` for one collect pass; raises ``TaskLedgerBusyError``.
+
+        The holder refreshes the lock's mtime via ``touch_lock`` as it makes
+        progress, so only a lock untouched for ``STALE_LOCK_SECONDS`` counts as
+        left behind by a killed collect. Taking over such a lock goes through an
+        atomic rename, so two collects cannot both win it.
+        """
+        ensure_dir(self.dir)
+        token = f"{os.getpid()} {secrets.token_hex(4)}"
+        fd = self._create_lock()
+        if fd is None and self._reclaim_stale_lock(token):
+            fd = self._create_lock()
+        if fd is None:
+            raise TaskLedgerBusyError(f"another collect is running (lock: {self.lock_path})")
+        try:
+            os.write(fd, f"{token}\n".encode("ascii"))
+            os.close(fd)
+            self._lock_token = token
+            yield
+        finally:
+            self._lock_token = None
+            if self._lock_owner(self.lock_path) == token:
+                self.lock_path.unlink(missing_ok=True)
+
+    def touch_lock(self) -> None:
+        """Mark the held collect lock as alive."""
+        token = self._lock_token
+        if token is not None and self._lock_owner(self.lock_path) == token:
+            with contextlib.suppress(FileNotFoundError):
+                os.utime(self.lock_path)
+
+    def _create_lock(self) -> Optional[int]:
+        try:
+            return os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return None
+
+    def _reclaim_stale_lock(self, token: str) -> bool:
+        if not self._lock_is_stale(self.lock_path):
+            return False
+        stale = self.lock_path.with_name(f"{self.lock_path.name}.{token.replace(' ', '-')}.stale")
+        try:
+            os.rename(self.lock_path, stale)
+        except FileNotFoundError:
+            return True  # someone else removed it; race them for a fresh create
+        try:
+            if not self._lock_is_stale(stale):
+                # A new collect locked between our check and the rename; put its lock back.
+                with contextlib.suppress(FileExistsError):
+                    os.link(stale, self.lock_path)
+                return False
+            return True
+        finally:
+            stale.unlink(missing_ok=True)
+
+    @staticmethod
+    def _lock_is_stale(path: Path) -> bool:
+        try:
+            return time.time() - path.stat().st_mtime >= STALE_LOCK_SECONDS
+        except FileNotFoundError:
+            return True
+
+    @staticmethod
+    def _lock_owner(path: Path) -> str:
+        try:
+            return path.read_text(encoding="ascii").strip()
+        except (FileNotFoundError, UnicodeDecodeError):
+            return ""
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        ensure_dir(self.dir)
+        with self._write_lock:
+            append_jsonl(self.path, record)
+
+
+def submit_tasks(
+    adapter: Any,
+    requests: Iterable[GenerationRequest],
+    ledger: TaskLedger,
+    on_result: Optional[Callable[[int, Dict[str, str]], None]] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> List[Dict[str, str]]:
+    """Create one provider task per request and record it; nothing waits for completion."""
+    limiter = rate_limiter or get_rate_limiter()
+    rows: List[Dict[str, str]] = []
+    for index, request in enumerate(requests):
+        row = {"prompt": request.prompt, "task_id": "", "status": TASK_SUBMITTED, "error": ""}
+        try:
+            prepared, cleanup_paths = prepare_request_for_execution(request)
+            try:
+                limiter.acquire(prepared.provider, prepared.model)
+                task = adapter.submit_task(prepared)
+            finally:
+                cleanup_temp_files(cleanup_paths)
+            ledger.record_submitted(request, task)
+            row["task_id"] = task["task_id"]
+        except Exception as exc:  # noqa: BLE001
+            row.update(status=TASK_FAILED, error=str(exc))
+        rows.append(row)
+        if on_result is not None:
+            on_result(index, row)
+    return rows
+
+
+def collect_tasks(
+    adapter: Any,
+    ledger: TaskLedger,
+    output_root: Path,
+    concurrency: int = 4,
+    on_result: Optional[Callable[[Dict[str, str]], None]] = None,
+) -> Dict[str, int]:
+    """Poll every pending task once and persist the finished ones.
+
+    Holds the ledger lock for the whole pass, so overlapping runs (cron) are
+    refused instead of persisting a task twice. A task the provider reports as
+    failed, or one rejected as a bad request or for auth, is closed out as
+    ``failed``; any other error (network, 5xx, 429, a bad poll body, a failed
+    save) leaves it pending for the next run with the error recorded.
+    """
+    counts = {TASK_COLLECTED: 0, TASK_FAILED: 0, TASK_PENDING: 0}
+    counts_lock = threading.Lock()
+
+    def _collect_one(task: Dict[str, Any]) -> None:
+        row = {"task_id": task["task_id"], "status": TASK_PENDING, "run_dir": "", "error": ""}
+        try:
+            final_raw = adapter.check_task(task["task_url"])
+            if final_raw is not None:
+                request = GenerationRequest(**task["request"])
+                latency_ms = int(max(0.0, time.time() - task["submitted_at"]) * 1000)
+                response = adapter.task_response(
+                    request, task["task_id"], task.get("create_task"), final_raw, latency_ms
+                )
+                run_dir = persist_run(
+                    output_root, request, response, session=getattr(adapter, "session", None)
+                )
+                ledger.record_result(task["task_id"], TASK_COLLECTED, run_dir=str(run_dir))
+                row.update(status=TASK_COLLECTED, run_dir=str(run_dir))
+        except Exception as exc:  # noqa: BLE001
+            row["error"] = str(exc)
+            if isinstance(exc, TaskFailedError) or classify_error(exc) in NON_RETRYABLE_ERRORS:
+                row["status"] = TASK_FAILED
+            # The provider may already have finished (and billed) the task; only a
+            # definite failure closes it, anything else is polled again next run.
+            ledger.record_result(task["task_id"], row["status"], error=str(exc))
+        ledger.touch_lock()
+        with counts_lock:
+            counts[row["status"]] += 1
+        if on_result is not None:
+            on_result(row)
+
+    with ledger.collect_lock():
+        pending = ledger.pending()
+        if pending:
+            with ThreadPoolExecutor(
+                max_workers=max(1, concurrency), thread_name_prefix="igt-collect"
+            ) as pool:
+                list(pool.map(_collect_one, pending))
+    return counts
@@ -0,0 +1,137 @@
+import base64
+import os
+from pathlib import Path
+
+import pytest
+
+from adapters.google import GoogleAdapter
+from core.assets import (
+    INPUT_CACHE_MB_ENV,
+    InputAssetCache,
+    get_input_assets,
+    reset_input_assets,
+)
+from core.io_utils import infer_image_size, parse_input_image
+from core.models import GenerationRequest
+
+# 1x1 PNG
+PNG_1X1 = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mP8/x8AAwMCAO7ZqZ0AAAAASUVORK5CYII="
+)
+
+
+@pytest.fixture
+def fresh_assets(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv(INPUT_CACHE_MB_ENV, "16")
+    reset_input_assets()
+    yield
+    reset_input_assets()
+
+
+def test_local_file_is_read_once_until_it_changes(tmp_path: Path) -> None:
+    cache = InputAssetCache()
+    image = tmp_path / "input.png"
+    image.write_bytes(PNG_1X1)
+
+    first = cache.local(image)
+    assert cache.local(image) is first
+    assert first.dimensions() == (1, 1)
+    assert first.base64() == base64.b64encode(PNG_1X1)
+
+    image.write_bytes(PNG_1X1 + b"\0")
+    os.utime(image, ns=(1, 1))
+    changed = cache.local(image)
+    assert changed is not first and changed.data.endswith(b"\0")
+    stats = cache.snapshot()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_lru_evicts_oldest_and_skips_oversized(tmp_path: Path) -> None:
+    # Each 100-byte file costs 100 + 136 bytes; the budget holds four.
+    cache = InputAssetCache(max_bytes=1000)
+    paths = []
+    for name in "abcde":
+        path = tmp_path / f"{name}.bin"
+        path.write_bytes(name.encode() * 100)
+        paths.append(path)
+    for path in paths[:4]:
+        cache.local(path)
+    cache.local(paths[0])  # a hit makes it recently used again
+    cache.local(paths[4])
+
+    assert cache.snapshot()["evicted"] == 1
+    cache.local(paths[0])
+    cache.local(paths[1])
+    stats = cache.snapshot()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 6, 4)
+
+    big = tmp_path / "big.bin"
+    big.write_bytes(b"x" * 300)
+    cache.local(big)
+    assert cache.snapshot()["entries"] == 4
+
+
+def test_url_is_revalidated_with_etag(requests_mock) -> None:
+    cache = InputAssetCache()
+    url = "https://example.com/input.png"
+    requests_mock.get(
+        url,
+        [
+            {"content": PNG_1X1, "headers": {"Content-Type": "image/png", "ETag": '"v1"'}},
+            {"status_code": 304},
+        ],
+    )
+    first = cache.remote(url)
+    second = cache.remote(url)
+
+    assert second is first
+    assert requests_mock.last_request.headers["If-None-Match"] == '"v1"'
+    assert cache.snapshot()["revalidated"] == 1
+
+    requests_mock.get("https://example.com/plain.png", content=PNG_1X1)
+    cache.remote("https://example.com/plain.png")
+    cache.remote("https://example.com/plain.png")
+    assert "If-None-Match" not in requests_mock.last_request.headers
+    assert cache.snapshot()["entries"] == 1
+
+
+def test_batch_inputs_share_one_encoding(requests_mock, tmp_path: Path, fresh_assets) -> None:
+    image = tmp_path / "input.png"
+    image.write_bytes(PNG_1X1)
+    values = [parse_input_image(str(image))["value"] for _ in range(3)]
+    assert values[0] == f"data:image/png;base64,{base64.b64encode(PNG_1X1).decode()}"
+    assert infer_image_size(str(image)) == "1x1"
+
+    url = "https://example.com/input.png"
+    requests_mock.get(
+        url, [{"content": PNG_1X1, "headers": {"ETag": '"v1"'}}, {"status_code": 304}]
+    )
+    adapter = GoogleAdapter(
+        api_key="test_key",
+        text2image_url="https://api.example.com/g",
+        image2image_url="https://api.example.com/g",
+    )
+    request = GenerationRequest(
+        provider="google",
+        model="gemini-2.5-flash-image",
+        task_type="image_to_image",
+        prompt="Edit",
+        input_image=url,
+    )
+    payloads = [adapter.build_payload(request) for _ in range(2)]
+    assert payloads[0] == payloads[1]
+    assert requests_mock.call_count == 2
+
+    stats = get_input_assets().snapshot()
+    assert (stats["hits"], stats["misses"], stats["revalidated"]) == (4, 2, 1)
+
+
+def test_dimensions_of_uncached_file_read_header_once(tmp_path: Path) -> None:
+    cache = InputAssetCache(max_bytes=0)
+    image = tmp_path / "input.png"
+    image.write_bytes(PNG_1X1)
+    assert cache.local_dimensions(image) == (1, 1)
+    assert cache.local_dimensions(image) == (1, 1)
+    stats = cache.snapshot()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 0)
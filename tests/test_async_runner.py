@@ -0,0 +1,213 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from adapters.alibaba import AlibabaAdapter
+from adapters.glm import GLMAdapter
+from adapters.task_tracker import TaskTracker
+from core.models import GenerationRequest, GenerationResponse
+from core.runner import arun_requests_concurrently, arun_with_retry_with_artifacts
+
+httpx = pytest.importorskip("httpx")
+
+
+def _request(prompt: str = "A robot", provider: str = "glm", model: str = "glm-image"):
+    return GenerationRequest(
+        provider=provider,
+        model=model,
+        task_type="text_to_image",
+        prompt=prompt,
+    )
+
+
+def test_glm_agenerate_uses_async_client() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["Authorization"] == "Bearer test_key"
+        return httpx.Response(200, json={"data": [{"url": "https://cdn.example.com/a.png"}]})
+
+    async def _main() -> GenerationResponse:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        adapter = GLMAdapter(
+            api_key="test_key",
+            text2image_url="https://api.example.com/images",
+            image2image_url="https://api.example.com/images",
+            async_client=client,
+        )
+        try:
+            return await adapter.agenerate(_request())
+        finally:
+            await client.aclose()
+
+    resp = asyncio.run(_main())
+    assert resp.images == ["https://cdn.example.com/a.png"]
+
+
+def test_glm_agenerate_error_raises() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:  # noqa: ARG001
+        return httpx.Response(400, json={"error": "bad"})
+
+    async def _main() -> None:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            adapter = GLMAdapter(
+                api_key="test_key",
+                text2image_url="https://api.example.com/images",
+                image2image_url="https://api.example.com/images",
+                async_client=client,
+            )
+            await adapter.agenerate(_request())
+
+    with pytest.raises(RuntimeError, match="glm API error status=400"):
+        asyncio.run(_main())
+
+
+def test_alibaba_agenerate_waits_on_shared_poller_without_blocking_loop(requests_mock) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.method == "POST"
+        assert request.headers["X-DashScope-Async"] == "enable"
+        return httpx.Response(200, json={"output": {"task_id": "task_1"}})
+
+    requests_mock.get(
+        "https://api.example.com/api/v1/tasks/task_1",
+        [
+            {"json": {"output": {"task_status": "RUNNING"}}},
+            {
+                "json": {
+                    "output": {"task_status": "SUCCEEDED"},
+                    "result": {"image_url": "https://cdn.example.com/async.png"},
+                }
+            },
+        ],
+    )
+
+    async def _main() -> GenerationResponse:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            adapter = AlibabaAdapter(
+                api_key="test_key",
+                text2image_url="https://api.example.com/sync",
+                image2image_url="https://api.example.com/sync",
+                async_mode=True,
+                async_url="https://api.example.com/async",
+                poll_interval_seconds=0,
+                poll_timeout_seconds=5,
+                async_client=client,
+                task_tracker=TaskTracker(),
+            )
+            ticks = 0
+
+            async def _ticker() -> None:
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0)
+
+            ticker = asyncio.create_task(_ticker())
+            try:
+                return await adapter.agenerate(_request(provider="alibaba", model="wanx-v1"))
+            finally:
+                ticker.cancel()
+                assert ticks > 0
+
+    resp = asyncio.run(_main())
+    assert resp.request_id == "task_1"
+    assert resp.images == ["https://cdn.example.com/async.png"]
+    assert requests_mock.call_count == 2
+
+
+class SleepyAsyncAdapter:
+    def __init__(self) -> None:
+        self.active = 0
+        self.max_active = 0
+        self.threads: set[int] = set()
+
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        raise AssertionError("sync path must not be used")
+
+    async def agenerate(self, request: GenerationRequest) -> GenerationResponse:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.threads.add(threading.get_ident())
+        try:
+            await asyncio.sleep(0.2)
+        finally:
+            self.active -= 1
+        return GenerationResponse(
+            request_id=f"req_{request.prompt}",
+            provider=request.provider,
+            model=request.model,
+            task_type=request.task_type,
+            images=[],
+            latency_ms=200,
+            raw_response={"ok": True},
+        )
+
+
+def test_arun_requests_concurrently_runs_many_on_one_loop(tmp_path: Path) -> None:
+    adapter = SleepyAsyncAdapter()
+    prompts = [f"p{i}" for i in range(100)]
+    seen: list[int] = []
+    started = time.monotonic()
+    rows = asyncio.run(
+        arun_requests_concurrently(
+            adapters={"glm": adapter},
+            jobs=(_request(prompt) for prompt in prompts),
+            output_root=tmp_path,
+            max_retries=0,
+            retry_delay_seconds=0,
+            concurrency=100,
+            on_result=lambda index, row: seen.append(index),
+        )
+    )
+    elapsed = time.monotonic() - started
+    assert [row["prompt"] for row in rows] == prompts
+    assert all(row["status"] == "ok" for row in rows)
+    assert seen == list(range(100))
+    assert adapter.max_active == 100
+    assert len(adapter.threads) == 1
+    assert elapsed < 5
+
+
+def test_arun_requests_concurrently_respects_provider_limits(tmp_path: Path) -> None:
+    adapter = SleepyAsyncAdapter()
+    rows = asyncio.run(
+        arun_requests_concurrently(
+            adapters={"glm": adapter},
+            jobs=[_request(f"p{i}") for i in range(6)],
+            output_root=tmp_path,
+            max_retries=0,
+            retry_delay_seconds=0,
+            concurrency=6,
+            provider_limits={"glm": 2},
+        )
+    )
+    assert all(row["status"] == "ok" for row in rows)
+    assert adapter.max_active == 2
+
+
+def test_arun_with_retry_falls_back_to_sync_generate() -> None:
+    class SyncOnlyAdapter:
+        calls = 0
+
+        def generate(self, request: GenerationRequest) -> GenerationResponse:
+            self.calls += 1
+            if self.calls == 1:
+                raise RuntimeError("temporary failure")
+            return GenerationResponse(
+                request_id="req_sync",
+                provider=request.provider,
+                model=request.model,
+                task_type=request.task_type,
+                images=[],
+                latency_ms=1,
+                raw_response={},
+            )
+
+    adapter = SyncOnlyAdapter()
+    response, cleanup = asyncio.run(
+        arun_with_retry_with_artifacts(adapter, _request(), max_retries=1, retry_delay_seconds=0)
+    )
+    assert response.request_id == "req_sync"
+    assert adapter.calls == 2
+    assert cleanup == []
@@ -0,0 +1,88 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from core.blobs import BLOB_STORE_ENV, BlobStore
+from core.models import GenerationRequest, GenerationResponse
+from core.runner import persist_run, save_images
+
+
+def _response(request_id, images):
+    return GenerationResponse(
+        request_id=request_id,
+        provider="glm",
+        model="glm-image",
+        task_type="text_to_image",
+        images=images,
+        latency_ms=1,
+        raw_response={},
+    )
+
+
+def test_runs_share_one_blob_and_gc_follows_links(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv(BLOB_STORE_ENV, "on")
+    request = GenerationRequest(
+        provider="glm", model="glm-image", task_type="text_to_image", prompt="a fox"
+    )
+    image = "data:image/png;base64,aGVsbG8="
+    first = persist_run(tmp_path, request, _response("req_1", [image]))
+    second = persist_run(tmp_path / "other", request, _response("req_2", [image]))
+    third = persist_run(tmp_path, request, _response("req_3", [image, image]))
+
+    manifest = json.loads((third / "saved_images.json").read_text(encoding="utf-8"))
+    digest = manifest["blobs"]["image_01.png"]
+    assert manifest["blobs"]["image_02.png"] == digest
+    assert (first / "images" / "image_01.png").read_bytes() == b"hello"
+    assert (first / "images" / "image_01.png").stat().st_ino == (
+        third / "images" / "image_02.png"
+    ).stat().st_ino
+    # Blob stores are per output root.
+    assert (second / "images" / "image_01.png").stat().st_nlink == 2
+
+    blobs = BlobStore(tmp_path)
+    assert blobs.stats() == {"blobs": 1, "bytes": 5, "unreferenced": 0, "links": 3}
+    shutil.rmtree(first)
+    assert blobs.gc() == {"blobs": 0, "bytes": 0}
+    shutil.rmtree(third)
+    assert blobs.gc() == {"blobs": 1, "bytes": 5}
+    assert not blobs.path(digest).exists()
+
+
+def test_bin_alias_links_to_the_same_blob(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    class DummyResponse:
+        status_code = 200
+        headers = {"Content-Length": "16"}
+
+        @staticmethod
+        def raise_for_status() -> None:
+            return None
+
+        @staticmethod
+        def iter_content(chunk_size: int):  # noqa: ARG004
+            yield b"fake-image-bytes"
+
+        @staticmethod
+        def close() -> None:
+            return None
+
+    def _fake_get(url: str, timeout: int, **kwargs):  # noqa: ANN001, ANN003, ARG001
+        return DummyResponse()
+
+    monkeypatch.delenv("IGT_BIN_ALIAS_FORMAT", raising=False)
+    monkeypatch.setattr("core.runner.requests.get", _fake_get)
+    refs = {}
+    saved = save_images(
+        tmp_path / "run",
+        ["https://example.com/image.bin"],
+        blobs=BlobStore(tmp_path),
+        blob_refs=refs,
+    )
+    assert [Path(item).name for item in saved] == ["image_01.bin", "image_01.png"]
+    assert refs["image_01.bin"] == refs["image_01.png"]
+    assert Path(saved[0]).stat().st_nlink == 3
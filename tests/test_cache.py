@@ -0,0 +1,160 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from core.cache import CACHE_DIR_ENV, CACHE_ENV, ResponseCache, reset_response_cache
+from core.models import GenerationRequest, GenerationResponse
+from core.runner import run_and_persist
+
+
+class CountingAdapter:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        self.calls += 1
+        return GenerationResponse(
+            request_id=f"req_{self.calls}",
+            provider=request.provider,
+            model=request.model,
+            task_type=request.task_type,
+            images=["data:image/png;base64,aGVsbG8="],
+            latency_ms=5,
+            raw_response={},
+        )
+
+
+@pytest.fixture
+def cache_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    def _configure(mode: str) -> Path:
+        monkeypatch.setenv(CACHE_ENV, mode)
+        monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path / "cache"))
+        reset_response_cache()
+        return tmp_path / "cache"
+
+    yield _configure
+    reset_response_cache()
+
+
+def _request(seed, input_image=None) -> GenerationRequest:
+    return GenerationRequest(
+        provider="glm",
+        model="glm-image",
+        task_type="text_to_image",
+        prompt="a fox",
+        seed=seed,
+        input_image=input_image,
+    )
+
+
+def test_seeded_request_is_served_from_cache(tmp_path: Path, cache_env) -> None:
+    cache_env("readwrite")
+    adapter = CountingAdapter()
+    first = run_and_persist(adapter, _request(7), tmp_path / "runs", 0, 0)
+    second = run_and_persist(adapter, _request(7), tmp_path / "runs", 0, 0)
+    run_and_persist(adapter, _request(None), tmp_path / "runs", 0, 0)
+    run_and_persist(adapter, _request(None), tmp_path / "runs", 0, 0)
+
+    assert adapter.calls == 3
+    assert second["status"] == "ok"
+    assert second["run_dir"] != first["run_dir"]
+    saved = json.loads((Path(second["run_dir"]) / "saved_images.json").read_text())
+    assert saved["cached_from"]
+    assert Path(saved["saved_files"][0]).read_bytes() == b"hello"
+    response = json.loads((Path(second["run_dir"]) / "response.json").read_text())
+    assert response["request_id"] == "req_1"
+
+
+def test_read_mode_does_not_store(tmp_path: Path, cache_env) -> None:
+    cache_root = cache_env("read")
+    adapter = CountingAdapter()
+    run_and_persist(adapter, _request(7), tmp_path / "runs", 0, 0)
+    run_and_persist(adapter, _request(7), tmp_path / "runs", 0, 0)
+    assert adapter.calls == 2
+    assert not cache_root.exists()
+
+
+def test_key_follows_input_image_content(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path / "cache")
+    image = tmp_path / "input.png"
+    image.write_bytes(b"one")
+    before = cache.key(_request(1, input_image=str(image)))
+    image.write_bytes(b"two!")
+    assert cache.key(_request(1, input_image=str(image))) != before
+    assert cache.key(_request(None)) is None
+
+
+def test_prune_evicts_least_recently_used_and_expired(tmp_path: Path) -> None:
+    run_dir = tmp_path / "run"
+    (run_dir / "images").mkdir(parents=True)
+    image = run_dir / "images" / "image_01.png"
+    image.write_bytes(b"x" * 400)
+    (run_dir / "response.json").write_text("{}", encoding="utf-8")
+    (run_dir / "saved_images.json").write_text(
+        json.dumps({"saved_files": [str(image)]}), encoding="utf-8"
+    )
+    cache = ResponseCache(tmp_path / "cache", max_bytes=1000)
+    for key in ("aa01", "bb02"):
+        assert cache.store(key, run_dir)
+    old = time.time() - 60
+    os.utime(cache.root / "aa" / "aa01" / "entry.json", (old, old))
+    assert cache.lookup("aa01") is not None  # a hit makes it recently used again
+    os.utime(cache.root / "bb" / "bb02" / "entry.json", (old, old))
+
+    assert cache.store("cc03", run_dir)
+    assert cache.lookup("bb02") is None
+    assert cache.lookup("aa01") is not None
+    assert cache.stats["evicted"] == 1
+
+    cache.max_age_seconds = 0
+    time.sleep(0.01)
+    assert cache.prune() == 2
+
+
+def test_lookup_error_is_a_cache_miss(
+    tmp_path: Path, cache_env, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cache_env("readwrite")
+    image = tmp_path / "input.png"
+    image.write_bytes(b"one")
+
+    def _unreadable(self, input_image):  # noqa: ANN001, ARG001
+        raise PermissionError(input_image)
+
+    monkeypatch.setattr(ResponseCache, "_input_digest", _unreadable)
+    adapter = CountingAdapter()
+    row = run_and_persist(adapter, _request(7, input_image=str(image)), tmp_path / "runs", 0, 0)
+    assert row["status"] == "ok"
+    assert adapter.calls == 1
+
+
+def test_store_rescans_only_when_over_the_limit(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    run_dir = tmp_path / "run"
+    (run_dir / "images").mkdir(parents=True)
+    image = run_dir / "images" / "image_01.png"
+    image.write_bytes(b"x" * 400)
+    (run_dir / "response.json").write_text("{}", encoding="utf-8")
+    (run_dir / "saved_images.json").write_text(
+        json.dumps({"saved_files": [str(image)]}), encoding="utf-8"
+    )
+    cache = ResponseCache(tmp_path / "cache", max_bytes=2000)
+    scans = []
+    real_prune = cache.prune
+
+    def _counting_prune() -> int:
+        scans.append(1)
+        return real_prune()
+
+    monkeypatch.setattr(cache, "prune", _counting_prune)
+    for key in ("aa01", "aa02", "aa03", "aa04"):
+        assert cache.store(key, run_dir)
+    # The first store scans to learn the size; the next three fit in the total.
+    assert len(scans) == 1
+    assert cache.store("aa05", run_dir)
+    assert len(scans) == 2
+    assert cache.stats["evicted"] == 1
@@ -0,0 +1,122 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from adapters.errors import TransientError
+from core.circuit import CircuitBreaker, CircuitBreakerRegistry
+from core.models import GenerationRequest, GenerationResponse
+from core.runner import (
+    arun_with_retry_with_artifacts,
+    run_batch_requests,
+    run_with_retry_with_artifacts,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_breaker_opens_then_half_open_probe_closes() -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker("glm", failure_threshold=2, cooldown_seconds=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now += 10
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    # Only one probe at a time while half-open.
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+    stats = breaker.snapshot()
+    assert [(t["from"], t["to"]) for t in stats["transitions"]] == [
+        ("closed", "open"),
+        ("open", "half_open"),
+        ("half_open", "closed"),
+    ]
+    assert stats["rejected"] == 2
+
+
+def test_failed_probe_reopens_circuit() -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker("glm", failure_threshold=1, cooldown_seconds=5, clock=clock)
+    breaker.record_failure()
+    clock.now += 5
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+
+class InterruptedAdapter:
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        raise KeyboardInterrupt
+
+    async def agenerate(self, request: GenerationRequest) -> GenerationResponse:
+        raise asyncio.CancelledError
+
+
+def test_interrupted_probe_frees_the_half_open_slot() -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker("glm", failure_threshold=1, cooldown_seconds=5, clock=clock)
+    breaker.record_failure()
+    clock.now += 5
+    request = GenerationRequest(
+        provider="glm", model="glm-image", task_type="text_to_image", prompt="probe"
+    )
+
+    with pytest.raises(KeyboardInterrupt):
+        run_with_retry_with_artifacts(InterruptedAdapter(), request, 0, 0, breaker=breaker)
+    assert breaker.state == "half_open"
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(
+            arun_with_retry_with_artifacts(InterruptedAdapter(), request, 0, 0, breaker=breaker)
+        )
+    # The next caller gets to probe; a second one waits for its outcome.
+    assert breaker.allow()
+    assert not breaker.allow()
+
+class DownAdapter:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        self.calls += 1
+        raise TransientError("glm API error status=503", status_code=503)
+
+
+def test_batch_parks_jobs_once_provider_circuit_opens(tmp_path: Path) -> None:
+    adapter = DownAdapter()
+    breakers = CircuitBreakerRegistry(failure_threshold=2, cooldown_seconds=60)
+    jobs = [
+        GenerationRequest(
+            provider="glm", model="glm-image", task_type="text_to_image", prompt=f"p{i}"
+        )
+        for i in range(6)
+    ]
+    rows = run_batch_requests(
+        adapters={"glm": adapter},
+        jobs=jobs,
+        output_root=tmp_path,
+        max_retries=0,
+        retry_delay_seconds=0,
+        breakers=breakers,
+    )
+    assert [row["status"] for row in rows] == ["failed", "failed"] + ["parked"] * 4
+    assert adapter.calls == 2
+    snapshot = breakers.snapshot()["glm"]
+    assert snapshot["state"] == "open"
+    assert snapshot["opened"] == 1
+    assert snapshot["rejected"] == 4
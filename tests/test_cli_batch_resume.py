@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+from pathlib import Path
+
+from cli import _build_parser, _run_batch
+from core.journal import BatchJournal
+from core.models import GenerationRequest, GenerationResponse
+
+
+class PickyAdapter:
+    def __init__(self, failing_prompts=()) -> None:
+        self.failing_prompts = set(failing_prompts)
+        self.prompts = []
+
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        self.prompts.append(request.prompt)
+        if request.prompt in self.failing_prompts:
+            raise ValueError(f"rejected {request.prompt}")
+        return GenerationResponse(
+            request_id=f"req_{request.prompt}",
+            provider=request.provider,
+            model=request.model,
+            task_type=request.task_type,
+            images=[],
+            latency_ms=1,
+            raw_response={},
+        )
+
+
+def _batch_args(*extra: str):
+    return _build_parser().parse_args(["batch", *extra])
+
+
+def test_batch_resume_skips_completed_jobs(tmp_path: Path) -> None:
+    prompts_file = tmp_path / "prompts.txt"
+    prompts_file.write_text("a\nb\nc\n", encoding="utf-8")
+    output_root = tmp_path / "runs"
+
+    first = PickyAdapter(failing_prompts={"b"})
+    args = _batch_args(
+        "--provider", "glm", "--model", "glm-image", "--task-type", "text_to_image",
+        "--prompts-file", str(prompts_file),
+    )
+    _run_batch(args, {"glm": first}, output_root, max_retries=0, retry_delay=0)
+    assert sorted(first.prompts) == ["a", "b", "c"]
+
+    (batch_dir,) = (output_root / "batches").iterdir()
+    lines = (batch_dir / "journal.jsonl").read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[0])["event"] == "start"
+    assert sorted(json.loads(line)["status"] for line in lines[1:]) == ["failed", "ok", "ok"]
+
+    second = PickyAdapter()
+    _run_batch(
+        _batch_args("--resume", batch_dir.name),
+        {"glm": second},
+        output_root,
+        max_retries=0,
+        retry_delay=0,
+    )
+    assert second.prompts == ["b"]
+
+    with (output_root / "batch_summary.csv").open(encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [(row["prompt"], row["status"]) for row in rows] == [
+        ("a", "ok"),
+        ("b", "ok"),
+        ("c", "ok"),
+    ]
+    assert len(BatchJournal.open(output_root, batch_dir.name).completed()) == 3
+
+
+def test_batch_reads_prompts_from_stdin(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr("sys.stdin", io.StringIO("x\n\n  y  \n"))
+    output_root = tmp_path / "runs"
+    adapter = PickyAdapter()
+    args = _batch_args(
+        "--provider", "glm", "--model", "glm-image", "--task-type", "text_to_image",
+        "--prompts-file", "-",
+    )
+    _run_batch(args, {"glm": adapter}, output_root, max_retries=0, retry_delay=0)
+
+    assert sorted(adapter.prompts) == ["x", "y"]
+    with (output_root / "batch_summary.csv").open(encoding="utf-8") as f:
+        assert [row["prompt"] for row in csv.DictReader(f)] == ["x", "y"]
@@ -1,8 +1,12 @@
+import csv
+import time
 from argparse import Namespace
+from pathlib import Path
 
 import pytest
 
-from cli import _resolve_compare_targets
+from cli import _resolve_compare_targets, _run_compare
+from core.models import GenerationRequest, GenerationResponse
 
 
 def _args(**kwargs):
@@ -13,6 +17,7 @@ def _args(**kwargs):
         "model_b": None,
         "model_alibaba": None,
         "model_google": None,
+        "target": None,
     }
     base.update(kwargs)
     return Namespace(**base)
@@ -56,3 +61,74 @@ def test_compare_incomplete_new_mode_raises() -> None:
     args = _args(provider_a="alibaba", model_a="qwen-image")
     with pytest.raises(ValueError, match="missing args"):
         _resolve_compare_targets(args)
+
+
+def test_compare_target_mode_supports_more_than_two_targets() -> None:
+    args = _args(
+        target=["alibaba:qwen-image", "Google:gemini-2.5-flash-image", "glm:cogview-4-250304"]
+    )
+    assert _resolve_compare_targets(args) == [
+        ("alibaba", "qwen-image"),
+        ("google", "gemini-2.5-flash-image"),
+        ("glm", "cogview-4-250304"),
+    ]
+
+
+def test_compare_target_mode_rejects_pair_flags() -> None:
+    args = _args(target=["alibaba:qwen-image", "glm:glm-image"], provider_a="alibaba")
+    with pytest.raises(ValueError, match="not both"):
+        _resolve_compare_targets(args)
+
+
+def test_compare_target_mode_requires_two_targets() -> None:
+    with pytest.raises(ValueError, match="at least twice"):
+        _resolve_compare_targets(_args(target=["alibaba:qwen-image"]))
+    with pytest.raises(ValueError, match="provider:model"):
+        _resolve_compare_targets(_args(target=["alibaba", "glm:glm-image"]))
+
+
+class SlowAdapter:
+    def __init__(self, delay_seconds: float) -> None:
+        self.delay_seconds = delay_seconds
+
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        time.sleep(self.delay_seconds)
+        return GenerationResponse(
+            request_id=f"req_{request.provider}",
+            provider=request.provider,
+            model=request.model,
+            task_type=request.task_type,
+            images=[],
+            latency_ms=int(self.delay_seconds * 1000),
+            raw_response={"ok": True},
+        )
+
+
+def test_run_compare_dispatches_targets_in_parallel(tmp_path: Path) -> None:
+    args = _args(
+        target=["alibaba:qwen-image", "google:gemini-2.5-flash-image", "glm:glm-image"],
+        prompt="A red car",
+        task_type="text_to_image",
+        input_image=None,
+        size="1024x1024",
+        negative_prompt_enabled="off",
+        negative_prompt=None,
+        n=1,
+        seed=None,
+        extra_json=None,
+        parallel="on",
+        quiet=True,
+    )
+    adapters = {
+        "alibaba": SlowAdapter(0.3),
+        "google": SlowAdapter(0.3),
+        "glm": SlowAdapter(0.3),
+    }
+    started = time.monotonic()
+    _run_compare(args, adapters, tmp_path, max_retries=0, retry_delay=0)
+    elapsed = time.monotonic() - started
+    assert elapsed < 0.8
+    with open(tmp_path / "compare_summary.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["provider"] for row in rows] == ["alibaba", "google", "glm"]
+    assert all(row["status"] == "ok" for row in rows)
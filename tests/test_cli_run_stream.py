@@ -0,0 +1,80 @@
+import io
+import json
+import threading
+from pathlib import Path
+
+from cli import _build_parser, _run_request_stream
+from core.models import GenerationRequest, GenerationResponse
+
+
+class GatedAdapter:
+    """Holds the "slow" prompt until ``release`` is set."""
+
+    def __init__(self, release: threading.Event) -> None:
+        self.release = release
+
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        if request.prompt == "slow":
+            assert self.release.wait(timeout=5)
+        return GenerationResponse(
+            request_id=f"req_{request.prompt}",
+            provider=request.provider,
+            model=request.model,
+            task_type=request.task_type,
+            images=[],
+            latency_ms=1,
+            raw_response={},
+        )
+
+
+class CountingStdout(io.StringIO):
+    """Sets ``release`` once ``count`` result lines have been emitted."""
+
+    def __init__(self, release: threading.Event, count: int) -> None:
+        super().__init__()
+        self.release = release
+        self.count = count
+
+    def write(self, text: str) -> int:
+        written = super().write(text)
+        if self.getvalue().count("\n") >= self.count:
+            self.release.set()
+        return written
+
+
+def _line(prompt: str, **extra) -> str:
+    doc = {
+        "provider": "glm",
+        "model": "glm-image",
+        "task_type": "text_to_image",
+        "prompt": prompt,
+        **extra,
+    }
+    return json.dumps(doc)
+
+
+def test_run_streams_results_in_finish_order(tmp_path: Path, monkeypatch) -> None:
+    stdin = "\n".join(
+        [
+            _line("slow", id="s"),
+            _line("a", id="first", seed=3),
+            "{not json",
+            _line("b", size="512x512"),
+        ]
+    )
+    release = threading.Event()
+    stdout = CountingStdout(release, count=3)
+    monkeypatch.setattr("sys.stdin", io.StringIO(stdin + "\n"))
+    monkeypatch.setattr("sys.stdout", stdout)
+    args = _build_parser().parse_args(["run", "--input", "-", "--concurrency", "4"])
+    _run_request_stream(args, {"glm": GatedAdapter(release)}, tmp_path, 0, 0)
+
+    records = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert records[0]["line"] == 3 and records[0]["status"] == "invalid"
+    assert {record["id"] for record in records[1:3]} == {"first", None}
+    assert records[3]["id"] == "s" and records[3]["line"] == 1
+    assert all(record["status"] == "ok" for record in records[1:])
+
+    request_b = next(r for r in records if r.get("prompt") == "b")
+    saved = json.loads((Path(request_b["run_dir"]) / "request.json").read_text(encoding="utf-8"))
+    assert saved["size"] == "512x512"
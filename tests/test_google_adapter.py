@@ -1,7 +1,11 @@
+import json
+from pathlib import Path
+
 import pytest
 
 from adapters.google import GoogleAdapter
-from core.models import GenerationRequest
+from core.models import KEEP_RAW_RESPONSE_ENV, GenerationRequest
+from core.runner import persist_run
 
 
 def test_google_build_payload_image_to_image() -> None:
@@ -54,6 +58,45 @@ def test_google_generate_success_extracts_inline_data(requests_mock) -> None:
     resp = adapter.generate(req)
     assert resp.request_id == "resp_1"
     assert resp.images == ["data:image/png;base64,aGVsbG8="]
+    inline = resp.raw_response["candidates"][0]["content"]["parts"][0]["inlineData"]
+    assert inline == {"mimeType": "image/png", "data": "igt-image:images[0]"}
+
+
+def test_google_response_json_references_saved_files(
+    requests_mock, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    adapter = GoogleAdapter(
+        api_key="test_key",
+        text2image_url="https://api.example.com/models/{model}:generateContent",
+        image2image_url="https://api.example.com/models/{model}:generateContent",
+    )
+    body = {
+        "responseId": "resp_2",
+        "candidates": [
+            {"content": {"parts": [{"inlineData": {"mimeType": "image/png", "data": "aGVsbG8="}}]}}
+        ],
+    }
+    requests_mock.post(
+        "https://api.example.com/models/gemini-2.5-flash-image:generateContent", json=body
+    )
+    req = GenerationRequest(
+        provider="google",
+        model="gemini-2.5-flash-image",
+        task_type="text_to_image",
+        prompt="A house",
+    )
+    run_dir = persist_run(tmp_path, req, adapter.generate(req))
+    saved = json.loads((run_dir / "response.json").read_text(encoding="utf-8"))
+    inline = saved["raw_response"]["candidates"][0]["content"]["parts"][0]["inlineData"]
+    assert inline["data"] == "igt-image:images/image_01.png"
+    assert saved["images"] == ["igt-image:images/image_01.png"]
+    assert (run_dir / "images" / "image_01.png").read_bytes() == b"hello"
+
+    monkeypatch.setenv(KEEP_RAW_RESPONSE_ENV, "on")
+    run_dir = persist_run(tmp_path / "raw", req, adapter.generate(req))
+    saved = json.loads((run_dir / "response.json").read_text(encoding="utf-8"))
+    assert saved["raw_response"] == body
+    assert saved["images"] == ["data:image/png;base64,aGVsbG8="]
 
 
 def test_google_generate_error_raises(requests_mock) -> None:
@@ -91,3 +134,37 @@ def test_google_missing_key_raises() -> None:
     )
     with pytest.raises(ValueError, match="GOOGLE_API_KEY"):
         adapter.generate(req)
+
+
+def test_google_extract_images_single_pass_and_dedupe() -> None:
+    adapter = GoogleAdapter(
+        api_key="test_key",
+        text2image_url="https://api.example.com/t2i",
+        image2image_url="https://api.example.com/i2i",
+    )
+    # Same length, header and trailer; only the middle differs.
+    first = "iVBORw0KGgo" + "A" * 200 + "AAAAAElFTkSuQmCC"
+    second = "iVBORw0KGgo" + "A" * 99 + "B" + "A" * 100 + "AAAAAElFTkSuQmCC"
+    raw = {
+        "candidates": [
+            {
+                "content": {
+                    "parts": [
+                        {"inlineData": {"mimeType": "image/png", "data": first}},
+                        {"inlineData": {"mimeType": "image/png", "data": second}},
+                        {"inlineData": {"mimeType": "image/png", "data": first}},
+                    ]
+                }
+            }
+        ]
+    }
+    assert adapter.extract_images(raw) == [
+        f"data:image/png;base64,{first}",
+        f"data:image/png;base64,{second}",
+    ]
+    # Unknown shapes fall back to the generic walk, which still sees inline data.
+    nested = {"result": {"inline_data": {"mime_type": "image/jpeg", "data": first}}}
+    assert adapter.extract_images(nested) == [f"data:image/jpeg;base64,{first}"]
+    assert adapter.extract_images({"output": {"image_url": "HTTPS://cdn/x.png"}}) == [
+        "HTTPS://cdn/x.png"
+    ]
@@ -0,0 +1,121 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from adapters.glm import GLMAdapter
+from adapters.session import build_session, session_stats
+from core.runner import download_to_file, save_images
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # noqa: N802
+        body = b"image-bytes"
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002, ANN002
+        return None
+
+
+@pytest.fixture()
+def local_server() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_session_reuses_keep_alive_connection(local_server: str) -> None:
+    session = build_session(pool_size=2)
+    for index in range(5):
+        resp = session.get(f"{local_server}/img_{index}.png", timeout=5)
+        assert resp.content == b"image-bytes"
+    assert session_stats(session) == {"requests": 5, "connections": 1, "reused": 4}
+
+
+def test_save_images_downloads_through_adapter_session(
+    tmp_path: Path, local_server: str
+) -> None:
+    adapter = GLMAdapter(
+        api_key="test_key",
+        text2image_url="https://open.bigmodel.cn/api/paas/v4/images/generations",
+        image2image_url="https://open.bigmodel.cn/api/paas/v4/images/generations",
+        pool_size=4,
+    )
+    saved = save_images(
+        tmp_path,
+        [f"{local_server}/a.png", f"{local_server}/b.png"],
+        session=adapter.session,
+    )
+    assert sum(1 for item in saved if item.endswith(".bin")) == 2
+    # The two images download in parallel; a later download reuses a pooled connection.
+    save_images(tmp_path / "next", [f"{local_server}/c.png"], session=adapter.session)
+    stats = adapter.connection_stats()
+    assert stats["requests"] == 3
+    assert stats["reused"] >= 1
+
+
+def test_build_session_rejects_empty_pool() -> None:
+    with pytest.raises(ValueError, match="pool_size"):
+        build_session(pool_size=0)
+
+
+class _FlakyRangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    body = b"0123456789abcdefghij"
+    ranges: list = []
+
+    def do_GET(self) -> None:  # noqa: N802
+        requested = self.headers.get("Range")
+        type(self).ranges.append(requested)
+        if requested is None:
+            # Promise the whole body, send part of it, then drop the connection.
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(self.body)))
+            self.end_headers()
+            self.wfile.write(self.body[:8])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        start = int(requested.split("=", 1)[1].rstrip("-"))
+        chunk = self.body[start:]
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{len(self.body) - 1}/{len(self.body)}")
+        self.send_header("Content-Length", str(len(chunk)))
+        self.end_headers()
+        self.wfile.write(chunk)
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002, ANN002
+        return None
+
+
+def test_download_resumes_with_range_after_dropped_connection(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("core.runner.DOWNLOAD_CHUNK_BYTES", 4)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyRangeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/big.png"
+        target = tmp_path / "image_01.bin"
+        stats = download_to_file(build_session(pool_size=1), url, target)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert target.read_bytes() == _FlakyRangeHandler.body
+    assert not (tmp_path / "image_01.bin.part").exists()
+    assert _FlakyRangeHandler.ranges == [None, "bytes=8-"]
+    assert stats["bytes"] == 20 and stats["resumed"] == 1
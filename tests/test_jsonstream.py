@@ -0,0 +1,308 @@
+import asyncio
+import base64
+import json
+import os
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from adapters.errors import TransientError
+from adapters.glm import GLMAdapter
+from adapters.google import GoogleAdapter
+from core.assets import INPUT_CACHE_MB_ENV, get_input_assets, reset_input_assets
+from core.io_utils import Base64File
+from core.jsonstream import STREAM_RESPONSES_ENV, StreamingJSONBody, spool_inline_images
+from core.models import GenerationRequest
+from core.runner import persist_run
+
+
+def _chunks(data: bytes, size: int):
+    return (data[index : index + size] for index in range(0, len(data), size))
+
+
+def test_spooler_decodes_inline_data_across_chunk_boundaries(tmp_path: Path) -> None:
+    first = bytes(range(256)) * 40
+    second = b"\xff\xd8jpeg-bytes"
+    body = {
+        "responseId": "r1",
+        "candidates": [
+            {
+                "content": {
+                    "parts": [
+                        {"text": "caption with \"quotes\", \\ and {braces} é"},
+                        {"inlineData": {"mimeType": "image/png", "data": ""}},
+                        {"inline_data": {"data": "", "mime_type": "image/jpeg"}},
+                    ]
+                }
+            }
+        ],
+        "usage": {"data": "not an image"},
+    }
+    text = json.dumps(body, ensure_ascii=False)
+    # Encoders may escape "/" in base64; the spooler has to undo that.
+    text = text.replace(
+        '"mimeType": "image/png", "data": ""',
+        '"mimeType": "image/png", "data": "'
+        + base64.b64encode(first).decode().replace("/", "\\/")
+        + '"',
+    )
+    second_b64 = base64.b64encode(second).decode()
+    text = text.replace('"data": "", "mime_type"', f'"data": "{second_b64}", "mime_type"')
+
+    raw, files = spool_inline_images(_chunks(text.encode("utf-8"), 7), spool_dir=tmp_path)
+
+    assert [path.suffix for path in files] == [".png", ".jpeg"]
+    assert files[0].read_bytes() == first
+    assert files[1].read_bytes() == second
+    parts = raw["candidates"][0]["content"]["parts"]
+    assert parts[0]["text"] == body["candidates"][0]["content"]["parts"][0]["text"]
+    assert parts[1]["inlineData"]["data"] == "igt-image:images[0]"
+    assert parts[2]["inline_data"]["data"] == "igt-image:images[1]"
+    assert raw["usage"] == {"data": "not an image"}
+
+
+def test_truncated_body_removes_spooled_files(tmp_path: Path) -> None:
+    text = '{"parts": [{"inlineData": {"data": "aGVsbG8='
+    # A dropped connection: retryable, unlike a request the provider rejected.
+    with pytest.raises(TransientError):
+        spool_inline_images([text.encode()], spool_dir=tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_google_streaming_mode_writes_images_from_spool(
+    requests_mock, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv(STREAM_RESPONSES_ENV, "on")
+    adapter = GoogleAdapter(
+        api_key="test_key",
+        text2image_url="https://api.example.com/models/{model}:generateContent",
+        image2image_url="https://api.example.com/models/{model}:generateContent",
+    )
+    requests_mock.post(
+        "https://api.example.com/models/gemini-2.5-flash-image:generateContent",
+        json={
+            "responseId": "resp_s",
+            "candidates": [
+                {
+                    "content": {
+                        "parts": [{"inlineData": {"mimeType": "image/png", "data": "aGVsbG8="}}]
+                    }
+                }
+            ],
+        },
+    )
+    request = GenerationRequest(
+        provider="google",
+        model="gemini-2.5-flash-image",
+        task_type="text_to_image",
+        prompt="A house",
+    )
+    response = adapter.generate(request)
+    assert response.request_id == "resp_s"
+    assert len(response.images) == 1 and response.images[0].startswith("file://")
+
+    run_dir = persist_run(tmp_path, request, response)
+    assert (run_dir / "images" / "image_01.png").read_bytes() == b"hello"
+    saved = json.loads((run_dir / "response.json").read_text(encoding="utf-8"))
+    inline = saved["raw_response"]["candidates"][0]["content"]["parts"][0]["inlineData"]
+    assert inline["data"] == "igt-image:images/image_01.png"
+    assert saved["images"] == ["igt-image:images/image_01.png"]
+
+
+@pytest.mark.parametrize("resident", [False, True])
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 10, 1000])
+def test_streaming_body_matches_inline_json(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, size: int, resident: bool
+) -> None:
+    # A file already in the input asset cache is sliced from memory, otherwise read via mmap.
+    monkeypatch.setenv(INPUT_CACHE_MB_ENV, "1")
+    reset_input_assets()
+    # Tiny slices exercise the boundaries between base64 chunks.
+    monkeypatch.setattr("core.io_utils.BASE64_FILE_CHUNK_BYTES", 4)
+    data = bytes(index % 256 for index in range(size))
+    image = tmp_path / "input.png"
+    image.write_bytes(data)
+    if resident:
+        get_input_assets().local(image)
+    payload = {
+        "prompt": "a \"fox\" é",
+        "parts": [{"inline_data": {"data": Base64File(image, "image/png", data_uri=False)}}],
+        "image_url": Base64File(image, "image/png"),
+    }
+    body = StreamingJSONBody(payload)
+    sent = b"".join(body)
+
+    assert len(sent) == len(body)
+    b64 = base64.b64encode(data).decode()
+    assert json.loads(sent) == {
+        "prompt": payload["prompt"],
+        "parts": [{"inline_data": {"data": b64}}],
+        "image_url": f"data:image/png;base64,{b64}",
+    }
+    assert StreamingJSONBody.wrap({"prompt": "no files"}) is None
+    stats = get_input_assets().snapshot()
+    assert stats["entries"] == (1 if resident else 0)
+    assert stats["hits"] == (2 if resident else 0)
+    reset_input_assets()
+
+
+def test_streaming_body_peak_memory_stays_bounded(tmp_path: Path) -> None:
+    reset_input_assets()
+    image = tmp_path / "large.png"
+    image.write_bytes(os.urandom(12 * 1024 * 1024))
+    body = StreamingJSONBody({"image_url": Base64File(image, "image/png")})
+
+    tracemalloc.start()
+    try:
+        sent = sum(len(chunk) for chunk in body)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert sent == len(body)
+    # The encoded image is 16 MiB; only a couple of slices may be alive at once.
+    assert peak < 4 * 1024 * 1024
+    assert get_input_assets().snapshot()["entries"] == 0
+    reset_input_assets()
+
+
+def test_image_to_image_uploads_local_file_as_stream(requests_mock, tmp_path: Path) -> None:
+    image = tmp_path / "input.jpg"
+    image.write_bytes(b"\xff\xd8" + bytes(range(256)) * 10)
+    b64 = base64.b64encode(image.read_bytes()).decode()
+    request = GenerationRequest(
+        provider="glm",
+        model="glm-image",
+        task_type="image_to_image",
+        prompt="Edit",
+        input_image=str(image),
+    )
+    adapter = GLMAdapter(
+        api_key="test_key",
+        text2image_url="https://api.example.com/t2i",
+        image2image_url="https://api.example.com/i2i",
+    )
+    requests_mock.post("https://api.example.com/i2i", json={"data": [{"url": "https://x/a.png"}]})
+
+    response = adapter.generate(request)
+
+    assert response.images == ["https://x/a.png"]
+    sent = requests_mock.last_request
+    assert isinstance(sent.body, StreamingJSONBody)
+    body = b"".join(sent.body)
+    assert sent.headers["Content-Length"] == str(len(body))
+    assert json.loads(body)["image_url"] == f"data:image/jpeg;base64,{b64}"
+
+    google = GoogleAdapter(
+        api_key="test_key",
+        text2image_url="https://api.example.com/g",
+        image2image_url="https://api.example.com/g",
+    )
+    payload = google.build_payload(
+        GenerationRequest(
+            provider="google",
+            model="gemini-2.5-flash-image",
+            task_type="image_to_image",
+            prompt="Edit",
+            input_image=str(image),
+        )
+    )
+    inline = json.loads(b"".join(StreamingJSONBody(payload)))["contents"][0]["parts"][1]
+    assert inline["inline_data"] == {"mime_type": "image/jpeg", "data": b64}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7])
+def test_spooler_decodes_unicode_escapes_across_chunks(tmp_path: Path, chunk_size: int) -> None:
+    data = b"\xfb\xff\xbf hello!"  # base64 has "+", "/" and "=" padding
+    b64 = base64.b64encode(data).decode()
+    assert b64.endswith("=") and "/" in b64
+    # Protobuf JSON printers write "=" as \u003d; "/" may come as \u002f.
+    escaped = b64.replace("=", "\\u003d").replace("/", "\\u002f")
+    text = '{"parts": [{"inlineData": {"mimeType": "image/png", "data": "' + escaped + '"}}]}'
+
+    raw, files = spool_inline_images(_chunks(text.encode(), chunk_size), spool_dir=tmp_path)
+
+    assert files[0].read_bytes() == data
+    assert raw["parts"][0]["inlineData"]["data"] == "igt-image:images[0]"
+
+
+@pytest.mark.parametrize("escape", ["\\u0022", "\\t", "\\u00zz"])
+def test_spooler_rejects_escapes_that_are_not_base64(tmp_path: Path, escape: str) -> None:
+    text = '{"parts": [{"inlineData": {"data": "aGVs' + escape + 'bG8="}}]}'
+    with pytest.raises(ValueError):
+        spool_inline_images(_chunks(text.encode(), 3), spool_dir=tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_async_body_reads_slices_off_the_event_loop(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    image = tmp_path / "input.png"
+    image.write_bytes(b"abc" * 4)
+    monkeypatch.setattr("core.io_utils.BASE64_FILE_CHUNK_BYTES", 3)
+    real_iter = Base64File.iter_encoded
+
+    def _slow_iter(self):  # noqa: ANN001
+        for chunk in real_iter(self):
+            time.sleep(0.02)  # a slow disk read / encode
+            yield chunk
+
+    monkeypatch.setattr(Base64File, "iter_encoded", _slow_iter)
+    body = StreamingJSONBody({"data": Base64File(image, "image/png", data_uri=False)})
+
+    async def _main():
+        ticks = 0
+
+        async def _ticker() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticker = asyncio.create_task(_ticker())
+        sent = b"".join([chunk async for chunk in body.async_stream()])
+        ticker.cancel()
+        return sent, ticks
+
+    sent, ticks = asyncio.run(_main())
+    assert json.loads(sent) == {"data": base64.b64encode(b"abc" * 4).decode()}
+    # Five slow slices take ~100 ms; a blocked loop would not tick in between.
+    assert ticks >= 5
+
+
+def test_async_client_sends_streamed_upload(tmp_path: Path) -> None:
+    httpx = pytest.importorskip("httpx")
+    image = tmp_path / "input.png"
+    image.write_bytes(b"\x89PNG" + bytes(range(256)) * 10)
+    b64 = base64.b64encode(image.read_bytes()).decode()
+    seen = {}
+
+    async def handler(request):  # noqa: ANN001
+        seen["body"] = b"".join([chunk async for chunk in request.stream])
+        seen["length"] = request.headers["Content-Length"]
+        return httpx.Response(200, json={"data": [{"url": "https://x/a.png"}]})
+
+    async def _main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            adapter = GLMAdapter(
+                api_key="test_key",
+                text2image_url="https://api.example.com/t2i",
+                image2image_url="https://api.example.com/i2i",
+                async_client=client,
+            )
+            return await adapter.agenerate(
+                GenerationRequest(
+                    provider="glm",
+                    model="glm-image",
+                    task_type="image_to_image",
+                    prompt="Edit",
+                    input_image=str(image),
+                )
+            )
+
+    response = asyncio.run(_main())
+    assert response.images == ["https://x/a.png"]
+    assert seen["length"] == str(len(seen["body"]))
+    assert json.loads(seen["body"])["image_url"] == f"data:image/png;base64,{b64}"
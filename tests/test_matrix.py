@@ -0,0 +1,86 @@
+import csv
+import json
+from pathlib import Path
+
+import pytest
+
+from cli import _build_parser, _run_matrix
+from core.matrix import MatrixSpec
+from core.models import GenerationRequest, GenerationResponse
+
+
+class EchoAdapter:
+    def __init__(self) -> None:
+        self.requests = []
+
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        self.requests.append(request)
+        return GenerationResponse(
+            request_id=f"req_{len(self.requests)}",
+            provider=request.provider,
+            model=request.model,
+            task_type=request.task_type,
+            images=[],
+            latency_ms=1,
+            raw_response={},
+        )
+
+
+def test_matrix_spec_expands_cross_product_lazily(tmp_path: Path) -> None:
+    (tmp_path / "prompts.txt").write_text("cat\ndog\n", encoding="utf-8")
+    spec = MatrixSpec.from_dict(
+        {
+            "prompts_file": "prompts.txt",
+            "models": {"alibaba": ["qwen-image"], "glm": ["glm-image", "cogview-4-250304"]},
+            "sizes": ["512x512", "1024x1024"],
+            "seeds": [1, 2],
+        },
+        base_dir=tmp_path,
+    )
+    assert spec.cells_per_prompt() == 12
+
+    cells = spec.expand()
+    dimensions, request = next(cells)
+    assert dimensions == {
+        "prompt": "cat",
+        "provider": "alibaba",
+        "model": "qwen-image",
+        "size": "512x512",
+        "seed": "1",
+    }
+    assert (request.size, request.seed) == ("512x512", 1)
+    assert len(list(cells)) == 23
+
+
+def test_matrix_spec_rejects_unknown_keys() -> None:
+    with pytest.raises(ValueError, match="unknown matrix spec keys: prompt"):
+        MatrixSpec.from_dict({"prompt": "x", "models": {"glm": ["glm-image"]}})
+
+
+def test_run_matrix_writes_one_column_per_dimension(tmp_path: Path) -> None:
+    spec_path = tmp_path / "eval.json"
+    spec_path.write_text(
+        json.dumps(
+            {
+                "prompts": ["a", "b"],
+                "models": {"glm": ["glm-image"], "google": ["gemini-2.5-flash-image"]},
+                "seeds": [7, 8],
+            }
+        ),
+        encoding="utf-8",
+    )
+    adapters = {"glm": EchoAdapter(), "google": EchoAdapter()}
+    args = _build_parser().parse_args(["matrix", "--spec", str(spec_path), "--concurrency", "3"])
+    _run_matrix(args, adapters, tmp_path, max_retries=0, retry_delay=0)
+
+    assert len(adapters["glm"].requests) == len(adapters["google"].requests) == 4
+    with (tmp_path / "matrix_summary.csv").open(encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [(row["prompt"], row["provider"], row["seed"]) for row in rows[:4]] == [
+        ("a", "glm", "7"),
+        ("a", "glm", "8"),
+        ("a", "google", "7"),
+        ("a", "google", "8"),
+    ]
+    assert {row["size"] for row in rows} == {"1024x1024"}
+    assert all(row["status"] == "ok" and row["run_dir"] for row in rows)
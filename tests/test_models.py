@@ -1,7 +1,7 @@
 import pytest
 from pydantic import ValidationError
 
-from core.models import GenerationRequest
+from core.models import GenerationRequest, externalize_image_data
 
 
 def test_text_to_image_request_is_valid() -> None:
@@ -44,3 +44,20 @@ def test_negative_prompt_must_not_be_blank() -> None:
             prompt="test",
             negative_prompt="   ",
         )
+
+
+def test_externalize_matches_payloads_without_false_hits() -> None:
+    b64 = "QUJD" * 40
+    short = "aGk="
+    # Same length and samples as b64, different middle-of-sample bytes.
+    near = b64[:60] + "ZZZZ" + b64[64:]
+    images = [f"data:image/png;base64,{b64}", f"data:image/png;base64,{short}", "https://x/a.png"]
+    raw = {"a": b64, "b": [images[0], short], "c": near, "d": "https://x/a.png", "e": ""}
+
+    assert externalize_image_data(raw, images) == {
+        "a": "igt-image:images[0]",
+        "b": ["igt-image:images[0]", "igt-image:images[1]"],
+        "c": near,
+        "d": "https://x/a.png",
+        "e": "",
+    }
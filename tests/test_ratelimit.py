@@ -0,0 +1,133 @@
+import time
+
+import pytest
+
+from adapters.errors import ThrottledError
+from adapters.glm import GLMAdapter
+from core.models import GenerationRequest, GenerationResponse
+from core.ratelimit import (
+    RateLimiter,
+    TokenBucket,
+    parse_quota_headers,
+    parse_rate_limits,
+    parse_retry_after,
+    retry_after_from_response,
+)
+from core.runner import run_with_retry_with_artifacts
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _request() -> GenerationRequest:
+    return GenerationRequest(
+        provider="glm",
+        model="glm-image",
+        task_type="text_to_image",
+        prompt="A city skyline",
+    )
+
+
+def test_token_bucket_paces_to_rate() -> None:
+    bucket = TokenBucket(rate_per_minute=60)
+    assert bucket.wait_time(0.0) == 0
+    bucket.take(0.0)
+    assert bucket.wait_time(0.0) == pytest.approx(1.0)
+    assert bucket.wait_time(0.5) == pytest.approx(0.5)
+    assert bucket.wait_time(1.0) == 0
+
+
+def test_rate_limiter_prefers_model_key_and_pauses_shared_key() -> None:
+    clock = FakeClock()
+    limiter = RateLimiter({"glm": 60, "glm:glm-image": 6}, clock=clock)
+    assert limiter._try_take("glm", "glm-image") == 0
+    assert limiter._try_take("glm", "glm-image") == pytest.approx(10.0)
+    assert limiter._try_take("glm", "cogview-4") == 0
+
+    limiter.record_throttle("glm", "cogview-4", retry_after=30)
+    assert limiter._try_take("glm", "cogview-4") == pytest.approx(30.0)
+    clock.now += 31
+    assert limiter._try_take("glm", "cogview-4") == 0
+    assert limiter.snapshot()["throttled"] == 1
+
+
+def test_rate_limiter_observe_pauses_on_exhausted_quota() -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock)
+    limiter.observe("google", "m", {"x-ratelimit-remaining": "0", "x-ratelimit-reset": "12"})
+    assert limiter._try_take("google", "m") == pytest.approx(12.0)
+
+
+def test_parse_rate_limits() -> None:
+    assert parse_rate_limits("alibaba=60, google:gemini-2.5-flash-image=10") == {
+        "alibaba": 60.0,
+        "google:gemini-2.5-flash-image": 10.0,
+    }
+    with pytest.raises(ValueError, match="provider=RPM"):
+        parse_rate_limits("alibaba")
+    with pytest.raises(ValueError, match="provider=RPM"):
+        parse_rate_limits("alibaba=0")
+
+
+def test_parse_retry_after_and_quota_headers() -> None:
+    assert parse_retry_after("7") == 7.0
+    http_date = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 60))
+    assert 55 <= (parse_retry_after(http_date) or 0) <= 61
+    assert parse_retry_after("soon") is None
+    headers = {"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1m30s"}
+    assert parse_quota_headers(headers) == (0, 90.0)
+    body = {"error": {"details": [{"@type": "RetryInfo", "retryDelay": "30s"}]}}
+    assert retry_after_from_response({}, body) == 30.0
+
+
+def test_adapter_raises_throttled_error_with_retry_after(requests_mock) -> None:
+    adapter = GLMAdapter(
+        api_key="test_key",
+        text2image_url="https://api.example.com/images",
+        image2image_url="https://api.example.com/images",
+    )
+    requests_mock.post(
+        "https://api.example.com/images",
+        json={"error": "too many requests"},
+        status_code=429,
+        headers={"Retry-After": "7"},
+    )
+    with pytest.raises(ThrottledError) as excinfo:
+        adapter.generate(_request())
+    assert excinfo.value.retry_after == 7.0
+    assert "status=429" in str(excinfo.value)
+
+
+def test_run_with_retry_waits_out_throttle_without_spending_retries() -> None:
+    class ThrottledOnceAdapter:
+        calls = 0
+
+        def generate(self, request: GenerationRequest) -> GenerationResponse:
+            self.calls += 1
+            if self.calls == 1:
+                raise ThrottledError("glm API error status=429", status_code=429, retry_after=0.05)
+            return GenerationResponse(
+                request_id="req_ok",
+                provider=request.provider,
+                model=request.model,
+                task_type=request.task_type,
+                images=[],
+                latency_ms=1,
+                raw_response={},
+            )
+
+    limiter = RateLimiter()
+    adapter = ThrottledOnceAdapter()
+    started = time.monotonic()
+    response, _ = run_with_retry_with_artifacts(
+        adapter, _request(), max_retries=0, retry_delay_seconds=0, rate_limiter=limiter
+    )
+    assert response.request_id == "req_ok"
+    assert adapter.calls == 2
+    assert time.monotonic() - started >= 0.04
+    assert limiter.snapshot()["throttled"] == 1
@@ -0,0 +1,134 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+import requests
+from pydantic import ValidationError
+
+from adapters.errors import (
+    AuthError,
+    ClientRequestError,
+    InputError,
+    ThrottledError,
+    TransientError,
+    error_for_status,
+)
+from core.models import GenerationRequest, GenerationResponse
+from core.ratelimit import RateLimiter
+from core.retry import RetryPolicy, classify_error
+from core.runner import run_and_persist, run_with_retry_with_artifacts
+
+
+def _request() -> GenerationRequest:
+    return GenerationRequest(
+        provider="glm", model="glm-image", task_type="text_to_image", prompt="A fox"
+    )
+
+
+def _response(request: GenerationRequest) -> GenerationResponse:
+    return GenerationResponse(
+        request_id="req_ok",
+        provider=request.provider,
+        model=request.model,
+        task_type=request.task_type,
+        images=["data:image/png;base64,aGVsbG8="],
+        latency_ms=1,
+        raw_response={},
+    )
+
+
+class ScriptedAdapter:
+    def __init__(self, errors: List[Exception]) -> None:
+        self.errors = list(errors)
+        self.calls = 0
+
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return _response(request)
+
+
+@pytest.mark.parametrize(
+    ("status", "expected"),
+    [
+        (429, ThrottledError),
+        (401, AuthError),
+        (403, AuthError),
+        (400, ClientRequestError),
+        (404, ClientRequestError),
+        (408, TransientError),
+        (503, TransientError),
+    ],
+)
+def test_error_for_status_maps_classes(status: int, expected: type) -> None:
+    assert type(error_for_status(status, "boom")) is expected
+
+
+def test_classify_error_covers_transport_failures() -> None:
+    assert classify_error(requests.ConnectionError("reset")) == "transient"
+    assert classify_error(TimeoutError("poll timeout")) == "transient"
+    assert classify_error(InputError("missing endpoint")) == "client"
+    assert classify_error(RuntimeError("no image found")) == "unknown"
+    # Plain ValueError/KeyError can come from a truncated body, so they stay retryable.
+    assert classify_error(ValueError("truncated json")) == "unknown"
+    assert classify_error(KeyError("candidates")) == "unknown"
+    with pytest.raises(ValidationError) as info:
+        GenerationRequest(provider="glm", model="m", task_type="image_to_image", prompt="p")
+    assert classify_error(info.value) == "client"
+
+
+def test_backoff_grows_exponentially_within_jitter_bounds() -> None:
+    low = RetryPolicy(base_delay_seconds=1, max_delay_seconds=10, jitter=0.5, rng=lambda: 1.0)
+    high = RetryPolicy(base_delay_seconds=1, max_delay_seconds=10, jitter=0.5, rng=lambda: 0.0)
+    assert [high.backoff(n) for n in range(5)] == [1, 2, 4, 8, 10]
+    assert [low.backoff(n) for n in range(5)] == [0.5, 1, 2, 4, 5]
+    assert high.backoff(0, retry_after=3) == 3
+
+
+def test_auth_error_fails_fast_and_records_timeline() -> None:
+    adapter = ScriptedAdapter([AuthError("glm API error status=401", status_code=401)])
+    attempts: List[Dict[str, Any]] = []
+    with pytest.raises(RuntimeError, match="not retried"):
+        run_with_retry_with_artifacts(
+            adapter,
+            _request(),
+            max_retries=3,
+            retry_delay_seconds=0,
+            rate_limiter=RateLimiter(),
+            attempts=attempts,
+        )
+    assert adapter.calls == 1
+    assert attempts[0]["error_kind"] == "auth"
+    assert attempts[0]["status_code"] == 401
+
+
+def test_deadline_stops_retrying_before_budget_is_spent() -> None:
+    adapter = ScriptedAdapter([TransientError("503")] * 5)
+    policy = RetryPolicy(max_retries=5, base_delay_seconds=1, jitter=0, deadline_seconds=0.5)
+    with pytest.raises(RuntimeError, match="deadline"):
+        run_with_retry_with_artifacts(
+            adapter,
+            _request(),
+            max_retries=5,
+            retry_delay_seconds=1,
+            rate_limiter=RateLimiter(),
+            retry_policy=policy,
+        )
+    assert adapter.calls == 1
+
+
+def test_run_and_persist_writes_attempts_json(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("RETRY_JITTER", "0")
+    adapter = ScriptedAdapter([TransientError("glm API error status=502", status_code=502)])
+    row = run_and_persist(adapter, _request(), tmp_path, max_retries=1, retry_delay_seconds=0)
+    assert row["status"] == "ok"
+
+    payload = json.loads((Path(row["run_dir"]) / "attempts.json").read_text(encoding="utf-8"))
+    outcomes = [(item["attempt"], item["outcome"]) for item in payload["attempts"]]
+    assert outcomes == [(1, "error"), (2, "ok")]
+    assert payload["attempts"][0]["error_kind"] == "transient"
+    assert payload["attempts"][0]["sleep_seconds"] == 0
@@ -1,3 +1,7 @@
+import json
+import shutil
+import threading
+import time
 from pathlib import Path
 
 import pytest
@@ -5,13 +9,18 @@ from PIL import Image
 
 from core.models import GenerationRequest, GenerationResponse
 from core.runner import (
+    SingleFlight,
+    SummaryWriter,
     cleanup_temp_files,
+    parse_provider_limits,
     persist_run,
+    run_requests_concurrently,
     run_with_retry,
     run_with_retry_with_artifacts,
     save_images,
     summarize_results,
 )
+from core.services import load_history_run_details
 
 
 class FlakyAdapter:
@@ -89,17 +98,39 @@ def test_summarize_results_creates_csv(tmp_path: Path) -> None:
     assert '"A ""quoted"" prompt"' in content
 
 
+def test_summary_writer_flushes_rows_before_close(tmp_path: Path) -> None:
+    output = tmp_path / "summary.csv"
+    with SummaryWriter(output, flush_every=2, flush_seconds=3600) as writer:
+        row = {"provider": "glm", "model": "glm-image", "prompt": "a,b", "status": "ok"}
+        writer.write(row)
+        assert output.read_text(encoding="utf-8").count("\n") == 0
+        writer.write(dict(row, prompt="multi\nline"))
+        flushed = output.read_text(encoding="utf-8")
+    assert flushed.startswith("provider,model,prompt,status,run_dir,error\n")
+    assert '"a,b"' in flushed and '"multi\nline"' in flushed
+    assert writer.rows_written == 2
+
+
 def test_save_images_keeps_bin_and_creates_png_alias_by_default(
     tmp_path: Path, monkeypatch: pytest.MonkeyPatch
 ) -> None:
     class DummyResponse:
-        content = b"fake-image-bytes"
+        status_code = 200
+        headers = {"Content-Length": "16"}
 
         @staticmethod
         def raise_for_status() -> None:
             return None
 
-    def _fake_get(url: str, timeout: int):  # noqa: ANN001, ARG001
+        @staticmethod
+        def iter_content(chunk_size: int):  # noqa: ARG004
+            yield b"fake-image-bytes"
+
+        @staticmethod
+        def close() -> None:
+            return None
+
+    def _fake_get(url: str, timeout: int, **kwargs):  # noqa: ANN001, ANN003, ARG001
         return DummyResponse()
 
     monkeypatch.delenv("IGT_BIN_ALIAS_FORMAT", raising=False)
@@ -113,13 +144,22 @@ def test_save_images_keeps_bin_and_creates_jpg_alias_when_configured(
     tmp_path: Path, monkeypatch: pytest.MonkeyPatch
 ) -> None:
     class DummyResponse:
-        content = b"fake-image-bytes"
+        status_code = 200
+        headers = {"Content-Length": "16"}
 
         @staticmethod
         def raise_for_status() -> None:
             return None
 
-    def _fake_get(url: str, timeout: int):  # noqa: ANN001, ARG001
+        @staticmethod
+        def iter_content(chunk_size: int):  # noqa: ARG004
+            yield b"fake-image-bytes"
+
+        @staticmethod
+        def close() -> None:
+            return None
+
+    def _fake_get(url: str, timeout: int, **kwargs):  # noqa: ANN001, ANN003, ARG001
         return DummyResponse()
 
     monkeypatch.setenv("IGT_BIN_ALIAS_FORMAT", "jpg")
@@ -272,3 +312,157 @@ def test_persist_run_skips_preprocessed_inputs_when_disabled(
         preprocessed_inputs=[preprocessed],
     )
     assert not (run_dir / "preprocessed_inputs.json").exists()
+
+
+class ConcurrencyTrackingAdapter:
+    def __init__(self, delay_seconds: float = 0.02) -> None:
+        self.delay_seconds = delay_seconds
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            # Later prompts finish first so ordering has to be restored by the executor.
+            time.sleep(self.delay_seconds / (1 + len(request.prompt)))
+            if request.prompt.startswith("fail"):
+                raise ValueError("bad prompt")
+            return GenerationResponse(
+                request_id=f"req_{request.prompt.replace(' ', '_')}",
+                provider=request.provider,
+                model=request.model,
+                task_type=request.task_type,
+                images=[],
+                latency_ms=1,
+                raw_response={"ok": True},
+            )
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _batch_request(prompt: str, provider: str = "alibaba") -> GenerationRequest:
+    return GenerationRequest(
+        provider=provider,
+        model="qwen-image",
+        task_type="text_to_image",
+        prompt=prompt,
+    )
+
+
+def test_run_requests_concurrently_keeps_input_order(tmp_path: Path) -> None:
+    adapter = ConcurrencyTrackingAdapter()
+    prompts = ["p" * (i + 1) for i in range(12)] + ["fail once"]
+    seen: list[int] = []
+    rows = run_requests_concurrently(
+        adapters={"alibaba": adapter},
+        jobs=(_batch_request(prompt) for prompt in prompts),
+        output_root=tmp_path,
+        max_retries=0,
+        retry_delay_seconds=0,
+        concurrency=4,
+        on_result=lambda index, row: seen.append(index),
+    )
+    assert [row["prompt"] for row in rows] == prompts
+    assert seen == list(range(len(prompts)))
+    assert rows[-1]["status"] == "failed"
+    assert "bad prompt" in rows[-1]["error"]
+    assert all(row["status"] == "ok" for row in rows[:-1])
+    assert adapter.max_active > 1
+
+
+def test_run_requests_concurrently_respects_provider_limits(tmp_path: Path) -> None:
+    alibaba = ConcurrencyTrackingAdapter()
+    google = ConcurrencyTrackingAdapter()
+    jobs = [_batch_request(f"a{i}") for i in range(8)]
+    jobs += [_batch_request(f"g{i}", provider="google") for i in range(8)]
+    rows = run_requests_concurrently(
+        adapters={"alibaba": alibaba, "google": google},
+        jobs=jobs,
+        output_root=tmp_path,
+        max_retries=0,
+        retry_delay_seconds=0,
+        concurrency=6,
+        provider_limits={"alibaba": 2},
+    )
+    assert all(row["status"] == "ok" for row in rows)
+    assert alibaba.max_active <= 2
+    assert google.max_active > 2
+
+
+class GatedImageAdapter:
+    def __init__(self, gate: threading.Event) -> None:
+        self.gate = gate
+        self.calls = 0
+
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        self.calls += 1
+        request_id = f"req_{self.calls}"
+        assert self.gate.wait(timeout=5)
+        return GenerationResponse(
+            request_id=request_id,
+            provider=request.provider,
+            model=request.model,
+            task_type=request.task_type,
+            images=["data:image/png;base64,aGVsbG8="],
+            latency_ms=1,
+            raw_response={},
+        )
+
+
+@pytest.mark.parametrize("blob_store", ["off", "on"])
+def test_identical_seeded_requests_share_one_call(
+    tmp_path: Path, monkeypatch, blob_store: str
+) -> None:
+    monkeypatch.setenv("IGT_BLOB_STORE", blob_store)
+    gate = threading.Event()
+    adapter = GatedImageAdapter(gate)
+    flights = SingleFlight("seeded")
+    seeded = _batch_request("same").model_copy(update={"seed": 7})
+    threading.Timer(0.2, gate.set).start()
+    rows = run_requests_concurrently(
+        adapters={"alibaba": adapter},
+        jobs=[seeded, seeded, seeded, _batch_request("same")],
+        output_root=tmp_path,
+        max_retries=0,
+        retry_delay_seconds=0,
+        concurrency=4,
+        flights=flights,
+    )
+    assert all(row["status"] == "ok" for row in rows)
+    # The unseeded duplicate is a separate sample, so it gets its own call.
+    assert adapter.calls == 2
+    assert flights.stats == {"calls": 1, "shared": 2}
+    assert len({row["run_dir"] for row in rows}) == 4
+
+    leader = Path(rows[0]["run_dir"])
+    for row in rows[1:3]:
+        shared_dir = Path(row["run_dir"])
+        shared = json.loads((shared_dir / "saved_images.json").read_text("utf-8"))
+        assert shared["shared_from"] == str(leader)
+        assert [Path(path).parent for path in shared["saved_files"]] == [shared_dir / "images"]
+    # Followers keep their images when the leader's run is deleted.
+    shutil.rmtree(leader)
+    saved = load_history_run_details(Path(rows[1]["run_dir"]))["saved_images"]
+    assert [Path(path).read_bytes() for path in saved["saved_files"]] == [b"hello"]
+    assert ("blobs" in saved) == (blob_store == "on")
+
+
+def test_single_flight_from_env(monkeypatch) -> None:
+    monkeypatch.setenv("IGT_COALESCE", "off")
+    assert SingleFlight.from_env() is None
+    assert SingleFlight.from_env("all").key(_batch_request("x")) is not None
+    with pytest.raises(ValueError, match="coalesce mode"):
+        SingleFlight("sometimes")
+
+
+def test_parse_provider_limits() -> None:
+    assert parse_provider_limits("alibaba=2, Google=4") == {"alibaba": 2, "google": 4}
+    assert parse_provider_limits("") == {}
+    with pytest.raises(ValueError, match="provider=N"):
+        parse_provider_limits("alibaba")
+    with pytest.raises(ValueError, match="provider=N"):
+        parse_provider_limits("alibaba=0")
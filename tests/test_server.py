@@ -0,0 +1,187 @@
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from core.models import GenerationRequest, GenerationResponse
+from core.services.jobs import JOB_CANCELLED, JOB_OK, JobQueue, run_jobs
+from ui.server import JobServer
+
+
+class RecordingAdapter:
+    def __init__(self, gate: threading.Event) -> None:
+        self.gate = gate
+        self.prompts = []
+
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        assert self.gate.wait(timeout=5)
+        self.prompts.append(request.prompt)
+        return GenerationResponse(
+            request_id=f"req_{request.prompt}",
+            provider=request.provider,
+            model=request.model,
+            task_type=request.task_type,
+            images=[],
+            latency_ms=1,
+            raw_response={},
+        )
+
+
+def _request(prompt: str) -> GenerationRequest:
+    return GenerationRequest(
+        provider="glm", model="glm-image", task_type="text_to_image", prompt=prompt
+    )
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_job_queue_runs_higher_priority_first_and_cancels(tmp_path: Path) -> None:
+    gate = threading.Event()
+    adapter = RecordingAdapter(gate)
+    queue = JobQueue({"glm": adapter}, tmp_path, workers=1, max_retries=0)
+    queue.start()
+    try:
+        first = queue.submit(_request("first"))
+        _wait_for(lambda: first.status == "running")
+        low = queue.submit(_request("low"), priority=0)
+        dropped = queue.submit(_request("dropped"), priority=5)
+        high = queue.submit(_request("high"), priority=9)
+        assert queue.cancel(dropped.id)
+        gate.set()
+        _wait_for(lambda: low.status == JOB_OK)
+    finally:
+        queue.stop(timeout=5)
+    assert adapter.prompts == ["first", "high", "low"]
+    assert dropped.status == JOB_CANCELLED
+    assert queue.result(high.id)["request"]["prompt"] == "high"
+
+
+
+class CountingAdapter:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+        return GenerationResponse(
+            request_id=f"req_{request.prompt}",
+            provider=request.provider,
+            model=request.model,
+            task_type=request.task_type,
+            images=[],
+            latency_ms=1,
+            raw_response={},
+        )
+
+
+def test_run_jobs_reports_in_order_within_provider_limits(tmp_path: Path) -> None:
+    capped = CountingAdapter()
+    free = CountingAdapter()
+    queue = JobQueue(
+        {"glm": capped, "google": free},
+        tmp_path,
+        workers=4,
+        max_retries=0,
+        provider_limits={"glm": 1},
+    )
+    requests_ = [
+        GenerationRequest(
+            provider="glm" if index % 2 else "google",
+            model="m",
+            task_type="text_to_image",
+            prompt=f"p{index}",
+        )
+        for index in range(12)
+    ]
+    seen = []
+    queue.start()
+    try:
+        rows = run_jobs(queue, iter(requests_), on_result=lambda index, _row: seen.append(index))
+    finally:
+        queue.stop(timeout=5)
+    assert [row["prompt"] for row in rows] == [f"p{index}" for index in range(12)]
+    assert all(row["status"] == JOB_OK for row in rows)
+    assert seen == list(range(12))
+    assert capped.peak == 1
+    assert free.peak > 1
+
+
+def test_job_that_raises_fails_without_killing_the_worker(tmp_path: Path, monkeypatch) -> None:
+    gate = threading.Event()
+    gate.set()
+    queue = JobQueue(
+        {"glm": RecordingAdapter(gate)},
+        tmp_path,
+        workers=1,
+        max_retries=0,
+        provider_limits={"glm": 1},
+    )
+
+    def _explode(*args, **kwargs):  # noqa: ANN002, ANN003, ARG001
+        raise OSError("disk full")
+
+    monkeypatch.setattr("core.services.jobs.run_and_persist", _explode)
+    queue.start()
+    try:
+        broken = queue.submit(_request("broken"))
+        assert queue.wait(broken, timeout=5)
+        assert (broken.status, broken.error) == ("failed", "disk full")
+        monkeypatch.undo()
+        rows = run_jobs(queue, [_request("after")])
+    finally:
+        queue.stop(timeout=5)
+    # The same worker, and the glm slot the failed job held, are free again.
+    assert [row["status"] for row in rows] == [JOB_OK]
+
+def test_job_server_submit_status_and_result(tmp_path: Path) -> None:
+    gate = threading.Event()
+    gate.set()
+    queue = JobQueue({"glm": RecordingAdapter(gate)}, tmp_path, workers=2, max_retries=0)
+    server = JobServer(("127.0.0.1", 0), queue)
+    queue.start()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        created = requests.post(
+            f"{base}/jobs",
+            json={
+                "provider": "glm",
+                "model": "glm-image",
+                "task_type": "text_to_image",
+                "prompt": "a fox",
+                "priority": 3,
+            },
+            timeout=5,
+        )
+        assert created.status_code == 202
+        job_id = created.json()["id"]
+        _wait_for(
+            lambda: requests.get(f"{base}/jobs/{job_id}", timeout=5).json()["status"] == JOB_OK
+        )
+
+        result = requests.get(f"{base}/jobs/{job_id}/result", timeout=5).json()
+        assert result["request"]["size"] == "1024x1024"
+        assert Path(result["run_dir"]).parent == tmp_path
+
+        bad = requests.post(f"{base}/jobs", json={"provider": "glm"}, timeout=5)
+        assert bad.status_code == 400
+        assert requests.get(f"{base}/jobs/missing", timeout=5).status_code == 404
+        assert requests.get(f"{base}/health", timeout=5).json()["jobs"] == {"ok": 1}
+    finally:
+        server.shutdown()
+        server.server_close()
+        queue.stop(timeout=5)
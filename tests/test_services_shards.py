@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+from core.models import GenerationRequest, GenerationResponse
+from core.services import shards
+from core.services.shards import Lease, ShardTable, run_shard_worker
+
+
+class CountingAdapter:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.prompts = []
+
+    def generate(self, request: GenerationRequest) -> GenerationResponse:
+        with self.lock:
+            self.prompts.append(request.prompt)
+        time.sleep(0.005)
+        return GenerationResponse(
+            request_id=f"req_{request.prompt}",
+            provider=request.provider,
+            model=request.model,
+            task_type=request.task_type,
+            images=[],
+            latency_ms=1,
+            raw_response={},
+        )
+
+
+def _requests(count: int):
+    return (
+        GenerationRequest(
+            provider="glm", model="glm-image", task_type="text_to_image", prompt=f"p{index}"
+        )
+        for index in range(count)
+    )
+
+
+def test_workers_split_table_without_running_a_job_twice(tmp_path: Path) -> None:
+    table = ShardTable.create(tmp_path, _requests(23), chunk_size=4)
+    assert table.info()["chunks"] == 6
+    adapter = CountingAdapter()
+    workers = [
+        threading.Thread(
+            target=run_shard_worker,
+            args=(ShardTable.open(tmp_path, table.table_id), {"glm": adapter}, 0, 0),
+            kwargs={"worker_id": f"node-{number}", "concurrency": 2, "lease_seconds": 3},
+        )
+        for number in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+
+    assert sorted(adapter.prompts) == sorted(f"p{index}" for index in range(23))
+    status = table.status()
+    assert status["chunks"] == {"done": 6, "leased": 0, "pending": 0}
+    assert status["jobs"] == {"ok": 23, "not_run": 0}
+    assert [row["prompt"] for row in table.rows()] == [f"p{index}" for index in range(23)]
+
+
+def test_expired_lease_is_reclaimed_and_finished_jobs_skipped(tmp_path: Path) -> None:
+    table = ShardTable.create(tmp_path, _requests(3), chunk_size=3)
+    lease_path = table.dir / "leases" / "000000.lease"
+    # A crashed node: it finished p0, then stopped renewing its lease.
+    lease_path.write_text(
+        json.dumps({"owner": "dead-node", "expires_at": time.time() - 1}), encoding="utf-8"
+    )
+    (request,) = [req for index, req in table.load_chunk(0) if index == 0]
+    table.record_result(0, 0, request, {"prompt": "p0", "status": "ok", "run_dir": "x"})
+
+    adapter = CountingAdapter()
+    counts = run_shard_worker(table, {"glm": adapter}, 0, 0, worker_id="node-b")
+    assert sorted(adapter.prompts) == ["p1", "p2"]
+    assert counts == {"ok": 2}
+    assert table.is_done(0)
+    assert not lease_path.exists()
+
+
+def test_live_lease_is_left_alone(tmp_path: Path) -> None:
+    table = ShardTable.create(tmp_path, _requests(2), chunk_size=2)
+    assert table.lease(0, "node-a", ttl_seconds=60).acquire()
+    assert Lease.holder(table.dir / "leases" / "000000.lease") == "node-a"
+
+    adapter = CountingAdapter()
+    counts = run_shard_worker(table, {"glm": adapter}, 0, 0, worker_id="node-b", wait=False)
+    assert counts == {}
+    assert adapter.prompts == []
+    assert table.status()["chunks"]["leased"] == 1
+
+
+def test_late_renew_does_not_overwrite_a_takeover(tmp_path: Path) -> None:
+    table = ShardTable.create(tmp_path, _requests(1), chunk_size=1)
+    lease_path = table.dir / "leases" / "000000.lease"
+    # node-a still thinks it is in time; node-b's clock already sees the lease expired.
+    node_a = Lease(lease_path, "node-a", ttl_seconds=10, clock=lambda: 1000.0)
+    node_b = Lease(lease_path, "node-b", ttl_seconds=10, clock=lambda: 1020.0)
+    assert node_a.acquire()
+    assert node_b.acquire()
+
+    assert not node_a.renew()
+    assert Lease.holder(lease_path, now=1021.0) == "node-b"
+    assert node_b.renew()
+
+
+def test_acquire_during_renew_sees_a_live_lease(tmp_path: Path, monkeypatch) -> None:
+    lease_path = tmp_path / "000000.lease"
+    node_a = Lease(lease_path, "node-a", ttl_seconds=10, clock=lambda: 1000.0)
+    node_b = Lease(lease_path, "node-b", ttl_seconds=10, clock=lambda: 1005.0)
+    assert node_a.acquire()
+
+    real_replace = shards.os.replace
+    attempts = []
+
+    def _replace_after_acquire(src, dst):  # noqa: ANN001
+        # node-b tries to take the chunk while node-a is mid-renew.
+        attempts.append((lease_path.exists(), node_b.acquire()))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(shards.os, "replace", _replace_after_acquire)
+    assert node_a.renew()
+    assert attempts == [(True, False)]
+    assert Lease.holder(lease_path, now=1005.0) == "node-a"
+
+
+def test_renew_refuses_past_own_expiry_and_torn_lease_uses_table_ttl(tmp_path: Path) -> None:
+    lease_path = tmp_path / "000000.lease"
+    now = [1000.0]
+    lease = Lease(lease_path, "node-a", ttl_seconds=10, clock=lambda: now[0])
+    assert lease.acquire()
+    now[0] = 1011.0
+    assert not lease.renew()
+
+    lease_path.write_text("", encoding="utf-8")
+    mtime = lease_path.stat().st_mtime
+    assert Lease.holder(lease_path, now=mtime + 5, ttl_seconds=10) == ""
+    assert Lease.holder(lease_path, now=mtime + 11, ttl_seconds=10) is None
@@ -0,0 +1,148 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from adapters.alibaba import AlibabaAdapter
+from core.models import GenerationRequest
+from core.services.tasks import (
+    STALE_LOCK_SECONDS,
+    TaskLedger,
+    TaskLedgerBusyError,
+    collect_tasks,
+    submit_tasks,
+)
+
+TASKS_URL = "https://api.example.com/api/v1/tasks"
+
+
+def _adapter() -> AlibabaAdapter:
+    return AlibabaAdapter(
+        api_key="test_key",
+        text2image_url="https://api.example.com/sync",
+        image2image_url="https://api.example.com/sync",
+        async_mode=True,
+        async_url="https://api.example.com/async",
+    )
+
+
+def _request(prompt: str) -> GenerationRequest:
+    return GenerationRequest(
+        provider="alibaba", model="qwen-image", task_type="text_to_image", prompt=prompt
+    )
+
+
+def test_submit_then_collect_persists_finished_tasks_once(tmp_path: Path, requests_mock) -> None:
+    requests_mock.post(
+        "https://api.example.com/async",
+        [
+            {"json": {"output": {"task_id": "task_1"}}},
+            {"json": {"output": {"task_id": "task_2"}}},
+        ],
+    )
+    ledger = TaskLedger(tmp_path)
+    rows = submit_tasks(_adapter(), [_request("a"), _request("b")], ledger)
+    assert [row["task_id"] for row in rows] == ["task_1", "task_2"]
+    assert len(ledger.pending()) == 2
+
+    requests_mock.get(
+        f"{TASKS_URL}/task_1",
+        json={
+            "output": {"task_status": "SUCCEEDED"},
+            "result": {"image_url": "data:image/png;base64,aGVsbG8="},
+        },
+    )
+    requests_mock.get(f"{TASKS_URL}/task_2", json={"output": {"task_status": "RUNNING"}})
+    counts = collect_tasks(_adapter(), ledger, tmp_path)
+    assert counts == {"collected": 1, "failed": 0, "pending": 1}
+
+    tasks = ledger.load()
+    run_dir = Path(tasks["task_1"]["run_dir"])
+    assert json.loads((run_dir / "request.json").read_text(encoding="utf-8"))["prompt"] == "a"
+
+    # A second pass only polls what is still pending.
+    requests_mock.get(
+        f"{TASKS_URL}/task_2",
+        json={"output": {"task_status": "FAILED", "message": "bad prompt"}},
+    )
+    counts = collect_tasks(_adapter(), ledger, tmp_path)
+    assert counts == {"collected": 0, "failed": 1, "pending": 0}
+    assert ledger.load()["task_2"]["status"] == "failed"
+    assert collect_tasks(_adapter(), ledger, tmp_path) == {
+        "collected": 0,
+        "failed": 0,
+        "pending": 0,
+    }
+
+
+def test_collect_keeps_task_pending_on_server_error(tmp_path: Path, requests_mock) -> None:
+    requests_mock.post("https://api.example.com/async", json={"output": {"task_id": "task_1"}})
+    ledger = TaskLedger(tmp_path)
+    submit_tasks(_adapter(), [_request("a")], ledger)
+    requests_mock.get(f"{TASKS_URL}/task_1", status_code=503, json={"message": "busy"})
+    counts = collect_tasks(_adapter(), ledger, tmp_path)
+    assert counts["pending"] == 1
+    assert ledger.load()["task_1"]["status"] == "pending"
+
+
+def test_collect_keeps_finished_task_pending_when_saving_fails(
+    tmp_path: Path, requests_mock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    requests_mock.post("https://api.example.com/async", json={"output": {"task_id": "task_1"}})
+    ledger = TaskLedger(tmp_path)
+    submit_tasks(_adapter(), [_request("a")], ledger)
+    requests_mock.get(
+        f"{TASKS_URL}/task_1",
+        json={
+            "output": {"task_status": "SUCCEEDED"},
+            "result": {"image_url": "data:image/png;base64,aGVsbG8="},
+        },
+    )
+
+    def _disk_full(*args, **kwargs):  # noqa: ANN002, ANN003, ARG001
+        raise OSError("No space left on device")
+
+    with monkeypatch.context() as patch:
+        patch.setattr("core.services.tasks.persist_run", _disk_full)
+        counts = collect_tasks(_adapter(), ledger, tmp_path)
+    assert counts["pending"] == 1
+    task = ledger.load()["task_1"]
+    assert (task["status"], task["error"]) == ("pending", "No space left on device")
+
+    counts = collect_tasks(_adapter(), ledger, tmp_path)
+    assert counts["collected"] == 1
+
+
+def test_collect_refuses_to_run_twice_at_once(tmp_path: Path) -> None:
+    ledger = TaskLedger(tmp_path)
+    with ledger.collect_lock():
+        with pytest.raises(TaskLedgerBusyError):
+            collect_tasks(_adapter(), ledger, tmp_path)
+    assert not ledger.lock_path.exists()
+
+
+def test_collect_lock_is_refreshed_and_only_stale_locks_are_taken_over(tmp_path: Path) -> None:
+    first = TaskLedger(tmp_path)
+    second = TaskLedger(tmp_path)
+    long_ago = time.time() - STALE_LOCK_SECONDS - 10
+    first_lock = first.collect_lock()
+    first_lock.__enter__()
+    # A long collect: its lock is old, but each persisted task refreshes it.
+    os.utime(first.lock_path, (long_ago, long_ago))
+    first.touch_lock()
+    with pytest.raises(TaskLedgerBusyError):
+        with second.collect_lock():
+            pass
+
+    # The first collect hung: its lock goes stale and the second one takes it over.
+    os.utime(first.lock_path, (long_ago, long_ago))
+    second_lock = second.collect_lock()
+    second_lock.__enter__()
+    first_lock.__exit__(None, None, None)
+    # The first holder's exit does not remove a lock it no longer owns.
+    assert second.lock_path.exists()
+    second_lock.__exit__(None, None, None)
+    assert not second.lock_path.exists()
+    assert list(second.dir.glob("*.stale")) == []
@@ -0,0 +1,118 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from adapters.errors import ThrottledError
+from adapters.task_tracker import CompletionHistory, PollPending, PollSchedule, TaskTracker
+
+
+def test_tracker_resolves_many_tasks_from_a_bounded_pool() -> None:
+    tracker = TaskTracker()
+    poll_threads = set()
+    counts = {}
+
+    def _poll_for(task_id: str):
+        def _poll():
+            poll_threads.add(threading.get_ident())
+            counts[task_id] = counts.get(task_id, 0) + 1
+            return {"task_id": task_id} if counts[task_id] >= 3 else None
+
+        return _poll
+
+    futures = [
+        tracker.track(f"t{i}", _poll_for(f"t{i}"), timeout_seconds=5, interval_seconds=0.01)
+        for i in range(20)
+    ]
+    results = [future.result(timeout=5) for future in futures]
+    assert [item["task_id"] for item in results] == [f"t{i}" for i in range(20)]
+    assert len(poll_threads) <= tracker.poll_workers
+    assert tracker.snapshot()["completed"] == 20
+    assert tracker.pending() == 0
+
+
+def test_tracker_backs_off_on_throttle_and_propagates_failure() -> None:
+    tracker = TaskTracker()
+    calls = {"count": 0}
+
+    def _poll():
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise ThrottledError("429", status_code=429, retry_after=0.05)
+        raise RuntimeError("alibaba async task failed: {}")
+
+    future = tracker.track("t1", _poll, timeout_seconds=5, interval_seconds=0)
+    with pytest.raises(RuntimeError, match="task failed"):
+        future.result(timeout=5)
+    assert calls["count"] == 2
+
+
+def test_tracker_times_out_pending_task() -> None:
+    tracker = TaskTracker()
+    future = tracker.track(
+        "t1", lambda: None, timeout_seconds=0.05, interval_seconds=0.01, label="alibaba async task"
+    )
+    with pytest.raises(TimeoutError, match="alibaba async task poll timeout"):
+        future.result(timeout=5)
+    assert tracker.snapshot()["timed_out"] == 1
+
+
+def test_poll_schedule_grows_toward_cap_and_seeds_from_history() -> None:
+    schedule = PollSchedule(initial_seconds=1, backoff=2)
+    assert [schedule.next_delay(10, n) for n in range(6)] == [1, 2, 4, 8, 10, 10]
+    assert schedule.first_delay(10, None) == 1
+    assert schedule.first_delay(10, 30) == 24
+    assert schedule.first_delay(0, 30) == 0
+
+
+def test_tracker_honours_pending_hint_and_records_history(tmp_path: Path) -> None:
+    history = CompletionHistory(tmp_path / "poll_history.json")
+    tracker = TaskTracker(schedule=PollSchedule(initial_seconds=0.01), history=history)
+    seen = []
+
+    def _poll():
+        seen.append(time.monotonic())
+        if len(seen) == 1:
+            return PollPending(retry_after=0.2)
+        return {"done": True}
+
+    future = tracker.track(
+        "t1", _poll, timeout_seconds=5, interval_seconds=0.05, history_key="alibaba:wanx-v1"
+    )
+    assert future.result(timeout=5) == {"done": True}
+    assert seen[1] - seen[0] >= 0.19
+
+    reloaded = CompletionHistory(tmp_path / "poll_history.json")
+    assert reloaded.expected("alibaba:wanx-v1") == pytest.approx(
+        history.expected("alibaba:wanx-v1")
+    )
+    assert reloaded.expected("alibaba:wanx-v1") >= 0.2
+
+
+def test_stalled_poll_does_not_delay_other_tasks() -> None:
+    tracker = TaskTracker(poll_workers=2)
+    release = threading.Event()
+
+    def _stalled():
+        release.wait(timeout=5)
+        return {"task_id": "slow"}
+
+    counts = {"fast": 0}
+
+    def _fast():
+        counts["fast"] += 1
+        return {"task_id": "fast"} if counts["fast"] >= 3 else None
+
+    slow = tracker.track("slow", _stalled, timeout_seconds=10, interval_seconds=0)
+    time.sleep(0.05)  # let the slow poll start
+    started = time.monotonic()
+    fast = tracker.track("fast", _fast, timeout_seconds=10, interval_seconds=0.01)
+    assert fast.result(timeout=2) == {"task_id": "fast"}
+    assert time.monotonic() - started < 1
+    assert not slow.done()
+    assert tracker.pending() == 1
+
+    release.set()
+    assert slow.result(timeout=5) == {"task_id": "slow"}
+    assert tracker.pending() == 0
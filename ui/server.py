@@ -0,0 +1,121 @@
+import json
+import logging
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from pydantic import ValidationError
+
+from core.models import GenerationRequest
+from core.services import resolve_request_size
+from core.services.jobs import JobNotFoundError, JobQueue
+
+LOGGER = logging.getLogger("image_gen_test_tool")
+MAX_BODY_BYTES = 32 * 1024 * 1024
+
+
+class JobServer(ThreadingHTTPServer):
+    """Local HTTP front end for a ``JobQueue``.
+
+    POST /jobs            submit a GenerationRequest (plus optional "priority")
+    GET  /jobs[?status=]  list jobs
+    GET  /jobs/{id}       job status
+    GET  /jobs/{id}/result  saved run details once the job is ok
+    DELETE /jobs/{id}     cancel a queued job
+    GET  /health          worker count and job counts
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], queue: JobQueue):
+        super().__init__(address, _JobRequestHandler)
+        self.queue = queue
+
+
+class _JobRequestHandler(BaseHTTPRequestHandler):
+    server: JobServer
+
+    def do_GET(self) -> None:
+        path, query = self._route()
+        queue = self.server.queue
+        if path == ["health"]:
+            self._send(HTTPStatus.OK, {"status": "ok", **queue.snapshot()})
+        elif path == ["jobs"]:
+            status = query.get("status", [None])[0]
+            self._send(HTTPStatus.OK, {"jobs": [job.to_dict() for job in queue.list(status)]})
+        elif len(path) == 2 and path[0] == "jobs":
+            self._with_job(lambda: queue.get(path[1]).to_dict())
+        elif len(path) == 3 and path[0] == "jobs" and path[2] == "result":
+            self._with_job(lambda: queue.result(path[1]))
+        else:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"no route: GET {self.path}"})
+
+    def do_POST(self) -> None:
+        path, _ = self._route()
+        if path != ["jobs"]:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"no route: POST {self.path}"})
+            return
+        try:
+            document = self._read_json()
+            priority = int(document.pop("priority", 0))
+            request = GenerationRequest(**document)
+            if request.size is None:
+                size = resolve_request_size(request.task_type, None, request.input_image)
+                request = request.model_copy(update={"size": size})
+            job = self.server.queue.submit(request, priority=priority)
+        except (ValidationError, ValueError, TypeError) as exc:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+            return
+        self._send(HTTPStatus.ACCEPTED, job.to_dict())
+
+    def do_DELETE(self) -> None:
+        path, _ = self._route()
+        if len(path) != 2 or path[0] != "jobs":
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"no route: DELETE {self.path}"})
+            return
+        queue = self.server.queue
+        try:
+            cancelled = queue.cancel(path[1])
+        except JobNotFoundError:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"job not found: {path[1]}"})
+            return
+        status = HTTPStatus.OK if cancelled else HTTPStatus.CONFLICT
+        self._send(status, queue.get(path[1]).to_dict())
+
+    def log_message(self, format: str, *args: Any) -> None:
+        LOGGER.debug("serve: " + format, *args)
+
+    def _with_job(self, fn) -> None:
+        try:
+            payload = fn()
+        except JobNotFoundError as exc:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"job not found: {exc.args[0]}"})
+            return
+        except ValueError as exc:
+            self._send(HTTPStatus.CONFLICT, {"error": str(exc)})
+            return
+        self._send(HTTPStatus.OK, payload)
+
+    def _route(self) -> Tuple[list, Dict[str, list]]:
+        parts = urlsplit(self.path)
+        return [item for item in parts.path.split("/") if item], parse_qs(parts.query)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            raise ValueError("request body is empty")
+        if length > MAX_BODY_BYTES:
+            raise ValueError(f"request body exceeds {MAX_BODY_BYTES} bytes")
+        document = json.loads(self.rfile.read(length))
+        if not isinstance(document, dict):
+            raise ValueError("request body must be a JSON object")
+        return document
+
+    def _send(self, status: HTTPStatus, payload: Optional[Dict[str, Any]]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
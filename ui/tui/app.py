@@ -36,12 +36,21 @@ from textual.widgets import (
     TextArea,
 )
 
-from core.io_utils import ensure_dir, parse_input_image, read_json_file
+from adapters.task_tracker import PollPending, get_task_tracker
+from core.circuit import CircuitBreakerRegistry
+from core.io_utils import ensure_dir, iter_prompts, parse_input_image, read_json_file
 from core.models import TASK_IMAGE2IMAGE, TASK_TEXT2IMAGE, GenerationRequest
+from core.ratelimit import parse_retry_after
 from core.runner import (
     PERSIST_PREPROCESSED_INPUT_ENV,
+    SingleFlight,
+    SummaryWriter,
     cleanup_temp_files,
+    parse_provider_limits,
     persist_run,
+    resolve_batch_concurrency,
+    resolve_batch_executor,
+    run_batch_requests,
     run_with_retry_with_artifacts,
     summarize_results,
 )
@@ -57,6 +66,7 @@ from core.services import (
     resolve_request_size,
 )
 from core.services.generation import build_adapters_from_env
+from core.services.jobs import JobQueue, run_jobs
 
 RUN_MODE_SINGLE = "single"
 RUN_MODE_COMPARE = "compare"
@@ -1590,8 +1600,8 @@ class ImageGenTuiApp(App[None]):
         }
         poll_interval = int(os.getenv("ALIBABA_POLL_INTERVAL_SECONDS", "5"))
         poll_timeout = int(os.getenv("ALIBABA_POLL_TIMEOUT_SECONDS", "300"))
-        deadline = time.monotonic() + poll_timeout
-        while time.monotonic() < deadline:
+
+        def _poll() -> Any:
             poll_resp = requests.get(poll_url, headers=poll_headers, timeout=120)
             poll_raw = self._json_or_text(poll_resp)
             if not poll_resp.ok:
@@ -1601,20 +1611,28 @@ class ImageGenTuiApp(App[None]):
                 )
             status = self._extract_task_status(poll_raw)
             if status in {"SUCCEEDED", "SUCCESS"}:
-                latency_ms = int((time.perf_counter() - started) * 1000)
-                videos = self._extract_video_urls(poll_raw)
-                return {
-                    "request_id": task_id,
-                    "create_task": create_raw,
-                    "task_result": poll_raw,
-                    "videos": videos,
-                    "latency_ms": latency_ms,
-                }
+                return poll_raw
             if status in {"FAILED", "CANCELED", "CANCELLED"}:
                 raise RuntimeError(f"alibaba video task failed: {poll_raw}")
-            time.sleep(max(1, poll_interval))
-
-        raise TimeoutError(f"alibaba video task poll timeout after {poll_timeout}s")
+            return PollPending(parse_retry_after(poll_resp.headers.get("Retry-After")))
+
+        # Same shared poller as the image adapter; this worker only waits on the future.
+        poll_raw = get_task_tracker().track(
+            task_id,
+            _poll,
+            timeout_seconds=poll_timeout,
+            interval_seconds=max(1, poll_interval),
+            label="alibaba video task",
+            history_key=f"alibaba:video:{payload.get('model', '')}",
+        ).result()
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        return {
+            "request_id": task_id,
+            "create_task": create_raw,
+            "task_result": poll_raw,
+            "videos": self._extract_video_urls(poll_raw),
+            "latency_ms": latency_ms,
+        }
 
     def _persist_video_run(self, inputs: Dict[str, Any], response_payload: Dict[str, Any]) -> Path:
         output_root = ensure_dir(self.output_root)
@@ -2449,11 +2467,14 @@ class ImageGenTuiApp(App[None]):
     def _run_single_request(self, request: GenerationRequest) -> str:
         adapters = build_adapters_from_env()
         output_root = ensure_dir(self.output_root)
+        adapter = adapters[request.provider]
+        attempts: List[Dict[str, Any]] = []
         response, preprocessed_inputs = run_with_retry_with_artifacts(
-            adapter=adapters[request.provider],
+            adapter=adapter,
             request=request,
             max_retries=int(os.getenv("MAX_RETRIES", "1")),
             retry_delay_seconds=int(os.getenv("RETRY_DELAY_SECONDS", "2")),
+            attempts=attempts,
         )
         try:
             run_dir = persist_run(
@@ -2461,6 +2482,8 @@ class ImageGenTuiApp(App[None]):
                 request,
                 response,
                 preprocessed_inputs=preprocessed_inputs,
+                session=getattr(adapter, "session", None),
+                attempts=attempts,
             )
         finally:
             cleanup_temp_files(preprocessed_inputs)
@@ -2475,53 +2498,28 @@ class ImageGenTuiApp(App[None]):
             (cast(str, inputs["provider"]), cast(str, inputs["model"])),
             (cast(str, inputs["provider_b"]), cast(str, inputs["model_b"])),
         ]
-        rows: List[Dict[str, str]] = []
-        run_dirs: List[str] = []
-        for provider, model in targets:
-            request = self._build_request(
+        compare_requests = [
+            self._build_request(
                 inputs=inputs,
                 provider=provider,
                 model=model,
                 prompt=cast(str, inputs["prompt"]),
             )
-            try:
-                response, preprocessed_inputs = run_with_retry_with_artifacts(
-                    adapter=adapters[provider],
-                    request=request,
-                    max_retries=max_retries,
-                    retry_delay_seconds=retry_delay,
-                )
-                try:
-                    run_dir = persist_run(
-                        output_root,
-                        request,
-                        response,
-                        preprocessed_inputs=preprocessed_inputs,
-                    )
-                finally:
-                    cleanup_temp_files(preprocessed_inputs)
-                run_dirs.append(str(run_dir))
-                rows.append(
-                    {
-                        "provider": provider,
-                        "model": model,
-                        "prompt": request.prompt,
-                        "status": "ok",
-                        "run_dir": str(run_dir),
-                        "error": "",
-                    }
-                )
-            except Exception as exc:  # noqa: BLE001
-                rows.append(
-                    {
-                        "provider": provider,
-                        "model": model,
-                        "prompt": request.prompt,
-                        "status": "failed",
-                        "run_dir": "",
-                        "error": str(exc),
-                    }
-                )
+            for provider, model in targets
+        ]
+        queue = JobQueue(
+            adapters,
+            output_root,
+            workers=len(compare_requests),
+            max_retries=max_retries,
+            retry_delay_seconds=retry_delay,
+        )
+        queue.start()
+        try:
+            rows = run_jobs(queue, compare_requests)
+        finally:
+            queue.stop()
+        run_dirs = [row["run_dir"] for row in rows if row["status"] == "ok"]
 
         summary = output_root / "compare_summary.csv"
         summarize_results(rows, summary)
@@ -2538,75 +2536,76 @@ class ImageGenTuiApp(App[None]):
         output_root = ensure_dir(self.output_root)
         max_retries = int(os.getenv("MAX_RETRIES", "1"))
         retry_delay = int(os.getenv("RETRY_DELAY_SECONDS", "2"))
-        prompts = self._read_prompts_file(cast(str, inputs["prompts_file"]))
-        rows: List[Dict[str, str]] = []
-        run_dirs: List[str] = []
+        prompts = iter_prompts(cast(str, inputs["prompts_file"]))
         provider = cast(str, inputs["provider"])
         model = cast(str, inputs["model"])
-        for prompt in prompts:
-            request = self._build_request(
+        batch_requests = (
+            self._build_request(
                 inputs=inputs,
                 provider=provider,
                 model=model,
                 prompt=prompt,
             )
-            try:
-                response, preprocessed_inputs = run_with_retry_with_artifacts(
-                    adapter=adapters[provider],
-                    request=request,
+            for prompt in prompts
+        )
+        summary = output_root / "batch_summary.csv"
+        counts = {"ok": 0, "failed": 0, "parked": 0}
+        run_dirs: List[str] = []
+
+        def _on_result(_index: int, row: Dict[str, str]) -> None:
+            status = row["status"] if row["status"] in counts else "failed"
+            counts[status] += 1
+            if status == "ok":
+                run_dirs.append(row["run_dir"])
+            writer.write(row)
+
+        concurrency = resolve_batch_concurrency()
+        provider_limits = parse_provider_limits(None)
+        breakers = CircuitBreakerRegistry.from_env()
+        flights = SingleFlight.from_env()
+        executor = resolve_batch_executor()
+        with SummaryWriter(summary) as writer:
+            if executor == "async":
+                # Coroutines on an event loop of its own, inside this worker thread;
+                # JobQueue is thread-based, so it has no equivalent.
+                run_batch_requests(
+                    adapters=adapters,
+                    jobs=batch_requests,
+                    output_root=output_root,
+                    max_retries=max_retries,
+                    retry_delay_seconds=retry_delay,
+                    concurrency=concurrency,
+                    provider_limits=provider_limits,
+                    breakers=breakers,
+                    on_result=_on_result,
+                    collect_rows=False,
+                    flights=flights,
+                    executor=executor,
+                )
+            else:
+                queue = JobQueue(
+                    adapters,
+                    output_root,
+                    workers=concurrency,
                     max_retries=max_retries,
                     retry_delay_seconds=retry_delay,
+                    breakers=breakers,
+                    flights=flights,
+                    provider_limits=provider_limits,
                 )
+                queue.start()
                 try:
-                    run_dir = persist_run(
-                        output_root,
-                        request,
-                        response,
-                        preprocessed_inputs=preprocessed_inputs,
-                    )
+                    run_jobs(queue, batch_requests, on_result=_on_result, collect_rows=False)
                 finally:
-                    cleanup_temp_files(preprocessed_inputs)
-                run_dirs.append(str(run_dir))
-                rows.append(
-                    {
-                        "provider": provider,
-                        "model": model,
-                        "prompt": request.prompt,
-                        "status": "ok",
-                        "run_dir": str(run_dir),
-                        "error": "",
-                    }
-                )
-            except Exception as exc:  # noqa: BLE001
-                rows.append(
-                    {
-                        "provider": provider,
-                        "model": model,
-                        "prompt": request.prompt,
-                        "status": "failed",
-                        "run_dir": "",
-                        "error": str(exc),
-                    }
-                )
-
-        summary = output_root / "batch_summary.csv"
-        summarize_results(rows, summary)
-        ok = sum(1 for row in rows if row["status"] == "ok")
+                    queue.stop()
         return {
-            "ok": ok,
-            "failed": len(rows) - ok,
+            "ok": counts["ok"],
+            "failed": counts["failed"],
+            "parked": counts["parked"],
             "summary": str(summary),
             "run_dirs": run_dirs,
         }
 
-    @staticmethod
-    def _read_prompts_file(path: str) -> List[str]:
-        prompts = [line.strip() for line in Path(path).read_text(encoding="utf-8").splitlines()]
-        non_empty = [item for item in prompts if item]
-        if not non_empty:
-            raise ValueError("prompts file is empty")
-        return non_empty
-
     def _format_generate_result(self, mode: str, payload: Dict[str, Any]) -> str:
         run_dirs = cast(List[str], payload.get("run_dirs", []))
         preview_url = self._first_preview_url(run_dirs)
@@ -2624,6 +2623,8 @@ class ImageGenTuiApp(App[None]):
             f"Finished mode={mode}: ok={payload.get('ok', 0)} "
             f"failed={payload.get('failed', 0)} summary={payload.get('summary', '')}"
         )
+        if payload.get("parked"):
+            message += f"\nParked (provider circuit open): {payload['parked']}"
         if preview_url:
             message += f"\nPreview URL (Ctrl+Left Click): {preview_url}"
         if preprocessed_status: